@@ -0,0 +1,431 @@
+"""
+REST API 부하 테스트 / 벤치마크
+=====================================
+
+main.py의 엔드포인트를 동시 요청으로 호출하여 처리량, 지연 시간(p50/p95/p99), 서버 최대 RSS를 측정한다.
+결과는 JSON으로 저장하고, 저장해 둔 기준 결과(baseline)와 비교하여 성능 저하를 배포 전에 확인한다.
+
+--spawn 이면 krx_replay 재생 서버와 uvicorn 서버를 직접 띄워 실제 KRX 없이 재현 가능하게 측정한다.
+(fixture는 KRX_RECORD_DIR=fixtures/krx 로 서버를 한 번 실행하여 녹화)
+
+사용법:
+    # 재생 서버 + API 서버를 띄워 전체 라우트 측정, 결과 저장
+    python bench_api.py --spawn --fixtures fixtures/krx --date 20250116 \\
+        --concurrency 16 --requests 200 --output bench/baseline.json
+
+    # 변경 후 기준 결과와 비교 (저하 시 종료 코드 1)
+    python bench_api.py --spawn --fixtures fixtures/krx --date 20250116 \\
+        --baseline bench/baseline.json --output bench/current.json
+
+    # 이미 실행 중인 서버 대상 (RSS는 --pid 지정 시 측정)
+    python bench_api.py --url http://localhost:8000 --routes market-cap,fundamental
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+
+# ============================================================================
+# 시나리오 (라우트별 요청)
+# ============================================================================
+
+def build_scenarios(date: Optional[str]) -> List[Dict[str, Any]]:
+    """벤치마크 대상 요청 목록 (name, method, path, params/json)"""
+    d = {"date": date} if date else {}
+    end = {"end": date} if date else {}
+    return [
+        {"name": "status", "method": "GET", "path": "/api/status"},
+        {"name": "stocks-list", "method": "GET", "path": "/api/stocks/list", "params": {"market": "KOSPI", **d}},
+        {"name": "ohlcv", "method": "GET", "path": "/api/stocks/ohlcv",
+         "params": {"ticker": "005930", "period": 30, **end}},
+        {"name": "ohlcv-batch", "method": "POST", "path": "/api/stocks/ohlcv/batch",
+         "json": {"tickers": ["005930", "000660", "035420"], **({"start": date, "end": date} if date else {})}},
+        {"name": "market-cap", "method": "GET", "path": "/api/stocks/market-cap", "params": {"market": "KOSPI", **d}},
+        {"name": "fundamental", "method": "GET", "path": "/api/stocks/fundamental", "params": {"market": "KOSPI", **d}},
+        {"name": "all-markets", "method": "GET", "path": "/api/stocks/all-markets", "params": {"top_n": 50, **d}},
+        {"name": "investor-trading", "method": "GET", "path": "/api/stocks/investor-trading",
+         "params": {"market": "KOSPI", **d}},
+        {"name": "foreign-holding", "method": "GET", "path": "/api/stocks/foreign-holding",
+         "params": {"market": "KOSPI", **d}},
+        {"name": "sector", "method": "GET", "path": "/api/stocks/sector", "params": {"market": "KOSPI", **d}},
+        {"name": "screener", "method": "GET", "path": "/api/screener",
+         "params": {"filter": "PER < 10 and 배당수익률 > 3%", "sort": "시가총액 desc", "market": "ALL", **d}},
+        {"name": "rank", "method": "GET", "path": "/api/rank",
+         "params": {"ticker": "005930", "metric": "MKTCAP", "market": "KOSPI", **d}},
+        {"name": "indicators", "method": "GET", "path": "/api/stocks/indicators",
+         "params": {"ticker": "005930", "indicators": "ma20,rsi14,bb20", "days": 120, **d}},
+        {"name": "indicators-market", "method": "GET", "path": "/api/stocks/indicators",
+         "params": {"market": "KOSPI", "indicators": "ma20,rsi14", "days": 60, **d}},
+        {"name": "returns", "method": "GET", "path": "/api/stocks/returns",
+         "params": {"index_code": "1028", "window": 60, "matrix": "correlation", **d}},
+        {"name": "etf-all", "method": "GET", "path": "/api/etf/all", "params": {"top_n": 100, **d}},
+        {"name": "etn-all", "method": "GET", "path": "/api/etn/all", "params": {"top_n": 100, **d}},
+        {"name": "short-selling-trading", "method": "GET", "path": "/api/short-selling/trading",
+         "params": {"market": "KOSPI", **d}},
+        {"name": "short-selling-balance", "method": "GET", "path": "/api/short-selling/balance",
+         "params": {"market": "KOSPI", **d}},
+        {"name": "credit-trading", "method": "GET", "path": "/api/credit/trading", "params": {"market": "KOSPI", **d}},
+        {"name": "program-trading", "method": "GET", "path": "/api/program/trading",
+         "params": {"market": "KOSPI", **d}},
+        {"name": "index-list", "method": "GET", "path": "/api/index/list", "params": {"market": "KOSPI", **d}},
+        {"name": "index-ohlcv", "method": "GET", "path": "/api/index/ohlcv", "params": {"index_code": "1001", **end}},
+        {"name": "index-components", "method": "GET", "path": "/api/index/components",
+         "params": {"index_code": "1001", **d}},
+        {"name": "futures", "method": "GET", "path": "/api/derivatives/futures", "params": d},
+        {"name": "options", "method": "GET", "path": "/api/derivatives/options", "params": d},
+        {"name": "dividend", "method": "GET", "path": "/api/dividend/info", "params": {"ticker": "005930"}},
+        {"name": "trading-halt", "method": "GET", "path": "/api/special/trading-halt", "params": d},
+        {"name": "admin-issue", "method": "GET", "path": "/api/special/admin-issue", "params": d},
+        {"name": "by-screen", "method": "GET", "path": "/api/krx/by-screen", "params": {"screen": "12001", **d}},
+        {"name": "bld-list", "method": "GET", "path": "/api/krx/bld-list"},
+        {"name": "natural-language", "method": "POST", "path": "/api/natural-language",
+         "json": {"query": "삼성전자 주가", "execute": True}},
+        {"name": "natural-language-batch", "method": "POST", "path": "/api/natural-language/batch",
+         "json": {"queries": ["삼성전자 주가", "코스피 시가총액 순위", "SK하이닉스 PER"], "execute": True}},
+        {"name": "nl-intents", "method": "GET", "path": "/api/natural-language/intents"},
+        {"name": "nl-tickers", "method": "GET", "path": "/api/natural-language/tickers"},
+        {"name": "metrics", "method": "GET", "path": "/metrics"},
+    ]
+
+
+# ============================================================================
+# 측정
+# ============================================================================
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """nearest-rank 백분위수 (정렬된 값에서 ceil(q × n / 100)번째, 1..100의 p95 = 95)"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values) / 100) - 1))
+    return sorted_values[index]
+
+
+class RSSMonitor:
+    """프로세스(와 자식 프로세스) RSS 합계를 주기적으로 샘플링하여 최대값 기록 (Linux /proc)"""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _rss_kb(pid: int) -> int:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return 0
+
+    def _tree(self) -> List[int]:
+        pids = [self.pid]
+        try:
+            for task in os.listdir(f"/proc/{self.pid}/task"):
+                with open(f"/proc/{self.pid}/task/{task}/children") as f:
+                    pids.extend(int(p) for p in f.read().split())
+        except OSError:
+            pass
+        return pids
+
+    def sample(self):
+        self.peak_kb = max(self.peak_kb, sum(self._rss_kb(p) for p in self._tree()))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        if not os.path.exists(f"/proc/{self.pid}"):
+            print("⚠️ [bench] /proc 없음 - RSS 측정 생략")
+            return
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="bench-rss", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Optional[float]:
+        self._stop.set()
+        if self._thread is None:
+            return None
+        self._thread.join()
+        return round(self.peak_kb / 1024, 1)
+
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def _call(base_url: str, scenario: Dict[str, Any], timeout: float):
+    """요청 1회 → (지연 시간 초, 성공 여부)"""
+    started = time.perf_counter()
+    try:
+        resp = _session().request(
+            scenario["method"], base_url + scenario["path"],
+            params=scenario.get("params"), json=scenario.get("json"), timeout=timeout,
+        )
+        resp.content
+        ok = resp.status_code < 400
+    except requests.RequestException:
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run_scenario(base_url: str, scenario: Dict[str, Any], concurrency: int, count: int,
+                 warmup: int, timeout: float) -> Dict[str, Any]:
+    """한 라우트를 동시성 concurrency로 count회 호출"""
+    first_latency, _ = _call(base_url, scenario, timeout)  # 콜드 (캐시 미스) 1회
+    for _ in range(warmup):
+        _call(base_url, scenario, timeout)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: _call(base_url, scenario, timeout), range(count)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(lat for lat, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / wall, 1) if wall > 0 else None,
+        "cold_ms": ms(first_latency),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]) if latencies else None,
+    }
+
+
+# ============================================================================
+# 서버 실행 (--spawn)
+# ============================================================================
+
+def spawn_servers(args):
+    """재생 서버(프로세스 내 스레드) + uvicorn(서브프로세스) 시작"""
+    import krx_replay
+
+    config = krx_replay.ReplayConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        loose=args.loose, seed=0,
+    )
+    replay, _ = krx_replay.serve(args.fixtures, port=args.replay_port, config=config)
+
+    env = dict(os.environ,
+               KRX_BASE_URL=f"http://127.0.0.1:{replay.server_address[1]}",
+               KRX_PREWARM="0", PYTHONUNBUFFERED="1")
+    env.pop("KRX_RECORD_DIR", None)
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+           "--port", str(args.port), "--log-level", "warning", "--workers", str(args.workers)]
+    log = open(args.server_log, "w", encoding="utf-8") if args.server_log else subprocess.DEVNULL
+    server = subprocess.Popen(cmd, cwd=Path(__file__).resolve().parent, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"API 서버 종료됨 (exit {server.returncode}), --server-log로 확인")
+        try:
+            resp = requests.get(base_url + "/api/status", timeout=2)
+            # 빠른 시작 모드(KRX_FAST_STARTUP=1)면 백그라운드 시작 단계 완료까지 대기
+            if resp.status_code == 200 and resp.json().get("ready", True):
+                return replay, server, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"API 서버가 {args.startup_timeout}초 안에 준비되지 않음")
+
+
+def replay_stats(replay) -> Optional[Dict[str, Any]]:
+    if replay is None:
+        return None
+    try:
+        return requests.get(f"http://127.0.0.1:{replay.server_address[1]}/__replay/stats", timeout=2).json()
+    except requests.RequestException:
+        return None
+
+
+# ============================================================================
+# 기준 결과 비교
+# ============================================================================
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    라우트별 p95/처리량 비교
+
+    Returns:
+        [{"route", "metric", "baseline", "current", "change_pct", "regression"}]
+    """
+    rows = []
+    for name, cur in current["routes"].items():
+        base = baseline.get("routes", {}).get(name)
+        if not base:
+            continue
+        for metric, higher_is_better in (("p95_ms", False), ("p99_ms", False), ("throughput_rps", True)):
+            b, c = base.get(metric), cur.get(metric)
+            if not b or c is None:
+                continue
+            change = (c - b) / b
+            regression = change < -tolerance if higher_is_better else change > tolerance
+            rows.append({"route": name, "metric": metric, "baseline": b, "current": c,
+                         "change_pct": round(change * 100, 1), "regression": regression})
+        if cur["errors"] > base.get("errors", 0):
+            rows.append({"route": name, "metric": "errors", "baseline": base.get("errors", 0),
+                         "current": cur["errors"], "change_pct": None, "regression": True})
+
+    base_rss, cur_rss = baseline.get("peak_rss_mb"), current.get("peak_rss_mb")
+    if base_rss and cur_rss:
+        change = (cur_rss - base_rss) / base_rss
+        rows.append({"route": "*", "metric": "peak_rss_mb", "baseline": base_rss, "current": cur_rss,
+                     "change_pct": round(change * 100, 1), "regression": change > tolerance})
+    return rows
+
+
+def print_report(result: Dict[str, Any], comparison: Optional[List[Dict[str, Any]]]):
+    print()
+    print(f"{'route':<26}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'cold':>9}{'err':>6}")
+    print("-" * 77)
+    for name, r in result["routes"].items():
+        fmt = lambda v: f"{v:>9.1f}" if v is not None else f"{'-':>9}"
+        print(f"{name:<26}{fmt(r['throughput_rps'])}{fmt(r['p50_ms'])}{fmt(r['p95_ms'])}"
+              f"{fmt(r['p99_ms'])}{fmt(r['cold_ms'])}{r['errors']:>6}")
+    if result.get("peak_rss_mb") is not None:
+        print(f"\n서버 최대 RSS: {result['peak_rss_mb']} MB")
+
+    if comparison is None:
+        return
+    regressions = [row for row in comparison if row["regression"]]
+    print(f"\n기준 결과 비교: {len(comparison)}개 항목, 저하 {len(regressions)}개")
+    for row in regressions:
+        change = f"{row['change_pct']:+.1f}%" if row["change_pct"] is not None else ""
+        print(f"  ❌ {row['route']} {row['metric']}: {row['baseline']} → {row['current']} {change}")
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="pykrx-api REST 엔드포인트 벤치마크")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="대상 서버 (--spawn 미사용 시)")
+    parser.add_argument("--routes", default="", help="측정할 라우트 이름 (쉼표 구분, 기본: 전체)")
+    parser.add_argument("--date", default=None, help="기준일 YYYYMMDD (녹화된 fixture 날짜)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="라우트별 측정 요청 수")
+    parser.add_argument("--warmup", type=int, default=3, help="라우트별 측정 전 요청 수")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--pid", type=int, default=None, help="RSS를 측정할 서버 PID (--url 사용 시)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로 (- 이면 stdout)")
+    parser.add_argument("--baseline", default=None, help="비교할 기준 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="허용 저하 비율 (기본 10%%)")
+
+    spawn = parser.add_argument_group("--spawn (재생 서버 + API 서버 실행)")
+    spawn.add_argument("--spawn", action="store_true")
+    spawn.add_argument("--fixtures", default="fixtures/krx")
+    spawn.add_argument("--port", type=int, default=8010)
+    spawn.add_argument("--replay-port", type=int, default=0, help="0이면 임의 포트")
+    spawn.add_argument("--workers", type=int, default=1)
+    spawn.add_argument("--latency-ms", type=float, default=50, help="재생 서버 응답 지연")
+    spawn.add_argument("--jitter-ms", type=float, default=20)
+    spawn.add_argument("--error-rate", type=float, default=0.0)
+    spawn.add_argument("--loose", action="store_true", help="파라미터가 달라도 같은 bld fixture 반환")
+    spawn.add_argument("--startup-timeout", type=float, default=120)
+    spawn.add_argument("--server-log", default=None, help="API 서버 로그 파일")
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args.date)
+    if args.routes:
+        wanted = {r.strip() for r in args.routes.split(",") if r.strip()}
+        unknown = wanted - {s["name"] for s in scenarios}
+        if unknown:
+            parser.error(f"알 수 없는 라우트: {', '.join(sorted(unknown))}")
+        scenarios = [s for s in scenarios if s["name"] in wanted]
+
+    replay = server = None
+    base_url = args.url.rstrip("/")
+    if args.spawn:
+        replay, server, base_url = spawn_servers(args)
+    pid = server.pid if server else args.pid
+    monitor = RSSMonitor(pid) if pid else None
+
+    try:
+        if monitor:
+            monitor.start()
+        routes = {}
+        for scenario in scenarios:
+            print(f"⏱️ [bench] {scenario['name']} ({args.requests}회, 동시성 {args.concurrency})")
+            routes[scenario["name"]] = run_scenario(
+                base_url, scenario, args.concurrency, args.requests, args.warmup, args.timeout)
+        peak_rss = monitor.stop() if monitor else None
+        upstream = replay_stats(replay)
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+        if replay:
+            replay.shutdown()
+
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "url": base_url,
+            "spawned": args.spawn,
+            "workers": args.workers if args.spawn else None,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "date": args.date,
+            "replay": {"latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+                       "error_rate": args.error_rate, "stats": upstream} if args.spawn else None,
+        },
+        "peak_rss_mb": peak_rss,
+        "routes": routes,
+    }
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            comparison = compare(result, json.load(f), args.tolerance)
+        result["comparison"] = comparison
+
+    print_report(result, comparison)
+
+    if args.output == "-":
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"💾 [bench] 결과 저장: {args.output}")
+
+    if comparison and any(row["regression"] for row in comparison):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,422 @@
+"""
+인텐트 분류기 벤치마크 / 정확도 측정
+=====================================
+
+라벨이 붙은 한국어 질의 코퍼스를 KeywordMatcher, EmbeddingClassifier, HybridIntentClassifier에 통과시켜
+단계별 지연 시간 분포, 처리량(queries/s), 단계별 처리 비율, 정확도를 측정한다.
+
+keyword_threshold / embedding_threshold 조합별 결과는 단계별 예측(신뢰도 포함)을 한 번만 계산한 뒤
+하이브리드 폴백 규칙을 그대로 적용해 산출하므로, 임계값 수에 관계없이 모델 호출은 1회다.
+
+- 임베딩(sentence-transformers) 미설치 시 해당 단계는 생략
+- LLM 단계는 비용이 들므로 --llm 지정 시에만 실행 (GEMINI_API_KEY 필요)
+
+사용법:
+    python bench_classifier.py
+    python bench_classifier.py --repeat 200 --output bench/classifier.json
+    python bench_classifier.py --corpus my_queries.jsonl   # {"query": "...", "intent": "..."} 한 줄씩
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from bench_api import percentile
+from intent_classifier import (
+    EMBEDDING_AVAILABLE,
+    GEMINI_AVAILABLE,
+    EmbeddingClassifier,
+    HybridIntentClassifier,
+    IntentConfig,
+    KeywordMatcher,
+    LLMClassifier,
+)
+
+# (질의, 정답 인텐트)
+CORPUS: List[Tuple[str, str]] = [
+    # stock_price
+    ("삼성전자 오늘 주가 알려줘", "stock_price"),
+    ("SK하이닉스 종가", "stock_price"),
+    ("카카오 시세 어때", "stock_price"),
+    ("네이버 주식 얼마야", "stock_price"),
+    ("현대차 최근 한달 가격 추이", "stock_price"),
+    ("LG에너지솔루션 고가 저가", "stock_price"),
+    ("셀트리온 어제 거래량", "stock_price"),
+    ("삼성전자 요즘 많이 올랐어?", "stock_price"),
+    # market_cap
+    ("코스피 시가총액 순위", "market_cap"),
+    ("코스닥 시총 상위 10개", "market_cap"),
+    ("삼성전자 시가총액", "market_cap"),
+    ("시장에서 제일 큰 회사들", "market_cap"),
+    ("마켓캡 기준 상위 종목", "market_cap"),
+    # fundamental
+    ("SK하이닉스 PER 얼마야", "fundamental"),
+    ("삼성전자 PBR", "fundamental"),
+    ("배당수익률 높은 종목", "fundamental"),
+    ("현대차 EPS 알려줘", "fundamental"),
+    ("저평가된 주식 찾아줘", "fundamental"),
+    ("카카오 주당순이익", "fundamental"),
+    # investor_trading
+    ("외국인 순매수 현황", "investor_trading"),
+    ("기관 매매동향", "investor_trading"),
+    ("개인 투자자 순매도 종목", "investor_trading"),
+    ("오늘 누가 많이 샀어", "investor_trading"),
+    ("투자자별 거래 실적", "investor_trading"),
+    # foreign_holding
+    ("삼성전자 외국인 보유율", "foreign_holding"),
+    ("외국인지분 높은 종목", "foreign_holding"),
+    ("외인 보유 비중", "foreign_holding"),
+    # etf_list / etf_price / etf_pdf
+    ("ETF 전체 목록 보여줘", "etf_list"),
+    ("상장지수펀드 리스트", "etf_list"),
+    ("ETF 시세 알려줘", "etf_price"),
+    ("KODEX 200 가격", "etf_price"),
+    ("ETF 구성종목 보여줘", "etf_pdf"),
+    ("TIGER 반도체 포트폴리오", "etf_pdf"),
+    # etn_list / elw_list
+    ("ETN 목록", "etn_list"),
+    ("상장지수증권 종류", "etn_list"),
+    ("ELW 리스트", "elw_list"),
+    ("주식워런트증권 보여줘", "elw_list"),
+    # short_selling / short_balance
+    ("공매도 거래 현황", "short_selling"),
+    ("오늘 공매도 많은 종목", "short_selling"),
+    ("공매도 잔고 순위", "short_balance"),
+    ("대차잔고 많은 종목", "short_balance"),
+    # index_price / index_components / index_fundamental
+    ("코스피 지수 알려줘", "index_price"),
+    ("코스닥 오늘 어때", "index_price"),
+    ("코스피200 지수 추이", "index_price"),
+    ("시장 전체 흐름은?", "index_price"),
+    ("코스피200 구성종목", "index_components"),
+    ("코스닥150 편입종목", "index_components"),
+    ("지수 PER", "index_fundamental"),
+    ("코스피 지수 배당수익률", "index_fundamental"),
+    # sector
+    ("업종별 등락률", "sector"),
+    ("반도체 섹터 현황", "sector"),
+    ("어떤 업종이 제일 올랐어", "sector"),
+    # futures_price / options_price / bond_price
+    ("코스피200 선물 시세", "futures_price"),
+    ("선물 가격 알려줘", "futures_price"),
+    ("콜옵션 시세", "options_price"),
+    ("풋옵션 가격", "options_price"),
+    ("국채 금리", "bond_price"),
+    ("회사채 수익률", "bond_price"),
+    # krx_bld
+    ("KRX 데이터 BLD 조회", "krx_bld"),
+    ("상세데이터 화면번호로 조회", "krx_bld"),
+    # server_status
+    ("서버 상태 확인", "server_status"),
+    ("로그인 상태 어때", "server_status"),
+    # ticker_search
+    ("삼성전자 종목코드", "ticker_search"),
+    ("카카오 티커 찾아줘", "ticker_search"),
+    # comprehensive_analysis
+    ("삼성전자 분석해줘", "comprehensive_analysis"),
+    ("현대차 종합 리포트", "comprehensive_analysis"),
+    ("SK하이닉스 투자해도 될까", "comprehensive_analysis"),
+    ("네이버 요약해줘", "comprehensive_analysis"),
+]
+
+KEYWORD_SWEEP = (0.5, 0.6, 0.7, 0.8, 0.9)
+EMBEDDING_SWEEP = (0.4, 0.5, 0.6, 0.7, 0.8)
+
+
+def load_corpus(path: Optional[str]) -> List[Tuple[str, str]]:
+    if not path:
+        return list(CORPUS)
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                corpus.append((item["query"], item["intent"]))
+    unknown = {intent for _, intent in corpus} - set(IntentConfig.INTENTS)
+    if unknown:
+        print(f"⚠️ [bench] 정의되지 않은 인텐트 라벨: {', '.join(sorted(unknown))}")
+    return corpus
+
+
+def summarize(latencies_ms: List[float]) -> Dict[str, Optional[float]]:
+    """지연 시간 분포 (ms)"""
+    if not latencies_ms:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+    values = sorted(latencies_ms)
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 4),
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "p99": round(percentile(values, 99), 4),
+        "max": round(values[-1], 4),
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    """분류기의 단계별 로그 출력 억제 (측정값에 콘솔 출력 비용이 섞이지 않도록)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+# ============================================================================
+# 단계별 측정
+# ============================================================================
+
+def bench_keyword(corpus, repeat: int) -> Tuple[Dict[str, Any], List[Optional[Tuple[str, float]]]]:
+    matcher = KeywordMatcher()
+    latencies = []
+    predictions = [None] * len(corpus)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for i, (query, _) in enumerate(corpus):
+            t = time.perf_counter()
+            result = matcher.match(query)
+            latencies.append((time.perf_counter() - t) * 1000)
+            predictions[i] = (result.intent, result.confidence) if result else None
+    elapsed = time.perf_counter() - started
+    return {
+        "latency_ms": summarize(latencies),
+        "throughput_qps": round(len(latencies) / elapsed, 1),
+        "matched": sum(p is not None for p in predictions),
+    }, predictions
+
+
+def bench_embedding(corpus, repeat: int) -> Tuple[Optional[Dict[str, Any]], List[Optional[Tuple[str, float]]]]:
+    if not EMBEDDING_AVAILABLE:
+        print("⚠️ [bench] 임베딩 단계 생략 (sentence-transformers 미설치)")
+        return None, [None] * len(corpus)
+
+    classifier = EmbeddingClassifier()
+    queries = [q for q, _ in corpus]
+
+    # 단건 (HybridIntentClassifier.classify 경로)
+    single = []
+    for _ in range(repeat):
+        for query in queries:
+            t = time.perf_counter()
+            classifier.classify(query, threshold=-1.0)
+            single.append((time.perf_counter() - t) * 1000)
+
+    # 배치 (classify_batch 경로, encode 1회)
+    batch = []
+    results = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        results = classifier.classify_batch(queries, threshold=-1.0)
+        batch.append((time.perf_counter() - t) * 1000)
+
+    predictions = [(r.intent, r.confidence) if r else None for r in results]
+    batch_total = sum(batch) / 1000
+    return {
+        "single_latency_ms": summarize(single),
+        "single_throughput_qps": round(len(single) / (sum(single) / 1000), 1),
+        "batch_latency_ms": summarize(batch),
+        "batch_throughput_qps": round(len(queries) * len(batch) / batch_total, 1) if batch_total else None,
+    }, predictions
+
+
+def bench_llm(corpus) -> Tuple[Optional[Dict[str, Any]], List[Optional[str]]]:
+    classifier = LLMClassifier() if GEMINI_AVAILABLE else None
+    if classifier is None or classifier.model is None:
+        print("⚠️ [bench] LLM 단계 생략 (google-generativeai 또는 GEMINI_API_KEY 없음)")
+        return None, [None] * len(corpus)
+
+    latencies, predictions = [], []
+    for query, _ in corpus:
+        t = time.perf_counter()
+        with quiet():
+            result = asyncio.run(classifier.classify(query))
+        latencies.append((time.perf_counter() - t) * 1000)
+        predictions.append(result.intent if result else None)
+    return {"latency_ms": summarize(latencies),
+            "throughput_qps": round(len(latencies) / (sum(latencies) / 1000), 2)}, predictions
+
+
+def bench_hybrid(corpus, repeat: int, enable_llm: bool) -> Dict[str, Any]:
+    """기본 임계값의 HybridIntentClassifier 실측 (단건 classify / classify_batch)"""
+    with quiet():
+        classifier = HybridIntentClassifier(enable_embedding=EMBEDDING_AVAILABLE, enable_llm=enable_llm)
+    queries = [q for q, _ in corpus]
+
+    async def run():
+        single, methods, correct = [], {}, 0
+        for _ in range(repeat):
+            for query, label in corpus:
+                t = time.perf_counter()
+                result = await classifier.classify(query)
+                single.append((time.perf_counter() - t) * 1000)
+                methods[result.method] = methods.get(result.method, 0) + 1
+                correct += result.intent == label
+        t = time.perf_counter()
+        await classifier.classify_batch(queries)
+        batch_ms = (time.perf_counter() - t) * 1000
+        return single, methods, correct, batch_ms
+
+    with quiet():
+        single, methods, correct, batch_ms = asyncio.run(run())
+    total = len(single)
+    return {
+        "keyword_threshold": classifier.keyword_threshold,
+        "embedding_threshold": classifier.embedding_threshold,
+        "latency_ms": summarize(single),
+        "throughput_qps": round(total / (sum(single) / 1000), 1),
+        "batch_ms": round(batch_ms, 2),
+        "batch_throughput_qps": round(len(queries) / (batch_ms / 1000), 1) if batch_ms else None,
+        # 폴백(4단계)으로 반환된 키워드 결과도 method="keyword"로 집계됨 (구분은 sweep 참고)
+        "stage_fraction": {m: round(c / total, 3) for m, c in sorted(methods.items())},
+        "accuracy": round(correct / total, 3),
+    }
+
+
+# ============================================================================
+# 임계값 조합별 하이브리드 결과 (단계별 예측 재사용)
+# ============================================================================
+
+def simulate(corpus, keyword_preds, embedding_preds, llm_preds, stage_cost_ms: Dict[str, float],
+             keyword_threshold: float, embedding_threshold: float, use_embedding: bool, use_llm: bool):
+    """HybridIntentClassifier.classify와 같은 폴백 규칙으로 결과 산출"""
+    stages = {"keyword": 0, "embedding": 0, "llm": 0, "fallback": 0, "none": 0}
+    correct = 0
+    cost = 0.0
+    per_intent: Dict[str, List[int]] = {}
+    for i, (_, label) in enumerate(corpus):
+        kw, emb, llm = keyword_preds[i], embedding_preds[i], llm_preds[i]
+        cost += stage_cost_ms["keyword"]
+        if kw and kw[1] >= keyword_threshold:
+            stage, predicted = "keyword", kw[0]
+        else:
+            stage = predicted = None
+            if use_embedding:
+                cost += stage_cost_ms["embedding"]
+                if emb and emb[1] >= embedding_threshold:
+                    stage, predicted = "embedding", emb[0]
+            if stage is None and use_llm:
+                cost += stage_cost_ms["llm"]
+                if llm:
+                    stage, predicted = "llm", llm
+            if stage is None:
+                stage, predicted = ("fallback", kw[0]) if kw else ("none", "unknown")
+        stages[stage] += 1
+        hit = predicted == label
+        correct += hit
+        counts = per_intent.setdefault(label, [0, 0])
+        counts[0] += hit
+        counts[1] += 1
+
+    n = len(corpus)
+    return {
+        "keyword_threshold": keyword_threshold,
+        "embedding_threshold": embedding_threshold if use_embedding else None,
+        "accuracy": round(correct / n, 3),
+        "stage_fraction": {k: round(v / n, 3) for k, v in stages.items() if v},
+        "est_mean_latency_ms": round(cost / n, 3),
+        "per_intent_accuracy": {k: round(c / t, 3) for k, (c, t) in sorted(per_intent.items())},
+    }
+
+
+def stage_accuracy(corpus, predictions) -> Optional[float]:
+    """단계 단독 정확도 (임계값 없이 최고 점수 인텐트 기준, 예측 없으면 오답)"""
+    if not any(predictions):
+        return None
+    hits = sum(1 for (_, label), p in zip(corpus, predictions)
+               if p and (p[0] if isinstance(p, tuple) else p) == label)
+    return round(hits / len(corpus), 3)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="하이브리드 인텐트 분류기 벤치마크")
+    parser.add_argument("--corpus", default=None, help="JSONL 코퍼스 ({\"query\", \"intent\"}), 기본: 내장 코퍼스")
+    parser.add_argument("--repeat", type=int, default=50, help="키워드 단계 반복 횟수")
+    parser.add_argument("--embedding-repeat", type=int, default=3, help="임베딩 단계 반복 횟수")
+    parser.add_argument("--llm", action="store_true", help="LLM 단계 포함 (API 호출 비용 발생)")
+    parser.add_argument("--keyword-thresholds", default=",".join(map(str, KEYWORD_SWEEP)))
+    parser.add_argument("--embedding-thresholds", default=",".join(map(str, EMBEDDING_SWEEP)))
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    print(f"📋 [bench] 코퍼스 {len(corpus)}개, 인텐트 {len({i for _, i in corpus})}종")
+
+    keyword_stats, keyword_preds = bench_keyword(corpus, args.repeat)
+    embedding_stats, embedding_preds = bench_embedding(corpus, args.embedding_repeat)
+    llm_stats, llm_preds = bench_llm(corpus) if args.llm else (None, [None] * len(corpus))
+    hybrid_stats = bench_hybrid(corpus, 1, enable_llm=args.llm)
+
+    stage_cost = {
+        "keyword": keyword_stats["latency_ms"]["mean"] or 0.0,
+        "embedding": embedding_stats["single_latency_ms"]["mean"] if embedding_stats else 0.0,
+        "llm": llm_stats["latency_ms"]["mean"] if llm_stats else 0.0,
+    }
+    use_embedding = embedding_stats is not None
+    use_llm = llm_stats is not None
+    keyword_sweep = [float(v) for v in args.keyword_thresholds.split(",") if v]
+    embedding_sweep = [float(v) for v in args.embedding_thresholds.split(",") if v] if use_embedding else [None]
+    sweep = [
+        simulate(corpus, keyword_preds, embedding_preds, llm_preds, stage_cost, kt, et, use_embedding, use_llm)
+        for kt in keyword_sweep for et in embedding_sweep
+    ]
+
+    keyword_stats["accuracy"] = stage_accuracy(corpus, keyword_preds)
+    if embedding_stats:
+        embedding_stats["accuracy"] = stage_accuracy(corpus, embedding_preds)
+    if llm_stats:
+        llm_stats["accuracy"] = stage_accuracy(corpus, llm_preds)
+
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "corpus_size": len(corpus),
+            "embedding_available": use_embedding,
+            "llm_enabled": use_llm,
+        },
+        "stages": {"keyword": keyword_stats, "embedding": embedding_stats, "llm": llm_stats},
+        "hybrid": hybrid_stats,
+        "sweep": sweep,
+    }
+
+    # 리포트
+    print()
+    print("[STAGE]      mean(ms)   p95(ms)   queries/s  accuracy")
+    for name, stats in result["stages"].items():
+        if not stats:
+            continue
+        latency = stats.get("latency_ms") or stats.get("single_latency_ms")
+        qps = stats.get("throughput_qps") or stats.get("single_throughput_qps")
+        print(f"  {name:<10}{latency['mean']:>10.3f}{latency['p95']:>10.3f}{qps:>12.1f}{stats['accuracy'] or 0:>10.3f}")
+    print(f"\n[HYBRID] 정확도 {hybrid_stats['accuracy']:.3f}, 평균 {hybrid_stats['latency_ms']['mean']:.3f}ms, "
+          f"단계 비율 {hybrid_stats['stage_fraction']}")
+    print("\n[SWEEP] keyword_th  embedding_th  accuracy  est_ms   stage_fraction")
+    for row in sweep:
+        et = f"{row['embedding_threshold']:.2f}" if row["embedding_threshold"] is not None else "-"
+        print(f"        {row['keyword_threshold']:<11.2f} {et:<13} {row['accuracy']:<9.3f} "
+              f"{row['est_mean_latency_ms']:<8.3f} {row['stage_fraction']}")
+
+    misses = [(q, label, p[0] if p else None) for (q, label), p in zip(corpus, keyword_preds)
+              if not p or p[0] != label]
+    if misses:
+        print(f"\n[KEYWORD MISS] {len(misses)}건")
+        for query, label, predicted in misses:
+            print(f"  {query} → {predicted} (정답: {label})")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 [bench] 결과 저장: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
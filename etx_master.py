@@ -0,0 +1,295 @@
+"""
+ETF/ETN/ELW 종목 마스터 (지연 로드 + 디스크 저장 + 인덱스)
+=====================================
+
+pykrx EtxTicker는 생성 시 3개 마스터 테이블을 모두 조회하고 DataFrame 전체에 정규식 치환을 적용하며,
+get_ticker(market, date) 마다 전체 행에 대한 불리언 마스크를 만든다.
+이 모듈은 같은 데이터를 다음 구조로 보관한다.
+
+- by_ticker: 티커 → (isin, 종목명, 시장, 상장일)                        O(1) 조회
+- 시장(ETF/ETN/ELW)별 상장일 정렬 배열 + 티커 배열                      bisect로 O(log n) 범위 조회
+- 디스크 저장 (.krx_etx_master.json, 원자적 교체): 재시작/다른 워커는 조회 없이 로드
+- 갱신은 시장 단위로 비교하여 변경된 시장의 인덱스만 재구성 (추가/삭제/변경 건수 기록)
+- 저장본이 오래되었으면(STALE_AFTER) 기존 데이터로 응답하며 백그라운드에서 갱신
+
+사용법:
+    from etx_master import etx_master
+    etx_master.get_ticker("ETF", "20250116")    # 해당 일자까지 상장된 ETF 티커
+    etx_master.get_name("069500")               # "KODEX 200"
+    etx_master.refresh()                        # 전체 시장 재조회 후 변경분 반영
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CATEGORIES = ("ETF", "ETN", "ELW")
+
+MASTER_FILE = Path(os.getenv("KRX_ETX_MASTER_FILE", ".krx_etx_master.json"))
+
+# 저장본이 이 시간(초)보다 오래되면 백그라운드 갱신 (신규 상장은 영업일 단위)
+STALE_AFTER = 12 * 3600
+
+# 최초 조회 실패 시 재시도 간격 (초)
+RETRY_AFTER = 60
+
+# (티커, isin, 종목명, 상장일)
+Row = Tuple[str, str, str, str]
+
+
+def fetch_category(category: str) -> Optional[List[Row]]:
+    """KRX 전종목 기본정보 조회 (pykrx etx core) → 행 목록, 실패 시 None"""
+    from pykrx.website.krx.etx.core import ELW_전종목기본종목, ETF_전종목기본종목, ETN_전종목기본종목
+
+    fetcher = {"ETF": ETF_전종목기본종목, "ETN": ETN_전종목기본종목, "ELW": ELW_전종목기본종목}[category]
+    try:
+        df = fetcher().fetch()
+    except Exception as e:
+        print(f"⚠️ [etx] {category} 마스터 조회 실패: {e}")
+        return None
+    if df is None or df.empty:
+        return None
+    rows = []
+    for isin, ticker, name, list_date in df[["ISU_CD", "ISU_SRT_CD", "ISU_ABBRV", "LIST_DD"]].itertuples(index=False):
+        # pykrx와 동일하게 '/' 제거 (상장일 2002/10/14 → 20021014)
+        rows.append((str(ticker).replace("/", ""), str(isin).replace("/", ""),
+                     str(name).replace("/", ""), str(list_date).replace("/", "")))
+    return rows
+
+
+class _CategoryIndex:
+    """시장별 상장일 정렬 인덱스"""
+    __slots__ = ("rows", "dates", "tickers")
+
+    def __init__(self, rows: List[Row]):
+        self.rows = rows
+        ordered = sorted(rows, key=lambda r: (r[3], r[0]))
+        self.dates = [r[3] for r in ordered]
+        self.tickers = [r[0] for r in ordered]
+
+    def listed_until(self, date: str) -> List[str]:
+        """상장일 <= date 인 티커 (상장일 순)"""
+        return self.tickers[:bisect.bisect_right(self.dates, date)]
+
+
+class EtxMaster:
+    """
+    ETF/ETN/ELW 종목 마스터
+
+    Args:
+        path: 저장 파일 경로 (None이면 디스크 저장 안 함)
+        fetch: fetch(category) → 행 목록 또는 None
+        stale_after: 저장본 갱신 주기 (초)
+    """
+
+    def __init__(self, path: Optional[Path] = MASTER_FILE,
+                 fetch: Callable[[str], Optional[List[Row]]] = fetch_category,
+                 stale_after: float = STALE_AFTER):
+        self.path = Path(path) if path else None
+        self.fetch = fetch
+        self.stale_after = stale_after
+        self._lock = threading.RLock()
+        self._indexes: Dict[str, _CategoryIndex] = {}
+        self._by_ticker: Dict[str, Tuple[str, str, str, str]] = {}  # ticker → (isin, name, market, list_date)
+        self._all: List[str] = []
+        self._loaded = False
+        self._retry_at = 0.0
+        self._refreshing = False
+        self.updated_at: Dict[str, float] = {}
+        self.version = 0
+        self.last_refresh: Optional[Dict[str, Any]] = None
+
+    # ------------------------------------------------------------------
+    # 로드 / 저장
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self):
+        if self._loaded or time.time() < self._retry_at:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if not self._load_file():
+                self.refresh(save=True)
+            elif self._is_stale():
+                self._refresh_in_background()
+            if self._by_ticker:
+                self._loaded = True
+            else:
+                # 조회 실패 시 요청마다 재조회하지 않도록 잠시 대기
+                self._retry_at = time.time() + RETRY_AFTER
+
+    def _load_file(self) -> bool:
+        if not self.path or not self.path.exists():
+            return False
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            for category, entry in data.get("categories", {}).items():
+                self._set_category(category, [tuple(r) for r in entry["rows"]], entry.get("updated_at", 0))
+            self._rebuild_lookup()
+            print(f"✅ [etx] 마스터 로드 ({self.path}, {len(self._by_ticker)}종목)")
+            return bool(self._by_ticker)
+        except Exception as e:
+            print(f"⚠️ [etx] 마스터 파일 로드 실패: {e}")
+            return False
+
+    def _save_file(self):
+        if not self.path:
+            return
+        data = {
+            "categories": {
+                category: {"updated_at": self.updated_at.get(category, 0), "rows": index.rows}
+                for category, index in self._indexes.items()
+            }
+        }
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ [etx] 마스터 저장 실패: {e}")
+
+    def _is_stale(self) -> bool:
+        oldest = min((self.updated_at.get(c, 0) for c in CATEGORIES), default=0)
+        return time.time() - oldest > self.stale_after
+
+    # ------------------------------------------------------------------
+    # 갱신
+    # ------------------------------------------------------------------
+
+    def _set_category(self, category: str, rows: List[Row], updated_at: float):
+        self._indexes[category] = _CategoryIndex(rows)
+        self.updated_at[category] = updated_at
+
+    def _rebuild_lookup(self):
+        by_ticker = {}
+        for category in CATEGORIES:
+            index = self._indexes.get(category)
+            if index is None:
+                continue
+            for ticker, isin, name, list_date in index.rows:
+                by_ticker[ticker] = (isin, name, category, list_date)
+        self._by_ticker = by_ticker
+        self._all = list(by_ticker)
+        self.version += 1
+
+    def refresh(self, categories=CATEGORIES, save: bool = True) -> Dict[str, Dict[str, int]]:
+        """
+        시장별 재조회 후 변경분만 반영
+
+        조회 실패한 시장은 기존 데이터를 유지한다.
+
+        Returns:
+            {시장: {"added", "removed", "changed"}}
+        """
+        fetched = {category: self.fetch(category) for category in categories}
+        diff: Dict[str, Dict[str, int]] = {}
+        now = time.time()
+        with self._lock:
+            changed = False
+            for category, rows in fetched.items():
+                if rows is None:
+                    continue
+                old = {r[0]: r for r in self._indexes[category].rows} if category in self._indexes else {}
+                new = {r[0]: r for r in rows}
+                stats = {
+                    "added": len(new.keys() - old.keys()),
+                    "removed": len(old.keys() - new.keys()),
+                    "changed": sum(1 for t in new.keys() & old.keys() if new[t] != old[t]),
+                }
+                diff[category] = stats
+                if any(stats.values()) or category not in self._indexes:
+                    self._set_category(category, rows, now)
+                    changed = True
+                else:
+                    self.updated_at[category] = now
+            if changed:
+                self._rebuild_lookup()
+            if diff and save:
+                self._save_file()
+            self.last_refresh = {"at": now, "diff": diff}
+        if diff:
+            summary = ", ".join(f"{c} +{d['added']}/-{d['removed']}/~{d['changed']}" for c, d in diff.items())
+            print(f"🔄 [etx] 마스터 갱신: {summary}")
+        return diff
+
+    def _refresh_in_background(self):
+        if self._refreshing:
+            return
+        self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="etx-master-refresh", daemon=True).start()
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+
+    def load(self) -> int:
+        """마스터 로드 (이미 로드되었으면 즉시 반환) → 종목 수"""
+        self._ensure_loaded()
+        return len(self._by_ticker)
+
+    def get_ticker(self, market: str, date: str) -> List[str]:
+        """시장별 date까지 상장된 티커 (ALL이면 전체)"""
+        self._ensure_loaded()
+        if market == "ALL":
+            return list(self._all)
+        index = self._indexes.get(market)
+        return index.listed_until(date) if index else []
+
+    def get(self, ticker: str) -> Optional[Tuple[str, str, str, str]]:
+        """티커 → (isin, 종목명, 시장, 상장일)"""
+        self._ensure_loaded()
+        return self._by_ticker.get(ticker)
+
+    def get_name(self, ticker: str) -> str:
+        entry = self.get(ticker)
+        return entry[1] if entry else ticker
+
+    def get_market(self, ticker: str) -> str:
+        entry = self.get(ticker)
+        return entry[2] if entry else "UNKNOWN"
+
+    def get_isin(self, ticker: str) -> Optional[str]:
+        entry = self.get(ticker)
+        return entry[0] if entry else None
+
+    def __contains__(self, ticker: str) -> bool:
+        self._ensure_loaded()
+        return ticker in self._by_ticker
+
+    def __len__(self) -> int:
+        return len(self._by_ticker)
+
+    def to_frame(self):
+        """pykrx EtxTicker.df 호환 DataFrame (영문 컬럼, ticker 인덱스)"""
+        import pandas as pd
+
+        self._ensure_loaded()
+        rows = [(t, isin, name, list_date, market) for t, (isin, name, market, list_date) in self._by_ticker.items()]
+        df = pd.DataFrame(rows, columns=["ticker", "isin", "name", "list_date", "market"])
+        return df.set_index("ticker")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "loaded": self._loaded,
+            "tickers": len(self._by_ticker),
+            "categories": {c: len(i.rows) for c, i in self._indexes.items()},
+            "updated_at": {c: time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(t))
+                           for c, t in self.updated_at.items() if t},
+            "refreshing": self._refreshing,
+            "last_refresh": self.last_refresh,
+        }
+
+
+etx_master = EtxMaster()
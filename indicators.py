@@ -0,0 +1,289 @@
+"""
+기술적 지표 (이동평균, RSI, 볼린저 밴드, 변동성)
+=====================================
+
+일자 × 종목 OHLCV 패널(2차원 배열)에 대해 지표를 한 번에 계산한다.
+종목마다 API를 호출하고 클라이언트에서 지표를 계산하는 대신,
+전종목시세 스냅샷(일자별 캐시)을 패널로 모아 전 종목을 같은 커널로 처리한다.
+
+- 이동평균/표준편차: 누적합 차분 (창 크기와 무관하게 O(일수 × 종목수))
+- EMA/RSI(Wilder): 시간축 점화식, 종목축은 벡터 연산 (첫 창은 단순평균으로 시작)
+- 결측(상장 전, 거래정지)은 NaN, 창 안에 결측이 있으면 결과도 NaN
+- 패널 값은 float32로 보관, 계산은 float64
+
+사용법:
+    panel = OhlcvPanel.from_snapshots([("20250110", snapshot_kospi), ("20250110", snapshot_kosdaq), ...])
+    specs = parse_indicators("ma20,rsi14,bollinger20")
+    for name, window in specs:
+        outputs = compute_indicator(panel, name, window)   # {"MA20": (일수, 종목수) 배열}
+"""
+
+import re
+import warnings
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from market_store import MarketSnapshot, StringPool
+
+# 전종목시세 필드 → 패널 필드 (pykrx get_market_ohlcv 컬럼명)
+PANEL_FIELDS = (
+    ("TDD_OPNPRC", "시가"),
+    ("TDD_HGPRC", "고가"),
+    ("TDD_LWPRC", "저가"),
+    ("TDD_CLSPRC", "종가"),
+    ("ACC_TRDVOL", "거래량"),
+)
+PRICE_FIELDS = ("시가", "고가", "저가", "종가")
+
+# 지표 이름 → 기본 창 크기
+INDICATORS = {
+    "ma": 20,
+    "ema": 20,
+    "rsi": 14,
+    "bollinger": 20,
+    "volatility": 20,
+}
+ALIASES = {"sma": "ma", "bb": "bollinger", "vol": "volatility"}
+
+BOLLINGER_K = 2.0
+TRADING_DAYS_PER_YEAR = 252
+MAX_WINDOW = 250
+
+_SPEC_RE = re.compile(r"^([a-z]+)[:_]?(\d*)$")
+
+
+class IndicatorError(ValueError):
+    """지표 이름/창 크기 오류 (API에서 400으로 변환)"""
+
+
+class OhlcvPanel:
+    """
+    일자 × 종목 OHLCV 패널
+
+    dates[t], tickers[n], fields[필드][t, n] (float32, 결측/0원 가격은 NaN)
+    """
+
+    __slots__ = ("dates", "tickers", "names", "fields", "_columns")
+
+    def __init__(self, dates: Sequence[str], tickers: Sequence[str], fields: Dict[str, np.ndarray],
+                 names: Optional[Sequence[str]] = None):
+        self.dates = list(dates)
+        self.tickers = np.asarray(tickers, dtype=object)
+        self.names = np.asarray(names if names is not None else tickers, dtype=object)
+        self.fields = fields
+        self._columns: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_snapshots(cls, snapshots: Iterable[Tuple[str, MarketSnapshot]],
+                       key: str = "ISU_SRT_CD") -> "OhlcvPanel":
+        """
+        (일자, 전종목시세 스냅샷) 목록 → 패널
+
+        같은 일자의 스냅샷(KOSPI, KOSDAQ)은 같은 행에 합친다. 종목 정렬은 문자열 풀 코드 기준.
+        """
+        snapshots = [(date, s) for date, s in snapshots if s is not None and len(s)]
+        if not snapshots:
+            return cls([], [], {name: np.empty((0, 0), np.float32) for _, name in PANEL_FIELDS})
+        pool = snapshots[0][1].pool
+        if any(snapshot.pool is not pool for _, snapshot in snapshots):
+            # 세대 풀이 섞이면 패널 전용 풀로 재인코딩 (이전 세대 문자열을 현재 풀에 넣지 않음)
+            pool = StringPool()
+        codes = []
+        for _, snapshot in snapshots:
+            values = snapshot.columns[key]
+            codes.append(values if snapshot.pool is pool else pool.encode(snapshot.pool.strings()[values]))
+        universe = np.unique(np.concatenate(codes))
+        dates = sorted({date for date, _ in snapshots})
+        row_of = {date: t for t, date in enumerate(dates)}
+
+        fields = {name: np.full((len(dates), len(universe)), np.nan, np.float32) for _, name in PANEL_FIELDS}
+        names = pool.strings()[universe].copy()
+        for (date, snapshot), snapshot_codes in zip(snapshots, codes):
+            t = row_of[date]
+            cols = np.searchsorted(universe, snapshot_codes)
+            for source, target in PANEL_FIELDS:
+                if source in snapshot.columns:
+                    fields[target][t, cols] = snapshot.columns[source]
+            if "ISU_ABBRV" in snapshot.columns:
+                names[cols] = snapshot.pool.strings()[snapshot.columns["ISU_ABBRV"]]
+        _mask_zero_prices(fields)
+        return cls(dates, pool.strings()[universe], fields, names)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, ticker: str, name: Optional[str] = None) -> "OhlcvPanel":
+        """pykrx get_market_ohlcv(start, end, ticker) 결과 → 종목 1개 패널"""
+        dates = [d.strftime("%Y%m%d") for d in pd.to_datetime(df.index)]
+        fields = {}
+        for _, target in PANEL_FIELDS:
+            values = df[target].to_numpy(dtype=np.float32) if target in df.columns else np.full(len(df), np.nan, np.float32)
+            fields[target] = values.reshape(-1, 1)
+        _mask_zero_prices(fields)
+        return cls(dates, [ticker], fields, [name or ticker])
+
+    def column(self, ticker: str) -> Optional[int]:
+        if self._columns is None:
+            self._columns = {t: i for i, t in enumerate(self.tickers.tolist())}
+        return self._columns.get(ticker)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.dates), len(self.tickers)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.fields.values())
+
+    def __getstate__(self):
+        return {"dates": self.dates, "tickers": self.tickers, "names": self.names, "fields": self.fields}
+
+    def __setstate__(self, state):
+        self.__init__(state["dates"], state["tickers"], state["fields"], state["names"])
+
+
+def _mask_zero_prices(fields: Dict[str, np.ndarray]):
+    # 거래정지/장 시작 전 종목은 가격 0 → 결측
+    for name in PRICE_FIELDS:
+        values = fields.get(name)
+        if values is not None:
+            values[values == 0] = np.nan
+
+
+# ----------------------------------------------------------------------------
+# 롤링 커널 (입력/출력: (일수, 종목수) float64)
+# ----------------------------------------------------------------------------
+
+def _as_2d(values) -> np.ndarray:
+    x = np.asarray(values, dtype=np.float64)
+    return x.reshape(-1, 1) if x.ndim == 1 else x
+
+
+def _window_sums(x: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """창 합계, 창이 결측 없이 채워졌는지 (행 t의 창은 t-window+1..t)"""
+    missing = np.isnan(x)
+    sums = np.cumsum(np.where(missing, 0.0, x), axis=0)
+    sums[window:] -= sums[:-window].copy()
+    gaps = np.cumsum(missing, axis=0, dtype=np.int32)
+    gaps[window:] -= gaps[:-window].copy()
+    complete = gaps == 0
+    complete[:window - 1] = False
+    return sums, complete
+
+
+def rolling_mean(values, window: int) -> np.ndarray:
+    x = _as_2d(values)
+    sums, complete = _window_sums(x, window)
+    return np.where(complete, sums / window, np.nan)
+
+
+def rolling_std(values, window: int, ddof: int = 0) -> np.ndarray:
+    """이동 표준편차 (종목별 평균을 빼고 누적합 → 큰 가격에서의 상쇄 오차 완화)"""
+    x = _as_2d(values)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 전부 결측인 종목
+        centered = x - np.nanmean(x, axis=0)
+    sums, complete = _window_sums(centered, window)
+    squares, _ = _window_sums(centered * centered, window)
+    variance = np.maximum((squares - sums * sums / window) / (window - ddof), 0.0)
+    return np.where(complete, np.sqrt(variance), np.nan)
+
+
+def _smooth(x: np.ndarray, window: int, alpha: float) -> np.ndarray:
+    """지수 평활 (종목별 첫 완전한 창의 단순평균으로 시작, 결측 행은 이전 상태 유지)"""
+    seed = rolling_mean(x, window)
+    state = np.full(x.shape[1], np.nan)
+    out = np.full_like(x, np.nan)
+    for t in range(len(x)):
+        row = x[t]
+        # 시작 전(state NaN)이면 단순평균, 결측 행이면 이전 상태 유지
+        updated = state + alpha * (row - state)
+        state = np.where(np.isnan(state), seed[t], np.where(np.isnan(row), state, updated))
+        out[t] = np.where(np.isnan(row), np.nan, state)
+    return out
+
+
+def ema(values, window: int) -> np.ndarray:
+    return _smooth(_as_2d(values), window, 2.0 / (window + 1))
+
+
+def rsi(values, window: int = 14) -> np.ndarray:
+    """RSI (Wilder 평활, 0~100, 첫 행과 창이 채워지기 전은 NaN)"""
+    x = _as_2d(values)
+    diff = np.full_like(x, np.nan)
+    diff[1:] = x[1:] - x[:-1]
+    gains = _smooth(np.where(diff > 0, diff, np.where(np.isnan(diff), np.nan, 0.0)), window, 1.0 / window)
+    losses = _smooth(np.where(diff < 0, -diff, np.where(np.isnan(diff), np.nan, 0.0)), window, 1.0 / window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = 100.0 - 100.0 / (1.0 + gains / losses)
+    # 하락 없음: 상승만 있으면 100, 보합이면 50
+    flat = losses == 0
+    out[flat] = np.where(gains[flat] > 0, 100.0, 50.0)
+    return out
+
+
+def bollinger(values, window: int = 20, k: float = BOLLINGER_K) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(상단, 중심, 하단) — 중심은 단순이동평균, 폭은 모표준편차 × k"""
+    mid = rolling_mean(values, window)
+    width = k * rolling_std(values, window)
+    return mid + width, mid, mid - width
+
+
+def volatility(values, window: int = 20) -> np.ndarray:
+    """연환산 변동성 (%) — 로그수익률 표본표준편차 × √252"""
+    x = _as_2d(values)
+    returns = np.full_like(x, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns[1:] = np.log(x[1:] / x[:-1])
+    return rolling_std(returns, window, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR) * 100.0
+
+
+# ----------------------------------------------------------------------------
+# 지표 요청
+# ----------------------------------------------------------------------------
+
+def parse_indicators(spec: str) -> List[Tuple[str, int]]:
+    """
+    "ma20,rsi,bb:20" → [("ma", 20), ("rsi", 14), ("bollinger", 20)]
+
+    창 크기를 생략하면 지표별 기본값. 중복은 한 번만.
+    """
+    result = []
+    for token in (spec or "").split(","):
+        token = token.strip().lower()
+        if not token:
+            continue
+        match = _SPEC_RE.match(token)
+        name = ALIASES.get(match.group(1), match.group(1)) if match else None
+        if name not in INDICATORS:
+            raise IndicatorError(f"알 수 없는 지표 '{token}' (사용 가능: {', '.join(INDICATORS)})")
+        window = int(match.group(2)) if match.group(2) else INDICATORS[name]
+        if not 2 <= window <= MAX_WINDOW:
+            raise IndicatorError(f"{name} 창 크기는 2~{MAX_WINDOW}")
+        if (name, window) not in result:
+            result.append((name, window))
+    if not result:
+        raise IndicatorError("indicators 파라미터 필요 (예: ma20,rsi14,bollinger20,volatility20)")
+    return result
+
+
+def required_days(specs: Iterable[Tuple[str, int]]) -> int:
+    """모든 지표의 첫 값이 나오는 데 필요한 최소 일수 (수익률/차분 기반 지표는 +1)"""
+    return max(window + (name in ("rsi", "volatility")) for name, window in specs)
+
+
+def compute_indicator(panel: OhlcvPanel, name: str, window: int, field: str = "종가") -> Dict[str, np.ndarray]:
+    """지표 1개 → {출력 이름: (일수, 종목수) float64 배열}"""
+    x = panel.fields[field]
+    if name == "ma":
+        return {f"MA{window}": rolling_mean(x, window)}
+    if name == "ema":
+        return {f"EMA{window}": ema(x, window)}
+    if name == "rsi":
+        return {f"RSI{window}": rsi(x, window)}
+    if name == "bollinger":
+        upper, mid, lower = bollinger(x, window)
+        return {f"BB{window}_upper": upper, f"BB{window}_mid": mid, f"BB{window}_lower": lower}
+    if name == "volatility":
+        return {f"VOL{window}": volatility(x, window)}
+    raise IndicatorError(f"알 수 없는 지표 '{name}'")
@@ -21,6 +21,9 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import asyncio
 
+from metrics import CLASSIFIER_LATENCY, CLASSIFIER_RESULTS
+import tracing
+
 # 임베딩용 (선택적)
 try:
     import numpy as np
@@ -51,6 +54,13 @@ class ClassificationResult:
     latency_ms: float = 0.0
 
 
+def _observe(result: "ClassificationResult") -> "ClassificationResult":
+    """분류 결과를 결정 단계별 메트릭에 기록"""
+    CLASSIFIER_RESULTS.inc(method=result.method)
+    CLASSIFIER_LATENCY.observe(result.latency_ms / 1000, method=result.method)
+    return result
+
+
 class IntentConfig:
     """인텐트 설정 - api_schema.json 기반"""
 
@@ -157,6 +167,13 @@ class IntentConfig:
             "parameters": ["ticker", "start_date", "end_date"],
             "description": "지수 시세 조회"
         },
+        "index_components": {
+            "keywords": ["구성종목", "편입종목", "지수구성", "구성 종목"],
+            "endpoint": "/api/index/components",
+            "requires_login": False,
+            "parameters": ["ticker", "date"],
+            "description": "지수 구성종목 조회"
+        },
         "index_fundamental": {
             "keywords": ["지수per", "지수pbr", "지수배당"],
             "endpoint": "/api/index/fundamental",
@@ -165,12 +182,21 @@ class IntentConfig:
             "description": "지수 기본 지표"
         },
 
+        # 업종
+        "sector": {
+            "keywords": ["업종", "섹터", "sector", "업종별"],
+            "endpoint": "/api/stocks/sector",
+            "requires_login": False,
+            "parameters": ["market", "date"],
+            "description": "업종별 시세 조회"
+        },
+
         # 선물/옵션
         "futures_price": {
             "keywords": ["선물", "futures", "코스피200선물"],
-            "endpoint": "/api/futures/ohlcv",
-            "requires_login": False,
-            "parameters": ["ticker", "start_date", "end_date"],
+            "endpoint": "/api/derivatives/futures",
+            "requires_login": True,
+            "parameters": ["date"],
             "description": "선물 가격 조회"
         },
         "options_price": {
@@ -394,6 +420,12 @@ class EmbeddingClassifier:
         # 인텐트별 대표 문장 임베딩 미리 계산
         self.intent_examples = self._build_intent_examples()
         self.intent_embeddings = self._compute_intent_embeddings()
+        self.keyword_matcher = KeywordMatcher()
+
+        # 배치 유사도 계산용 정규화 행렬 (인텐트 수 × 차원)
+        self.intent_ids = list(self.intent_embeddings.keys())
+        matrix = np.stack([self.intent_embeddings[i] for i in self.intent_ids])
+        self.intent_matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
         print(f"✅ 임베딩 모델 로딩 완료 ({len(self.intent_embeddings)}개 인텐트)")
 
     def _build_intent_examples(self) -> Dict[str, List[str]]:
@@ -440,6 +472,14 @@ class EmbeddingClassifier:
                 "코스피200 선물 가격",
                 "선물 시세",
             ],
+            "sector": [
+                "업종별 등락률",
+                "반도체 업종 시세",
+            ],
+            "index_components": [
+                "코스피200 구성종목",
+                "지수에 편입된 종목",
+            ],
             "comprehensive_analysis": [
                 "삼성전자 종합 분석해줘",
                 "현대차 전체 리포트",
@@ -469,46 +509,56 @@ class EmbeddingClassifier:
         Returns:
             ClassificationResult or None
         """
-        if not EMBEDDING_AVAILABLE or not self.model:
-            return None
-
-        import time
-        start = time.perf_counter()
-
-        # 쿼리 임베딩
-        query_embedding = self.model.encode([query])[0]
+        return self.classify_batch([query], threshold)[0]
 
-        # 각 인텐트와 유사도 계산
-        similarities = {}
-        for intent, intent_emb in self.intent_embeddings.items():
-            sim = np.dot(query_embedding, intent_emb) / (
-                np.linalg.norm(query_embedding) * np.linalg.norm(intent_emb)
-            )
-            similarities[intent] = float(sim)
-
-        # 최고 유사도 인텐트
-        best_intent = max(similarities, key=similarities.get)
-        best_sim = similarities[best_intent]
+    def classify_batch(self, queries: List[str], threshold: float = 0.6) -> List[Optional[ClassificationResult]]:
+        """
+        여러 쿼리를 한 번의 encode 호출로 분류
 
-        if best_sim < threshold:
-            return None
+        Args:
+            queries: 사용자 쿼리 목록
+            threshold: 최소 유사도 임계값
 
-        config = self.intents.get(best_intent, {})
-        latency = (time.perf_counter() - start) * 1000
+        Returns:
+            쿼리 순서대로 ClassificationResult or None
+        """
+        if not EMBEDDING_AVAILABLE or not self.model or not queries:
+            return [None] * len(queries)
 
-        # 파라미터 추출 (키워드 매처 재사용)
-        keyword_matcher = KeywordMatcher()
-        params = keyword_matcher._extract_parameters(query, best_intent)
+        import time
+        start = time.perf_counter()
 
-        return ClassificationResult(
-            intent=best_intent,
-            confidence=best_sim,
-            method="embedding",
-            parameters=params,
-            endpoint=config.get("endpoint", ""),
-            requires_login=config.get("requires_login", False),
-            latency_ms=latency
-        )
+        # 쿼리 임베딩 (배치) → 코사인 유사도 행렬 (쿼리 수 × 인텐트 수)
+        query_embeddings = np.asarray(self.model.encode(queries))
+        norms = np.linalg.norm(query_embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        similarities = (query_embeddings / norms) @ self.intent_matrix.T
+
+        best_idx = similarities.argmax(axis=1)
+        latency = (time.perf_counter() - start) * 1000 / len(queries)
+
+        results: List[Optional[ClassificationResult]] = []
+        for query, idx, row in zip(queries, best_idx, similarities):
+            best_sim = float(row[idx])
+            if best_sim < threshold:
+                results.append(None)
+                continue
+
+            best_intent = self.intent_ids[idx]
+            config = self.intents.get(best_intent, {})
+            # 파라미터 추출 (키워드 매처 재사용)
+            params = self.keyword_matcher._extract_parameters(query, best_intent)
+
+            results.append(ClassificationResult(
+                intent=best_intent,
+                confidence=best_sim,
+                method="embedding",
+                parameters=params,
+                endpoint=config.get("endpoint", ""),
+                requires_login=config.get("requires_login", False),
+                latency_ms=latency
+            ))
+        return results
 
 
 class LLMClassifier:
@@ -601,6 +651,71 @@ JSON 형식으로 응답하세요:
             print(f"❌ LLM 분류 오류: {e}")
             return None
 
+    async def classify_batch(self, queries: List[str]) -> List[Optional[ClassificationResult]]:
+        """
+        여러 쿼리를 하나의 결합 프롬프트로 분류 (LLM 호출 1회)
+
+        Args:
+            queries: 사용자 쿼리 목록
+
+        Returns:
+            쿼리 순서대로 ClassificationResult or None
+        """
+        if not self.model or not queries:
+            return [None] * len(queries)
+        if len(queries) == 1:
+            return [await self.classify(queries[0])]
+
+        import time
+        start = time.perf_counter()
+
+        intent_descriptions = "\n".join([
+            f"- {intent_id}: {config['description']} (키워드: {', '.join(config['keywords'][:3])})"
+            for intent_id, config in self.intents.items()
+        ])
+        numbered = "\n".join(f"{i}. \"{q}\"" for i, q in enumerate(queries))
+
+        prompt = f"""당신은 주식 API 인텐트 분류기입니다.
+각 사용자 쿼리를 분석하여 가장 적합한 인텐트를 선택하세요.
+
+가능한 인텐트:
+{intent_descriptions}
+
+사용자 쿼리 목록:
+{numbered}
+
+쿼리마다 하나씩, JSON 배열로만 응답하세요:
+[{{"index": 0, "intent": "인텐트_id", "confidence": 0.0~1.0}}, ...]
+"""
+
+        results: List[Optional[ClassificationResult]] = [None] * len(queries)
+        try:
+            response = self.model.generate_content(prompt)
+            json_match = re.search(r'\[.*\]', response.text, re.DOTALL)
+            if not json_match:
+                return results
+
+            latency = (time.perf_counter() - start) * 1000 / len(queries)
+            keyword_matcher = KeywordMatcher()
+            for item in json.loads(json_match.group()):
+                idx = item.get("index")
+                intent = item.get("intent")
+                if not isinstance(idx, int) or not 0 <= idx < len(queries) or intent not in self.intents:
+                    continue
+                config = self.intents[intent]
+                results[idx] = ClassificationResult(
+                    intent=intent,
+                    confidence=item.get("confidence", 0.7),
+                    method="llm",
+                    parameters=keyword_matcher._extract_parameters(queries[idx], intent),
+                    endpoint=config.get("endpoint", ""),
+                    requires_login=config.get("requires_login", False),
+                    latency_ms=latency
+                )
+        except Exception as e:
+            print(f"❌ LLM 배치 분류 오류: {e}")
+        return results
+
 
 class HybridIntentClassifier:
     """
@@ -652,33 +767,36 @@ class HybridIntentClassifier:
         total_start = time.perf_counter()
 
         # 1단계: 키워드 매칭 (가장 빠름)
-        keyword_result = self.keyword_matcher.match(query)
+        with tracing.span("classify.keyword"):
+            keyword_result = self.keyword_matcher.match(query)
         if keyword_result and keyword_result.confidence >= self.keyword_threshold:
             print(f"[OK][Keyword] {keyword_result.intent} (conf: {keyword_result.confidence:.2f}, {keyword_result.latency_ms:.1f}ms)")
-            return keyword_result
+            return _observe(keyword_result)
 
         # 2단계: 임베딩 유사도
         if self.embedding_classifier:
-            embedding_result = self.embedding_classifier.classify(query, self.embedding_threshold)
+            with tracing.span("classify.embedding"):
+                embedding_result = self.embedding_classifier.classify(query, self.embedding_threshold)
             if embedding_result:
                 print(f"[OK][Embedding] {embedding_result.intent} (conf: {embedding_result.confidence:.2f}, {embedding_result.latency_ms:.1f}ms)")
-                return embedding_result
+                return _observe(embedding_result)
 
         # 3단계: LLM 분류
         if self.llm_classifier:
-            llm_result = await self.llm_classifier.classify(query)
+            with tracing.span("classify.llm"):
+                llm_result = await self.llm_classifier.classify(query)
             if llm_result:
                 print(f"[OK][LLM] {llm_result.intent} (conf: {llm_result.confidence:.2f}, {llm_result.latency_ms:.1f}ms)")
-                return llm_result
+                return _observe(llm_result)
 
         # 4단계: 폴백 - 키워드 매칭 결과 반환 (낮은 신뢰도라도)
         if keyword_result:
             print(f"[WARN][Fallback-Keyword] {keyword_result.intent} (conf: {keyword_result.confidence:.2f})")
-            return keyword_result
+            return _observe(keyword_result)
 
         # 5단계: 완전 실패
         total_latency = (time.perf_counter() - total_start) * 1000
-        return ClassificationResult(
+        return _observe(ClassificationResult(
             intent="unknown",
             confidence=0.0,
             method="none",
@@ -686,7 +804,73 @@ class HybridIntentClassifier:
             endpoint="",
             requires_login=False,
             latency_ms=total_latency
-        )
+        ))
+
+    async def classify_batch(self, queries: List[str]) -> List[ClassificationResult]:
+        """
+        여러 쿼리를 단계별로 모아서 분류
+
+        1단계는 쿼리별로, 2단계는 남은 쿼리를 한 번에 임베딩하고,
+        3단계는 그래도 남은 쿼리를 하나의 LLM 프롬프트로 분류한다.
+
+        Args:
+            queries: 사용자 쿼리 목록
+
+        Returns:
+            쿼리 순서대로 ClassificationResult (실패 시 unknown 인텐트)
+        """
+        import time
+        total_start = time.perf_counter()
+
+        results: List[Optional[ClassificationResult]] = [None] * len(queries)
+        with tracing.span("classify.keyword", queries=len(queries)):
+            keyword_results = [self.keyword_matcher.match(q) for q in queries]
+
+        # 1단계: 키워드 매칭
+        pending = []
+        for i, keyword_result in enumerate(keyword_results):
+            if keyword_result and keyword_result.confidence >= self.keyword_threshold:
+                results[i] = keyword_result
+            else:
+                pending.append(i)
+
+        # 2단계: 임베딩 유사도 (배치 encode)
+        if pending and self.embedding_classifier:
+            with tracing.span("classify.embedding", queries=len(pending)):
+                batch = self.embedding_classifier.classify_batch(
+                    [queries[i] for i in pending], self.embedding_threshold
+                )
+            for i, embedding_result in zip(pending, batch):
+                results[i] = embedding_result
+            pending = [i for i in pending if results[i] is None]
+
+        # 3단계: LLM 분류 (결합 프롬프트)
+        if pending and self.llm_classifier:
+            with tracing.span("classify.llm", queries=len(pending)):
+                batch = await self.llm_classifier.classify_batch([queries[i] for i in pending])
+            for i, llm_result in zip(pending, batch):
+                results[i] = llm_result
+            pending = [i for i in pending if results[i] is None]
+
+        # 4~5단계: 키워드 폴백 또는 unknown
+        total_latency = (time.perf_counter() - total_start) * 1000
+        for i in pending:
+            results[i] = keyword_results[i] or ClassificationResult(
+                intent="unknown",
+                confidence=0.0,
+                method="none",
+                parameters={},
+                endpoint="",
+                requires_login=False,
+                latency_ms=total_latency
+            )
+
+        for r in results:
+            _observe(r)
+        methods = [r.method for r in results]
+        print(f"[OK][Batch] {len(queries)}건 ({total_latency:.1f}ms) "
+              + ", ".join(f"{m}={methods.count(m)}" for m in sorted(set(methods))))
+        return results
 
     def classify_sync(self, query: str) -> ClassificationResult:
         """동기 버전 (asyncio 없이 사용)"""
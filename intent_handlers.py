@@ -0,0 +1,165 @@
+"""
+인텐트 핸들러 레지스트리
+=====================================
+
+execute_intent의 if/elif 체인을 대체하는 테이블 기반 디스패치.
+
+- 핸들러는 @register_intent로 등록하고, 필요한 데이터(requires)와 로그인 필요 여부를 선언
+- 모든 핸들러는 IntentContext를 공유하여 날짜 계산, 캐시, 폴백 로직을 일원화
+- 핸들러는 (ctx, params) → dict 형태의 동기 함수라 단독으로 호출/벤치마크 가능
+
+사용법:
+    @register_intent("stock_price", requires=("ohlcv",))
+    def handle_stock_price(ctx, params):
+        df = ctx.latest(stock.get_market_ohlcv, params["ticker"], params.get("date"))
+        return ctx.frame_result(df, 종목명=params.get("ticker_name"))
+"""
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from krx_cache import data_cache, is_empty_result, TTL_INTRADAY, TTL_HISTORICAL
+import tracing
+
+
+@dataclass
+class IntentHandler:
+    """등록된 인텐트 핸들러"""
+    intent: str
+    func: Callable[["IntentContext", Dict[str, Any]], Dict[str, Any]]
+    requires: Tuple[str, ...] = ()  # upstream 데이터셋 (예: "ohlcv", "전종목시세")
+    requires_login: bool = False
+    description: str = ""
+
+
+# intent_id → IntentHandler
+INTENT_HANDLERS: Dict[str, IntentHandler] = {}
+
+
+def register_intent(intent: str, requires: Iterable[str] = (), requires_login: bool = False):
+    """인텐트 핸들러 등록 데코레이터"""
+    def decorator(func):
+        INTENT_HANDLERS[intent] = IntentHandler(
+            intent=intent,
+            func=func,
+            requires=tuple(requires),
+            requires_login=requires_login,
+            description=(func.__doc__ or "").strip().split("\n")[0],
+        )
+        return func
+    return decorator
+
+
+class IntentContext:
+    """
+    핸들러 공용 실행 컨텍스트
+
+    - 기준 시각(now)을 한 번만 계산하여 모든 핸들러가 동일한 달력을 사용
+    - fetch(): upstream 호출을 프로세스 캐시(data_cache)에 통과시켜 중복 조회 제거
+      (컨텍스트 수명 동안은 빈 결과도 재사용 → 배치 요청 내 중복 조회 제거)
+    - latest(): "당일 데이터 → 최근 N일 중 마지막 데이터" 폴백
+    """
+
+    FALLBACK_DAYS = 30
+
+    def __init__(self, now: Optional[datetime] = None, cache=None):
+        self.now = now or datetime.now()
+        self.today = self.now.strftime("%Y%m%d")
+        self.cache = cache if cache is not None else data_cache
+        self._memo: Dict[Any, Any] = {}
+        self._memo_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 달력
+    # ------------------------------------------------------------------
+
+    def days_ago(self, days: int) -> str:
+        """기준일로부터 N일 전 (YYYYMMDD)"""
+        return (self.now - timedelta(days=days)).strftime("%Y%m%d")
+
+    def recent_dates(self, days: int, start: Optional[str] = None) -> List[str]:
+        """start(기본: 오늘) 포함 최근 N일 날짜 목록 (최신순)"""
+        base = datetime.strptime(start, "%Y%m%d") if start else self.now
+        return [(base - timedelta(days=i)).strftime("%Y%m%d") for i in range(days)]
+
+    # ------------------------------------------------------------------
+    # 캐시
+    # ------------------------------------------------------------------
+
+    def _ttl_for(self, args: Tuple[Any, ...]) -> float:
+        """당일 이후 날짜가 포함된 조회는 짧게, 과거 확정 데이터는 길게 캐시"""
+        for arg in args:
+            if isinstance(arg, str) and len(arg) == 8 and arg.isdigit() and arg >= self.today:
+                return TTL_INTRADAY
+        return TTL_HISTORICAL
+
+    def fetch(self, func: Callable, *args, **kwargs) -> Any:
+        """upstream 함수 호출 (캐시/중복 제거 적용)"""
+        name = f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+        key = (name, args, tuple(sorted(kwargs.items())))
+        with self._memo_lock:
+            if key in self._memo:
+                return self._memo[key]
+        ttl = self._ttl_for(args + tuple(kwargs.values()))
+        with tracing.span("ctx.fetch", func=getattr(func, "__name__", name)):
+            value = self.cache.get_or_fetch(key, lambda: func(*args, **kwargs), ttl=ttl)
+        with self._memo_lock:
+            self._memo[key] = value
+        return value
+
+    # ------------------------------------------------------------------
+    # 폴백
+    # ------------------------------------------------------------------
+
+    def latest(self, func: Callable, ticker: str, date: Optional[str] = None, **kwargs):
+        """
+        (date, date, ticker) 조회 후 비어 있으면 최근 FALLBACK_DAYS일 중 마지막 행 반환
+
+        pykrx의 기간 조회 함수(get_market_ohlcv, get_index_ohlcv 등) 시그니처를 가정한다.
+        """
+        date = date or self.today
+        df = self.fetch(func, date, date, ticker, **kwargs)
+        if is_empty_result(df):
+            df = self.fetch(func, self.days_ago(self.FALLBACK_DAYS), self.today, ticker, **kwargs)
+            if not is_empty_result(df):
+                df = df.tail(1)
+        return df
+
+    def first_available(self, func: Callable, dates: Iterable[str], *args, **kwargs):
+        """dates를 순서대로 조회하여 처음으로 비어 있지 않은 (date, 결과) 반환"""
+        for date in dates:
+            value = self.fetch(func, date, *args, **kwargs)
+            if not is_empty_result(value):
+                return date, value
+        return None, None
+
+    # ------------------------------------------------------------------
+    # 결과 포맷
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def frame_result(df, reset_index: bool = True, **columns) -> Dict[str, Any]:
+        """DataFrame → 표준 응답 (빈 경우 실패 응답)"""
+        if is_empty_result(df):
+            return IntentContext.error("데이터 없음")
+        if reset_index:
+            df = df.reset_index()
+        else:
+            df = df.copy()
+        for col, value in columns.items():
+            if value is not None:
+                df[col] = value
+        return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
+
+    @staticmethod
+    def records_result(records: List[Dict[str, Any]], **extra) -> Dict[str, Any]:
+        """list[dict] → 표준 응답"""
+        if not records:
+            return IntentContext.error("데이터 없음")
+        return {"success": True, "data": records, "count": len(records), **extra}
+
+    @staticmethod
+    def error(message: str) -> Dict[str, Any]:
+        return {"success": False, "error": message}
@@ -0,0 +1,501 @@
+"""
+KRX 데이터 캐시
+=====================================
+
+upstream(KRX/pykrx) 조회 결과를 보관하는 2단계 TTL 캐시.
+
+- L1: 프로세스 내 LRU (모든 요청이 먼저 조회)
+- L2: 같은 호스트의 여러 uvicorn 워커가 공유하는 저장소 (선택)
+    KRX_CACHE_BACKEND=memory          L2 없음 (기본)
+    KRX_CACHE_BACKEND=shm             /dev/shm/krx_cache-<uid> 파일 저장소 (없으면 임시 디렉터리)
+    KRX_CACHE_BACKEND=file:/경로       지정 디렉터리 파일 저장소
+    KRX_CACHE_BACKEND=redis://host:port/0   Redis (redis 패키지 필요)
+  L2 값은 pickle이므로 저장소에 쓸 수 있는 주체는 서버 프로세스에서 코드를 실행할 수 있다.
+  파일 저장소는 실행 사용자 소유 + 0700 디렉터리만 사용하고, Redis는 신뢰된(인증/격리된) 인스턴스만 지정할 것
+- 같은 키에 대한 동시 요청은 한 번만 upstream을 호출 (single-flight)
+  L2가 있으면 워커 간에도 잠금을 잡고 L2를 재확인하여 호스트당 한 번만 조회
+- 빈 결과(None, 빈 DataFrame/list/dict)는 캐시하지 않음
+  → 장 시작 전 빈 응답이 고정되는 문제 방지
+
+사용법:
+    from krx_cache import data_cache
+    df = data_cache.get_or_fetch(("ohlcv", date, ticker), lambda: stock.get_market_ohlcv(...), ttl=60)
+"""
+
+import contextlib
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 잠금 파일 정리 기준 (초): 이 시간 동안 사용되지 않은 .lock 파일은 prune()에서 삭제
+LOCK_STALE_AFTER = 600
+
+# TTL 기본값 (초)
+TTL_INTRADAY = 60            # 당일 데이터 (장중 변동)
+TTL_HISTORICAL = 24 * 3600   # 과거 데이터 (확정)
+NEXT_SESSION_HOUR = 8        # 당일 확정 데이터는 다음 날 이 시각까지 유지
+
+
+# KRX getJsonData.cmd 응답의 데이터 블록 키 (공표 전에는 {"OutBlock_1": []} 처럼 빈 블록으로 내려옴)
+KRX_DATA_BLOCKS = ("OutBlock_1", "output")
+
+
+def is_empty_result(value: Any) -> bool:
+    """캐시하지 않을 빈 결과인지 확인 (데이터 블록이 비어 있는 KRX 응답 포함)"""
+    if value is None:
+        return True
+    if hasattr(value, "empty"):
+        return bool(value.empty)
+    if isinstance(value, dict):
+        blocks = [value[k] for k in KRX_DATA_BLOCKS if k in value]
+        if blocks:
+            return not any(blocks)
+    if isinstance(value, (list, dict, tuple)):
+        return len(value) == 0
+    return False
+
+
+def ttl_for_date(date: Optional[str], published_at: Optional[str] = None,
+                 now: Optional[datetime] = None) -> float:
+    """
+    기준일과 KRX 공표 시각으로 캐시 TTL 결정
+
+    Args:
+        date: 데이터 기준일 (YYYYMMDD)
+        published_at: 해당 데이터셋의 당일 확정 공표 시각 (HH:MM), 모르면 None
+        now: 현재 시각 (테스트용)
+
+    Returns:
+        과거 데이터 → TTL_HISTORICAL
+        당일 데이터 + 공표 시각 이후 → 다음 날 NEXT_SESSION_HOUR시까지
+        그 외 (장중, 미래) → TTL_INTRADAY
+    """
+    now = now or datetime.now()
+    today = now.strftime("%Y%m%d")
+    if not date or date > today:
+        return TTL_INTRADAY
+    if date < today:
+        return TTL_HISTORICAL
+    if published_at and now.strftime("%H:%M") >= published_at:
+        next_session = (now + timedelta(days=1)).replace(
+            hour=NEXT_SESSION_HOUR, minute=0, second=0, microsecond=0
+        )
+        return (next_session - now).total_seconds()
+    return TTL_INTRADAY
+
+
+# ============================================================================
+# 공유 저장소 (L2)
+# ============================================================================
+
+def _key_digest(key: Hashable) -> str:
+    """캐시 키 → 워커 간에 동일한 문자열 (키는 문자열/숫자 튜플이므로 repr이 결정적)"""
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+
+class FileCacheBackend:
+    """
+    디렉터리 기반 공유 캐시 (/dev/shm 사용 시 메모리 상주)
+
+    - 항목 1개 = 파일 1개 (pickle: (만료 시각, 값))
+    - 쓰기는 임시 파일 작성 후 os.replace → 읽는 쪽은 항상 완성된 파일만 봄
+    - lock(): 키별 fcntl 잠금 (워커 간 single-flight, Windows에서는 생략)
+    - 디렉터리는 실행 사용자 전용(0700)이어야 함: 다른 사용자가 만든/쓸 수 있는 디렉터리면 PermissionError
+      (다른 사용자가 심은 .pkl 파일을 unpickle하지 않도록)
+    """
+
+    name = "file"
+
+    def __init__(self, directory: Optional[str] = None, prune_every: int = 256):
+        if directory is None:
+            base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            suffix = f"-{os.getuid()}" if hasattr(os, "getuid") else ""
+            directory = os.path.join(base, f"krx_cache{suffix}")
+        self.directory = Path(directory)
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        _check_private_directory(self.directory)
+        self.prune_every = prune_every
+        self._writes = 0
+
+    def _path(self, key: Hashable) -> Path:
+        return self.directory / f"{_key_digest(key)}.pkl"
+
+    def _lock_path(self, key: Hashable) -> Path:
+        return self.directory / f"{_key_digest(key)}.lock"
+
+    def get(self, key: Hashable) -> Tuple[bool, Any, float]:
+        """(hit 여부, 값, 남은 TTL 초)"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                expires_at, value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return False, None, 0.0
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            with contextlib.suppress(OSError):
+                path.unlink()
+            return False, None, 0.0
+        return True, value, remaining
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((time.time() + ttl, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def delete(self, key: Hashable):
+        with contextlib.suppress(OSError):
+            self._path(key).unlink()
+
+    def clear(self):
+        for path in self.directory.glob("*.pkl"):
+            with contextlib.suppress(OSError):
+                path.unlink()
+
+    def prune(self):
+        """만료된 항목 파일과 오래 사용되지 않은 잠금 파일 삭제"""
+        now = time.time()
+        for path in self.directory.glob("*.pkl"):
+            try:
+                with open(path, "rb") as f:
+                    expires_at, _ = pickle.load(f)
+                if expires_at < now:
+                    path.unlink()
+            except Exception:
+                continue
+        for path in self.directory.glob("*.lock"):
+            with contextlib.suppress(OSError):
+                if now - path.stat().st_mtime > LOCK_STALE_AFTER:
+                    self._unlink_idle_lock(path)
+
+    @staticmethod
+    def _unlink_idle_lock(path: Path):
+        # 다른 워커가 잡고 있는 잠금은 남겨 둔다. (잡기 직전에 삭제되는 경합은 중복 조회 1회로 끝남)
+        if fcntl is None:
+            path.unlink()
+            return
+        with open(path, "a+b") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return
+            try:
+                path.unlink()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @contextlib.contextmanager
+    def lock(self, key: Hashable):
+        if fcntl is None:
+            yield
+            return
+        path = self._lock_path(key)
+        with open(path, "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                os.utime(f.fileno())  # prune() 기준 (마지막 사용 시각)
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name, "directory": str(self.directory)}
+
+
+def _check_private_directory(directory: Path):
+    """실행 사용자 소유이고 그룹/기타 사용자 쓰기 권한이 없는 디렉터리인지 확인 (아니면 PermissionError)"""
+    if not hasattr(os, "getuid"):
+        return
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"{directory}: 디렉터리가 아님 (심볼릭 링크 포함)")
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{directory}: 소유자(uid {st.st_uid})가 실행 사용자(uid {os.getuid()})와 다름")
+    if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"{directory}: 그룹/기타 사용자 쓰기 권한 있음 (chmod 700 필요)")
+
+
+class RedisCacheBackend:
+    """
+    Redis 공유 캐시 (redis 패키지 필요, 워커 간 잠금은 Redis lock 사용)
+
+    값을 unpickle하므로 Redis에 쓸 수 있는 주체는 서버에서 코드를 실행할 수 있다.
+    인증/네트워크 격리된 신뢰 인스턴스만 사용할 것.
+
+    잠금 만료 시간은 요청 1건의 최악 소요 시간(RetryPolicy.worst_case)이고,
+    잡고 있는 동안 1/3 주기로 연장한다 → 여러 요청을 묶은 긴 조회도 끝날 때까지 유지,
+    워커가 죽으면 만료 시간 뒤 해제.
+    """
+
+    name = "redis"
+    PREFIX = "krx_cache:"
+
+    def __init__(self, url: str):
+        import redis  # 선택 의존성
+        from krx_ratelimit import DEFAULT_RETRY
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+        self.lock_timeout = DEFAULT_RETRY.worst_case()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any, float]:
+        name = self.PREFIX + _key_digest(key)
+        pipe = self.client.pipeline()
+        pipe.get(name)
+        pipe.pttl(name)
+        raw, pttl = pipe.execute()
+        if raw is None:
+            return False, None, 0.0
+        return True, pickle.loads(raw), max(pttl, 0) / 1000
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        self.client.set(self.PREFIX + _key_digest(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                        px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: Hashable):
+        self.client.delete(self.PREFIX + _key_digest(key))
+
+    def clear(self):
+        for name in self.client.scan_iter(self.PREFIX + "*"):
+            self.client.delete(name)
+
+    @contextlib.contextmanager
+    def lock(self, key: Hashable):
+        lock = self.client.lock(self.PREFIX + "lock:" + _key_digest(key), timeout=self.lock_timeout)
+        # 보유자가 살아 있는 동안은 연장되므로 대기 제한 없음 (보유자가 죽으면 lock_timeout 뒤 획득)
+        lock.acquire(blocking=True)
+        done = threading.Event()
+
+        def renew():
+            while not done.wait(self.lock_timeout / 3):
+                try:
+                    lock.reacquire()
+                except Exception as e:
+                    print(f"⚠️ 공유 캐시 잠금 연장 실패: {e}")
+                    return
+
+        renewer = threading.Thread(target=renew, name="krx-cache-lock-renew", daemon=True)
+        renewer.start()
+        try:
+            yield
+        finally:
+            done.set()
+            renewer.join()
+            with contextlib.suppress(Exception):
+                lock.release()
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name, "url": self.url.split("@")[-1]}
+
+
+def backend_from_env(spec: Optional[str] = None):
+    """
+    KRX_CACHE_BACKEND 설정으로 L2 저장소 생성
+
+    Returns:
+        FileCacheBackend / RedisCacheBackend, memory(기본) 또는 생성 실패 시 None
+    """
+    spec = (spec if spec is not None else os.getenv("KRX_CACHE_BACKEND", "memory")).strip()
+    try:
+        if spec in ("", "memory"):
+            return None
+        if spec == "shm":
+            return FileCacheBackend()
+        if spec.startswith("file:"):
+            return FileCacheBackend(spec[len("file:"):])
+        if spec.startswith(("redis://", "rediss://", "unix://")):
+            return RedisCacheBackend(spec)
+        print(f"⚠️ 알 수 없는 KRX_CACHE_BACKEND: {spec} - 프로세스 캐시만 사용")
+    except Exception as e:
+        print(f"⚠️ 공유 캐시 초기화 실패 ({spec}): {e} - 프로세스 캐시만 사용")
+    return None
+
+
+class _Flight:
+    """진행 중인 upstream 호출 (single-flight 대기자와 결과 공유)"""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class DataCache:
+    """
+    스레드 안전 TTL + LRU 캐시 (선택적으로 워커 공유 L2 연결)
+
+    Args:
+        max_entries: 최대 보관 항목 수 (초과 시 가장 오래 사용하지 않은 항목 제거)
+        shared: L2 저장소 (FileCacheBackend/RedisCacheBackend, None이면 프로세스 캐시만)
+    """
+
+    def __init__(self, max_entries: int = 512, shared=None):
+        self.max_entries = max_entries
+        self.shared = shared
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.shared_errors = 0
+
+    def _get_local(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def _set_local(self, key: Hashable, value: Any, ttl: float):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def _get_shared(self, key: Hashable) -> Tuple[bool, Any]:
+        """L2 조회 후 hit이면 남은 TTL로 L1에 승격"""
+        if self.shared is None:
+            return False, None
+        try:
+            hit, value, remaining = self.shared.get(key)
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"⚠️ 공유 캐시 조회 실패: {e}")
+            return False, None
+        if hit:
+            self._set_local(key, value, remaining)
+            with self._lock:
+                self.shared_hits += 1
+        return hit, value
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """(hit 여부, 값) 반환 (L1 → L2)"""
+        hit, value = self._get_local(key)
+        if hit:
+            return hit, value
+        return self._get_shared(key)
+
+    def set(self, key: Hashable, value: Any, ttl: float = TTL_INTRADAY):
+        """값 저장 (빈 결과는 무시)"""
+        if is_empty_result(value):
+            return
+        self._set_local(key, value, ttl)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value, ttl)
+            except Exception as e:
+                self.shared_errors += 1
+                print(f"⚠️ 공유 캐시 저장 실패: {e}")
+
+    def _shared_lock(self, key: Hashable):
+        if self.shared is None:
+            return contextlib.nullcontext()
+        return self.shared.lock(key)
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Any], ttl: float = TTL_INTRADAY) -> Any:
+        """
+        캐시 조회 후 없으면 fetch() 호출하여 저장
+
+        동일 키로 동시에 들어온 요청은 첫 요청의 fetch 결과(빈 결과 포함)를 기다렸다가 재사용한다.
+        """
+        hit, value = self.get(key)
+        if hit:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._inflight[key] = flight
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.hits += 1
+
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            # 다른 워커가 조회 중이면 끝날 때까지 기다린 뒤 L2 재확인
+            with self._shared_lock(key):
+                hit, value = self._get_shared(key)
+                if hit:
+                    flight.value = value
+                else:
+                    flight.value = fetch()
+                    self.set(key, flight.value, ttl)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self, key: Hashable):
+        """특정 키 제거 (L2 포함)"""
+        with self._lock:
+            self._data.pop(key, None)
+        if self.shared is not None:
+            with contextlib.suppress(Exception):
+                self.shared.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self.shared is not None:
+            with contextlib.suppress(Exception):
+                self.shared.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else None,
+                "shared": dict(self.shared.describe(), hits=self.shared_hits, errors=self.shared_errors)
+                if self.shared is not None else None,
+            }
+
+
+# 프로세스 공용 캐시 (KRX_CACHE_BACKEND 설정 시 워커 공유 L2 사용)
+data_cache = DataCache(shared=backend_from_env())
@@ -0,0 +1,218 @@
+"""
+KRX 테이블 디코더
+=====================================
+
+KRX 응답(OutBlock_1, pykrx core fetch 결과)의 숫자 필드는 "1,234,567" 같은 문자열이다.
+행 단위 파싱(iterrows, _safe_float) 대신 열 단위로 한 번에 변환한다.
+
+- 숫자 열만 천 단위 구분자 제거 (벡터 문자열 연산) → pd.to_numeric → int64 / float32
+- '-', '' 등 결측 표기는 NaN (0과 구분). int 열에 결측이나 소수가 있으면 float64로 승격 (pandas와 동일)
+- 음수/소수점 보존 (기존 df.replace(r'\\W', '')는 '-'와 '.'까지 제거했음)
+- 종목명은 행마다 조회하지 않고 티커 기준 join(map)으로 부착
+- KRXSession.get_* 응답(OutBlock_1)은 BLD별 스키마(BLD_SCHEMAS)로 변환, 스키마가 없으면
+  KRX 필드명 접미사(_QTY, _RT, _NM ...)로 타입 추론. 반복 값이 많은 이름 열은 category
+
+사용법:
+    schema = [("ISU_SRT_CD", "티커", "str"), ("MKTCAP", "시가총액", "int"), ("FLUC_RT", "등락률", "float")]
+    df = decode_frame(raw_df, schema)
+    df = attach_names(df, {"005930": "삼성전자"})
+
+    df = decode_block(_krx_session.get_short_selling_by_stock(date), "공매도_거래_종목별")
+    to_records(df.head(100))    # JSON 응답용 (NaN → None)
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# (원본 컬럼, 결과 컬럼, 타입)  타입: str | category | int | float
+Field = Tuple[str, str, str]
+
+MISSING_VALUES = ("", "-", "N/A")
+
+# BLD 이름(KRXDataClient.BLD_ENDPOINTS 키) → (KRX 필드, 타입)
+# 필드명은 그대로 두고 타입만 지정 (API 응답 키 호환). 목록에 없는 필드는 infer_kind로 추론
+BLD_SCHEMAS: Dict[str, List[Tuple[str, str]]] = {
+    "전종목시세": [
+        ("ISU_SRT_CD", "str"), ("ISU_CD", "str"), ("ISU_ABBRV", "str"),
+        ("MKT_NM", "category"), ("SECT_TP_NM", "category"), ("FLUC_TP_CD", "category"),
+        ("TDD_CLSPRC", "int"), ("CMPPREVDD_PRC", "int"), ("FLUC_RT", "float"),
+        ("TDD_OPNPRC", "int"), ("TDD_HGPRC", "int"), ("TDD_LWPRC", "int"),
+        ("ACC_TRDVOL", "int"), ("ACC_TRDVAL", "int"), ("MKTCAP", "int"), ("LIST_SHRS", "int"),
+    ],
+    "PER_PBR_배당수익률": [
+        ("ISU_SRT_CD", "str"), ("ISU_ABBRV", "str"),
+        ("TDD_CLSPRC", "int"), ("CMPPREVDD_PRC", "int"), ("FLUC_RT", "float"),
+        ("EPS", "float"), ("PER", "float"), ("BPS", "float"), ("PBR", "float"),
+        ("DPS", "float"), ("DVD_YLD", "float"),
+    ],
+    "외국인보유량": [
+        ("ISU_SRT_CD", "str"), ("ISU_ABBRV", "str"), ("FLUC_TP_CD", "category"),
+        ("TDD_CLSPRC", "int"), ("CMPPREVDD_PRC", "int"), ("FLUC_RT", "float"),
+        ("LIST_SHRS", "int"), ("FORN_HD_QTY", "int"), ("FORN_SHR_RT", "float"),
+        ("FORN_ORD_LMT_QTY", "int"), ("FORN_LMT_EXHST_RT", "float"),
+    ],
+    "공매도_거래_종목별": [
+        ("ISU_CD", "str"), ("ISU_ABBRV", "str"), ("SECUGRP_NM", "category"),
+        ("CVSRTSELL_TRDVOL", "int"), ("ACC_TRDVOL", "int"), ("TRDVOL_WT", "float"),
+        ("CVSRTSELL_TRDVAL", "int"), ("ACC_TRDVAL", "int"), ("TRDVAL_WT", "float"),
+    ],
+    "공매도_잔고_종목별": [
+        ("ISU_CD", "str"), ("ISU_ABBRV", "str"),
+        ("BAL_QTY", "int"), ("LIST_SHRS", "int"), ("BAL_AMT", "int"), ("MKTCAP", "int"),
+        ("BAL_RTO", "float"),
+    ],
+}
+
+# 스키마 없는 필드의 타입 추론 (KRX 필드명 접미사 규칙)
+_CATEGORY_SUFFIXES = ("_NM", "_TP_CD", "_TP", "_ID")
+_TEXT_SUFFIXES = ("_CD", "_CD2", "_ABBRV", "_DD", "_TM")
+_FLOAT_SUFFIXES = ("_RT", "_RTO", "_WT", "_YLD", "PRC", "_IDX", "PER", "PBR", "EPS", "BPS", "DPS")
+_INT_SUFFIXES = ("_QTY", "VOL", "VAL", "_AMT", "SHRS", "MKTCAP", "_CNT", "RANK")
+
+
+def parse_numeric(values: Union[pd.Series, Sequence[Any]], kind: str = "int") -> np.ndarray:
+    """
+    숫자 문자열 열 → int64 또는 float32(결측 NaN) 배열
+
+    int 열은 모든 값이 정수일 때만 int64. 결측('-', '')이 있거나 소수("1,234.56")가 있으면
+    0으로 채우거나 잘라내지 않고 float64로 반환한다 (시가총액 등 큰 정수도 2^53까지 정확).
+
+    Args:
+        values: "1,234" 형식 문자열 열 (이미 숫자인 값도 허용)
+        kind: "int" 또는 "float"
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    if s.dtype == object:
+        # 빠른 경로: 모두 숫자 문자열이면 쉼표 제거 후 astype 한 번
+        # (pandas .str 접근자/to_numeric(coerce)보다 수 배 빠름, 결측 표기가 있으면 아래 경로)
+        try:
+            cleaned = np.array([v.replace(",", "") for v in s.to_numpy()], dtype=object)
+            return cleaned.astype(np.int64 if kind == "int" else np.float32)
+        except (AttributeError, TypeError, ValueError):
+            pass
+        cleaned = s.str.replace(",", "", regex=False)
+        # 문자열이 아닌 값(이미 숫자)은 .str 결과가 NaN이므로 원래 값 유지
+        s = cleaned.where(cleaned.notna(), s)
+        s = s.where(~s.isin(MISSING_VALUES))
+    numbers = pd.to_numeric(s, errors="coerce")
+    if kind == "int":
+        if numbers.dtype.kind in "iu":
+            return numbers.to_numpy(dtype=np.int64)
+        values = numbers.to_numpy(dtype=np.float64)
+        if not np.isnan(values).any() and np.array_equal(values, np.trunc(values)):
+            return values.astype(np.int64)
+        return values
+    return numbers.to_numpy(dtype=np.float32)
+
+
+def decode_frame(data: Union[pd.DataFrame, List[Dict[str, Any]]], schema: Sequence[Field]) -> pd.DataFrame:
+    """
+    KRX 원본 테이블 → 스키마의 컬럼만 타입 변환한 DataFrame
+
+    원본에 없는 컬럼은 기본값(숫자 NaN, str "")으로 채운다.
+    """
+    if not isinstance(data, pd.DataFrame):
+        data = pd.DataFrame.from_records(data) if data else pd.DataFrame()
+    n = len(data)
+    columns: Dict[str, Any] = {}
+    for source, target, kind in schema:
+        raw = data[source] if source in data.columns else None
+        if kind in ("int", "float"):
+            if raw is None:
+                columns[target] = np.full(n, np.nan, np.float64 if kind == "int" else np.float32)
+            else:
+                columns[target] = parse_numeric(raw, kind)
+        elif kind == "category":
+            columns[target] = pd.Categorical(raw if raw is not None else [""] * n)
+        else:
+            columns[target] = raw.to_numpy(dtype=object) if raw is not None else np.full(n, "", dtype=object)
+    return pd.DataFrame(columns, index=pd.RangeIndex(n))
+
+
+def infer_kind(field: str) -> str:
+    """KRX 필드명 → 타입 (str | category | int | float)
+
+    가격(*PRC)은 파생상품/지수처럼 소수점이 있을 수 있으므로 float로 추론한다.
+    """
+    if field.endswith(_CATEGORY_SUFFIXES):
+        return "category"
+    if field.endswith(_TEXT_SUFFIXES):
+        return "str"
+    if field.endswith(_FLOAT_SUFFIXES):
+        return "float"
+    if field.endswith(_INT_SUFFIXES):
+        return "int"
+    return "str"
+
+
+def block_items(data: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """KRX 응답 → 행 목록 (응답 키: 'output' 또는 'OutBlock_1')"""
+    if not data:
+        return []
+    return data.get("output", data.get("OutBlock_1", [])) or []
+
+
+def decode_block(data: Optional[Dict[str, Any]], bld_name: Optional[str] = None,
+                 limit: Optional[int] = None) -> pd.DataFrame:
+    """
+    KRXSession.get_* 응답 → 타입 변환된 DataFrame (KRX 필드명 유지)
+
+    Args:
+        data: get_market_data() 결과 (dict) 또는 None
+        bld_name: BLD 이름 (BLD_SCHEMAS 키). 스키마에 없는 필드는 추론하여 함께 변환
+        limit: 앞에서 N행만 변환 (응답 순서 유지)
+    """
+    items = block_items(data)[:limit]
+    if not items:
+        return pd.DataFrame()
+    return decode_table(pd.DataFrame.from_records(items), bld_name)
+
+
+def decode_table(frame: pd.DataFrame, bld_name: Optional[str] = None) -> pd.DataFrame:
+    """KRX 원본 DataFrame(pykrx core fetch 결과 등) → 타입 변환된 DataFrame (KRX 필드명 유지)"""
+    kinds = dict(BLD_SCHEMAS.get(bld_name, ()))
+    schema = [(c, c, kinds.get(c) or infer_kind(c)) for c in frame.columns]
+    return decode_frame(frame, schema)
+
+
+def to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """DataFrame → JSON 직렬화 가능한 행 목록 (NaN → None, numpy 스칼라 → Python 값)"""
+    if df.empty:
+        return []
+    columns = []
+    for name in df.columns:
+        values = df[name]
+        kind = values.dtype.kind
+        if values.dtype == np.float32:
+            # float32 유효자릿수(7)로 표기 (0.02가 0.0199999995로 직렬화되지 않도록)
+            columns.append([None if v != v else float(f"{v:.7g}") for v in values.tolist()])
+        elif kind == "f":
+            columns.append([None if v != v else v for v in values.tolist()])
+        elif kind in "iub":
+            columns.append(values.tolist())
+        else:
+            columns.append([None if v is None or v != v else v for v in values.astype(object).tolist()])
+    names = list(df.columns)
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def attach_names(df: pd.DataFrame, names: Union[Mapping[str, str], pd.Series],
+                 on: str = "티커", column: str = "종목명", position: Optional[int] = None) -> pd.DataFrame:
+    """
+    티커 → 종목명 join (없는 티커는 티커 그대로)
+
+    Args:
+        names: 티커 → 종목명 (dict 또는 Series)
+        position: 삽입 위치 (기본: on 컬럼 바로 뒤)
+    """
+    lookup = names if isinstance(names, pd.Series) else pd.Series(names, dtype=object)
+    values = df[on].map(lookup)
+    values = values.where(values.notna(), df[on])
+    if column in df.columns:
+        df[column] = values
+        return df
+    df.insert(df.columns.get_loc(on) + 1 if position is None else position, column, values)
+    return df
+
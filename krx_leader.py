@@ -0,0 +1,186 @@
+"""
+멀티 워커 로그인 리더 선출
+=====================================
+
+uvicorn --workers N 환경에서 Selenium 로그인을 한 프로세스(리더)만 수행하도록 조정한다.
+
+- 리더 선출: 잠금 파일에 대한 비차단 배타 잠금 (Linux/macOS: fcntl, Windows: msvcrt)
+  잠금은 프로세스가 살아 있는 동안 유지되며, 리더가 종료되면 OS가 자동 해제
+- 리더: 로그인 + SessionRefresher로 세션 갱신 → 쿠키 파일을 원자적으로 교체
+- 팔로워: 쿠키 저장소를 감시하여 더 최신 쿠키를 무중단 적용(hot reload)하고,
+  리더가 사라지면 잠금을 획득하여 리더로 승격
+
+사용법:
+    coordinator = LoginCoordinator(lock_path, reload=session.reload_if_newer)
+    if not coordinator.elect():
+        coordinator.wait_for_leader(timeout=180)
+    if coordinator.is_leader:
+        session.login(user_id, password)
+    else:
+        coordinator.on_promoted = start_refresher
+        coordinator.start_watching()
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class LeaderLock:
+    """프로세스 간 비차단 배타 잠금"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """잠금 시도 (이미 다른 프로세스가 보유 중이면 즉시 False)"""
+        if self._fd is not None:
+            return True
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        # 디버깅용: 현재 리더 PID 기록
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class LoginCoordinator:
+    """
+    로그인 리더 선출 + 팔로워 쿠키 감시
+
+    Args:
+        lock_path: 잠금 파일 경로 (같은 쿠키 저장소를 쓰는 워커끼리 동일해야 함)
+        reload: 저장소의 더 최신 쿠키를 적용하고, 사용 가능한 세션이 있으면 True 반환
+        on_promoted: 팔로워가 리더로 승격되었을 때 호출 (예: 갱신기 시작)
+        poll_interval: 팔로워 감시 간격 (초)
+    """
+
+    def __init__(self, lock_path: Path, reload: Callable[[], bool],
+                 on_promoted: Optional[Callable[[], None]] = None,
+                 poll_interval: float = 5.0):
+        self.lock = LeaderLock(lock_path)
+        self.reload = reload
+        self.on_promoted = on_promoted
+        self.poll_interval = poll_interval
+
+        self.last_reload: Optional[datetime] = None
+        self.promoted_at: Optional[datetime] = None
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.lock.held
+
+    def elect(self) -> bool:
+        """리더 선출 시도"""
+        if self.lock.try_acquire():
+            print(f"👑 [login-leader] 리더 선출 (pid={os.getpid()})")
+            return True
+        print(f"⏳ [login-leader] 팔로워로 시작 (pid={os.getpid()}) - 리더의 로그인 쿠키 대기")
+        return False
+
+    def _reload(self) -> bool:
+        try:
+            ok = self.reload()
+        except Exception as e:
+            print(f"⚠️ [login-leader] 쿠키 재적용 실패: {e}")
+            return False
+        if ok:
+            self.last_reload = datetime.now()
+        return ok
+
+    def wait_for_leader(self, timeout: float = 180) -> bool:
+        """
+        리더의 쿠키가 준비될 때까지 대기
+
+        대기 중 리더가 사라지면 잠금을 획득하고 반환한다 (이후 is_leader == True).
+
+        Returns:
+            사용 가능한 쿠키를 받았으면 True
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._reload():
+                return True
+            if self.lock.try_acquire():
+                print(f"👑 [login-leader] 리더 부재 - 리더로 전환 (pid={os.getpid()})")
+                return False
+            time.sleep(min(1.0, self.poll_interval))
+        print("⚠️ [login-leader] 리더 쿠키 대기 시간 초과")
+        return False
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self._reload()
+            if self.lock.try_acquire():
+                self.promoted_at = datetime.now()
+                print(f"👑 [login-leader] 리더 승격 (pid={os.getpid()})")
+                if self.on_promoted:
+                    try:
+                        self.on_promoted()
+                    except Exception as e:
+                        print(f"⚠️ [login-leader] 승격 처리 실패: {e}")
+                return
+
+    def start_watching(self):
+        """팔로워 감시 스레드 시작 (리더면 아무 것도 하지 않음)"""
+        if self.is_leader or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="krx-cookie-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """감시 중단 및 잠금 해제"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.lock.release()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "role": "leader" if self.is_leader else "follower",
+            "pid": os.getpid(),
+            "lock": str(self.lock.path),
+            "watching": bool(self._thread and self._thread.is_alive()),
+            "last_reload": self.last_reload.isoformat(timespec="seconds") if self.last_reload else None,
+            "promoted_at": self.promoted_at.isoformat(timespec="seconds") if self.promoted_at else None,
+        }
@@ -0,0 +1,165 @@
+"""
+장 마감 후 데이터 사전 로딩 (Prewarm) 스케줄러
+=====================================
+
+KRX 공표 시각(KRXSession.PUBLICATION_TIMES)에 맞춰 전종목시세, PER/PBR/배당수익률,
+투자자별 거래실적, 외국인 보유량, 지수 목록을 미리 조회하여 공용 캐시(data_cache)에 적재한다.
+장 마감 후 첫 사용자 요청이 콜드 조회 비용을 치르지 않도록 하는 것이 목적.
+
+- 영업일(월~금) 공표 시각에 실행, 아직 공표 전이라 빈 결과면 retry_interval마다 재시도
+- 서버가 공표 시각 이후에 시작되면 즉시 실행
+- 작업 함수는 블로킹이므로 asyncio.to_thread로 실행
+
+사용법 (FastAPI lifespan 내부):
+    scheduler = PrewarmScheduler([PrewarmJob("전종목시세", "15:45", fetch_fn)])
+    scheduler.start()
+    ...
+    await scheduler.stop()
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class PrewarmJob:
+    """
+    사전 로딩 작업
+
+    Attributes:
+        name: 데이터셋 이름 (예: "전종목시세")
+        publish_time: 당일 데이터 공표 시각 (HH:MM)
+        fetch: fetch(date) → 모든 시장 데이터를 받았으면 True (공표 전/실패 시 False)
+    """
+    name: str
+    publish_time: str
+    fetch: Callable[[str], bool]
+    last_run: Optional[datetime] = None
+    last_date: Optional[str] = None
+    last_status: str = "pending"
+    attempts: int = field(default=0)
+
+
+class PrewarmScheduler:
+    """
+    KRX 공표 시각 기반 사전 로딩 스케줄러
+
+    Args:
+        jobs: 사전 로딩 작업 목록
+        retry_interval: 공표 전/실패 시 재시도 간격 (초)
+        give_up_after: 공표 시각 이후 이 시간(초)이 지나도 실패하면 당일 작업 포기
+    """
+
+    def __init__(self, jobs: List[PrewarmJob], retry_interval: float = 600,
+                 give_up_after: float = 4 * 3600):
+        self.jobs = jobs
+        self.retry_interval = retry_interval
+        self.give_up_after = give_up_after
+        self._task: Optional[asyncio.Task] = None
+        # job.name → 다음 실행 시각
+        self._next_run: Dict[str, datetime] = {}
+
+    # ------------------------------------------------------------------
+    # 일정 계산
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _publish_at(day: datetime, publish_time: str) -> datetime:
+        hour, minute = (int(x) for x in publish_time.split(":"))
+        return day.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+    def _next_publication(self, job: PrewarmJob, after: datetime) -> datetime:
+        """after 이후 첫 영업일 공표 시각"""
+        day = after
+        while True:
+            candidate = self._publish_at(day, job.publish_time)
+            if day.weekday() < 5 and candidate > after:
+                return candidate
+            day = (day + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def _initial_run(self, job: PrewarmJob, now: datetime) -> datetime:
+        """시작 시점: 오늘 공표 시각이 이미 지났으면 즉시, 아니면 다음 공표 시각"""
+        published = self._publish_at(now, job.publish_time)
+        if now.weekday() < 5 and published <= now < published + timedelta(seconds=self.give_up_after):
+            return now
+        return self._next_publication(job, now)
+
+    # ------------------------------------------------------------------
+    # 실행
+    # ------------------------------------------------------------------
+
+    async def _run_job(self, job: PrewarmJob, now: datetime):
+        date = now.strftime("%Y%m%d")
+        job.attempts += 1
+        job.last_run = now
+        try:
+            ok = await asyncio.to_thread(job.fetch, date)
+        except Exception as e:
+            print(f"⚠️ [prewarm] {job.name} 오류: {e}")
+            ok = False
+
+        published = self._publish_at(now, job.publish_time)
+        if ok:
+            job.last_date = date
+            job.last_status = "ok"
+            job.attempts = 0
+            print(f"✅ [prewarm] {job.name} {date} 캐시 적재 완료")
+            self._next_run[job.name] = self._next_publication(job, now)
+        elif now + timedelta(seconds=self.retry_interval) < published + timedelta(seconds=self.give_up_after):
+            job.last_status = "retrying"
+            self._next_run[job.name] = now + timedelta(seconds=self.retry_interval)
+        else:
+            job.last_status = "gave_up"
+            job.attempts = 0
+            print(f"⚠️ [prewarm] {job.name} {date} 공표 데이터 없음 - 다음 영업일로 연기")
+            self._next_run[job.name] = self._next_publication(job, now)
+
+    async def _loop(self):
+        now = datetime.now()
+        for job in self.jobs:
+            self._next_run[job.name] = self._initial_run(job, now)
+
+        while True:
+            job = min(self.jobs, key=lambda j: self._next_run[j.name])
+            delay = (self._next_run[job.name] - datetime.now()).total_seconds()
+            if delay > 0:
+                # 시스템 시계 변경에 대비해 최대 5분 단위로 깨어나 재계산
+                await asyncio.sleep(min(delay, 300))
+                continue
+            await self._run_job(job, datetime.now())
+
+    def start(self):
+        """스케줄러 시작 (실행 중인 이벤트 루프 필요)"""
+        if self._task is None and self.jobs:
+            self._task = asyncio.create_task(self._loop())
+            print(f"✅ [prewarm] 스케줄러 시작: {', '.join(j.name for j in self.jobs)}")
+
+    async def stop(self):
+        """스케줄러 종료"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        """작업별 상태"""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "jobs": [
+                {
+                    "name": job.name,
+                    "publish_time": job.publish_time,
+                    "status": job.last_status,
+                    "last_date": job.last_date,
+                    "last_run": job.last_run.isoformat(timespec="seconds") if job.last_run else None,
+                    "next_run": self._next_run[job.name].isoformat(timespec="seconds")
+                    if job.name in self._next_run else None,
+                }
+                for job in self.jobs
+            ],
+        }
@@ -0,0 +1,210 @@
+"""
+KRX 요청 속도 제한 + 재시도
+=====================================
+
+KRX(data.krx.co.kr)로 나가는 모든 HTTP 요청(KRXSession, 패치된 pykrx webio.Post.read)이
+공유하는 적응형 토큰 버킷과 지수 백오프 재시도.
+
+- 토큰 버킷: 초당 rate개 토큰, 최대 burst개까지 누적
+- AIMD: 정상 응답마다 rate를 조금씩 올리고(additive increase),
+  429/5xx/타임아웃 또는 지연 시간이 목표치를 넘으면 rate를 절반으로 낮춤(multiplicative decrease)
+- 재시도: 연결 오류/타임아웃/429/5xx만 재시도, full jitter 백오프, Retry-After 헤더 존중
+
+환경변수:
+    KRX_RATE_LIMIT  초기 초당 요청 수 (기본 5)
+    KRX_RATE_MAX    최대 초당 요청 수 (기본 20)
+
+사용법:
+    from krx_ratelimit import request_with_retry
+    resp = request_with_retry(lambda timeout: session.post(url, data=data, timeout=timeout))
+"""
+
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+
+# 재시도 대상 HTTP 상태 코드
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+# 차단/과부하 신호 (rate를 즉시 낮춤)
+THROTTLE_STATUS = frozenset({429, 503})
+
+
+class AdaptiveRateLimiter:
+    """
+    AIMD 방식으로 속도를 조절하는 스레드 안전 토큰 버킷
+
+    Args:
+        rate: 초기 초당 요청 수
+        min_rate: 최소 초당 요청 수
+        max_rate: 최대 초당 요청 수
+        burst: 토큰 최대 누적 개수
+        increase: 정상 응답 1건당 rate 증가량
+        decrease: 오류 시 rate 곱셈 계수
+        latency_target: 이 시간(초)을 넘는 응답은 과부하 신호로 간주
+        cooldown: 연속 감소 방지 간격 (초) - 동시 실패 여러 건이 rate를 한 번에 붕괴시키지 않도록
+    """
+
+    def __init__(self, rate: float = 5.0, min_rate: float = 0.5, max_rate: float = 20.0,
+                 burst: float = 5.0, increase: float = 0.1, decrease: float = 0.5,
+                 latency_target: float = 3.0, cooldown: float = 1.0):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+        self.successes = 0
+        self.errors = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """토큰 1개 획득 (없으면 대기)"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+                self.waited += delay
+            time.sleep(delay)
+
+    def on_success(self, latency: float):
+        """정상 응답 기록 (지연 시간이 목표 초과면 감소)"""
+        if latency > self.latency_target:
+            self._decrease()
+            return
+        with self._lock:
+            self.successes += 1
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_error(self, throttled: bool = False):
+        """오류 응답 기록"""
+        with self._lock:
+            self.errors += 1
+            if throttled:
+                self.throttled += 1
+        self._decrease()
+
+    def _decrease(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 2),
+                "min_rate": self.min_rate,
+                "max_rate": self.max_rate,
+                "successes": self.successes,
+                "errors": self.errors,
+                "throttled": self.throttled,
+                "waited_sec": round(self.waited, 2),
+            }
+
+
+@dataclass
+class RetryPolicy:
+    """재시도 정책"""
+    attempts: int = 3                            # 최초 시도 포함 총 시도 횟수
+    base_delay: float = 0.5                      # 백오프 기본 간격 (초)
+    max_delay: float = 8.0                       # 백오프 최대 간격 (초)
+    timeout: Tuple[float, float] = (5.0, 30.0)   # (연결, 읽기) 타임아웃 (초)
+
+    def worst_case(self) -> float:
+        """요청 1건이 모든 시도를 타임아웃으로 소진할 때까지 걸리는 최대 시간 (초)"""
+        return self.attempts * sum(self.timeout) + (self.attempts - 1) * self.max_delay
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """attempt번째 실패 후 대기 시간 (full jitter, Retry-After 우선)"""
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def _retry_after(resp) -> Optional[float]:
+    value = resp.headers.get("Retry-After") if resp is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+# 프로세스 공용 인스턴스
+krx_limiter = AdaptiveRateLimiter(
+    rate=float(os.getenv("KRX_RATE_LIMIT", "5")),
+    max_rate=float(os.getenv("KRX_RATE_MAX", "20")),
+)
+DEFAULT_RETRY = RetryPolicy()
+
+
+def request_with_retry(send: Callable[[Tuple[float, float]], requests.Response],
+                       limiter: AdaptiveRateLimiter = None,
+                       policy: RetryPolicy = None) -> requests.Response:
+    """
+    속도 제한 + 재시도를 적용하여 요청 전송
+
+    Args:
+        send: send(timeout) → requests.Response
+        limiter: 속도 제한기 (기본: krx_limiter)
+        policy: 재시도 정책 (기본: DEFAULT_RETRY)
+
+    Returns:
+        마지막 응답 (재시도 후에도 5xx/429면 그 응답을 그대로 반환 → 호출자가 raise_for_status)
+
+    Raises:
+        모든 시도가 연결 오류/타임아웃이면 마지막 예외
+    """
+    limiter = limiter or krx_limiter
+    policy = policy or DEFAULT_RETRY
+    last_error: Optional[Exception] = None
+    resp = None
+
+    for attempt in range(policy.attempts):
+        limiter.acquire()
+        started = time.monotonic()
+        try:
+            resp = send(policy.timeout)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            last_error = e
+            resp = None
+            limiter.on_error()
+        else:
+            if resp.status_code not in RETRY_STATUS:
+                limiter.on_success(time.monotonic() - started)
+                return resp
+            limiter.on_error(throttled=resp.status_code in THROTTLE_STATUS)
+
+        if attempt + 1 < policy.attempts:
+            delay = policy.backoff(attempt, _retry_after(resp))
+            reason = f"HTTP {resp.status_code}" if resp is not None else type(last_error).__name__
+            print(f"⚠️ [KRX] {reason} - {delay:.1f}초 후 재시도 ({attempt + 1}/{policy.attempts - 1})")
+            time.sleep(delay)
+
+    if resp is not None:
+        return resp
+    raise last_error
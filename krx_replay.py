@@ -0,0 +1,254 @@
+"""
+KRX 오프라인 녹화/재생
+=====================================
+
+getJsonData.cmd 요청/응답을 bld + 파라미터 기준 fixture 파일로 녹화하고,
+로컬 재생 서버로 되돌려 주어 data.krx.co.kr 없이 재현 가능한 벤치마크/CI를 돌린다.
+
+녹화 (실서버 대상으로 평소처럼 실행):
+    KRX_RECORD_DIR=fixtures/krx python main.py
+    → fixtures/krx/<bld>/<파라미터 해시>.json
+
+재생 서버:
+    python krx_replay.py serve --fixtures fixtures/krx --port 8765 \\
+        --latency-ms 80 --jitter-ms 40 --error-rate 0.01
+
+API 서버를 재생 서버로 연결 (krx_transport가 data.krx.co.kr 요청을 모두 전환,
+Selenium 로그인 없이 오프라인 세션 사용):
+    KRX_BASE_URL=http://127.0.0.1:8765 python main.py
+
+fixture 목록 확인:
+    python krx_replay.py list --fixtures fixtures/krx
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+DATA_PATH = "/comm/bldAttendant/getJsonData.cmd"
+
+
+def fixture_key(params: Dict[str, Any]) -> str:
+    """파라미터(bld 포함) → fixture 파일 이름 (순서 무관)"""
+    canonical = json.dumps(sorted((str(k), str(v)) for k, v in params.items()), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:20]
+
+
+def fixture_dir(root: Path, bld: str) -> Path:
+    return Path(root) / bld.strip("/").replace("/", "_")
+
+
+class FixtureRecorder:
+    """
+    krx_transport 응답 녹화기 (krx_transport.set_recorder로 등록)
+
+    getJsonData.cmd에 대한 정상(2xx) JSON 응답만 저장한다.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def __call__(self, method: str, url: str, params: Optional[Dict[str, Any]], response):
+        if not params or "bld" not in params or urlparse(url).path != DATA_PATH:
+            return
+        if response.status_code >= 300:
+            return
+        body = response.content.decode("utf-8", errors="replace")
+        if not body.lstrip().startswith("{"):
+            return  # 로그인 만료 HTML 등은 녹화하지 않음
+        directory = fixture_dir(self.root, params["bld"])
+        record = {
+            "bld": params["bld"],
+            "params": {str(k): str(v) for k, v in params.items()},
+            "method": method,
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", "application/json;charset=UTF-8"),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "body": body,
+        }
+        with self._lock:
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{fixture_key(params)}.json"
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+            self.recorded += 1
+
+
+class FixtureStore:
+    """fixture 디렉터리 인덱스 (서버 시작 시 1회 로드)"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.exact: Dict[str, Dict[str, Any]] = {}
+        self.by_bld: Dict[str, list] = {}
+        for path in sorted(self.root.glob("*/*.json")):
+            record = json.loads(path.read_text(encoding="utf-8"))
+            self.exact[fixture_key(record["params"])] = record
+            self.by_bld.setdefault(record["bld"], []).append(record)
+
+    def __len__(self):
+        return len(self.exact)
+
+    def lookup(self, params: Dict[str, str], loose: bool = False) -> Optional[Dict[str, Any]]:
+        """정확히 같은 파라미터 → 없으면 (loose) 같은 bld 중 첫 fixture"""
+        record = self.exact.get(fixture_key(params))
+        if record is None and loose:
+            candidates = self.by_bld.get(params.get("bld", ""))
+            record = candidates[0] if candidates else None
+        return record
+
+
+class ReplayConfig:
+    """재생 서버 동작 설정 (지연/오류 주입)"""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+                 stall_rate: float = 0, stall_sec: float = 10, loose: bool = False, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall_sec = stall_sec
+        self.loose = loose
+        self.random = random.Random(seed)
+        self.stats = {"hits": 0, "misses": 0, "errors": 0, "stalls": 0}
+        self._lock = threading.Lock()
+
+    def count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def delay(self) -> float:
+        with self._lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self.random.random() < rate
+
+
+def make_handler(store: FixtureStore, config: ReplayConfig):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass  # 벤치마크 중 로그 출력 비용 제거
+
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _params(self) -> Dict[str, str]:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length).decode("utf-8") if length else ""
+            params = dict(parse_qsl(raw, keep_blank_values=True))
+            params.update(parse_qsl(urlparse(self.path).query, keep_blank_values=True))
+            return params
+
+        def _replay(self, params: Dict[str, str]):
+            time.sleep(config.delay())
+            if config.roll(config.stall_rate):
+                config.count("stalls")
+                time.sleep(config.stall_sec)
+            if config.roll(config.error_rate):
+                config.count("errors")
+                self._send(503, b"Service Unavailable (injected)", "text/plain")
+                return
+            record = store.lookup(params, loose=config.loose)
+            if record is None:
+                config.count("misses")
+                body = json.dumps({"error": "fixture 없음", "bld": params.get("bld")}, ensure_ascii=False)
+                self._send(404, body.encode("utf-8"), "application/json;charset=UTF-8")
+                return
+            config.count("hits")
+            self._send(record.get("status", 200), record["body"].encode("utf-8"), record["content_type"])
+
+        def do_POST(self):
+            params = self._params()
+            if urlparse(self.path).path == DATA_PATH:
+                self._replay(params)
+            else:
+                self._send(200, b"{}", "application/json;charset=UTF-8")
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == "/__replay/stats":
+                body = json.dumps(dict(config.stats, fixtures=len(store)))
+                self._send(200, body.encode("utf-8"), "application/json")
+            elif path == DATA_PATH:
+                self._replay(self._params())
+            else:
+                # keep-alive/로그인 페이지 등은 빈 페이지로 응답
+                self._send(200, b"<html></html>", "text/html;charset=UTF-8")
+
+    return ReplayHandler
+
+
+def serve(fixtures: str, host: str = "127.0.0.1", port: int = 8765,
+          config: Optional[ReplayConfig] = None) -> Tuple[ThreadingHTTPServer, threading.Thread]:
+    """재생 서버를 백그라운드 스레드로 시작 (벤치마크 스크립트에서 사용)"""
+    store = FixtureStore(fixtures)
+    server = ThreadingHTTPServer((host, port), make_handler(store, config or ReplayConfig()))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="krx-replay", daemon=True)
+    thread.start()
+    print(f"✅ [replay] http://{host}:{server.server_address[1]} (fixture {len(store)}개)")
+    return server, thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KRX getJsonData.cmd 녹화 재생 서버")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="재생 서버 실행")
+    p_serve.add_argument("--fixtures", default="fixtures/krx")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--latency-ms", type=float, default=0, help="응답 지연 (ms)")
+    p_serve.add_argument("--jitter-ms", type=float, default=0, help="지연 편차 ± (ms)")
+    p_serve.add_argument("--error-rate", type=float, default=0, help="503 응답 비율 (0~1)")
+    p_serve.add_argument("--stall-rate", type=float, default=0, help="응답 지연(stall) 비율 (0~1)")
+    p_serve.add_argument("--stall-sec", type=float, default=10, help="stall 시간 (초)")
+    p_serve.add_argument("--loose", action="store_true", help="파라미터가 달라도 같은 bld fixture 반환")
+    p_serve.add_argument("--seed", type=int, default=None, help="지연/오류 주입 난수 시드")
+
+    p_list = sub.add_parser("list", help="fixture 목록")
+    p_list.add_argument("--fixtures", default="fixtures/krx")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        store = FixtureStore(args.fixtures)
+        for bld, records in sorted(store.by_bld.items()):
+            print(f"{bld}: {len(records)}개")
+        print(f"총 {len(store)}개")
+        return
+
+    config = ReplayConfig(args.latency_ms, args.jitter_ms, args.error_rate,
+                          args.stall_rate, args.stall_sec, args.loose, args.seed)
+    server, thread = serve(args.fixtures, args.host, args.port, config)
+    try:
+        thread.join()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
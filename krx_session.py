@@ -16,11 +16,17 @@ import os
 import time
 import json
 import pickle
+import threading
 import requests
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List, Tuple
 from datetime import datetime, timedelta
 
+from krx_cache import data_cache, ttl_for_date
+from krx_ratelimit import RetryPolicy
+import krx_transport
+import tracing
+
 try:
     from selenium import webdriver
     from selenium.webdriver.chrome.service import Service
@@ -39,18 +45,24 @@ COOKIE_FILE = Path(__file__).parent / ".krx_cookies.pkl"
 SESSION_FILE = Path(__file__).parent / ".krx_session.json"
 
 
-class KRXSession:
+def _atomic_write(path: Path, data: bytes):
+    """임시 파일에 쓴 뒤 os.replace로 교체 (읽는 쪽은 항상 완성된 파일만 봄)"""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class KRXDataClient:
     """
-    KRX Data Marketplace 세션 관리 클래스
+    KRX 데이터 조회 API 공통 베이스
 
-    사용법:
-        session = KRXSession()
-        session.login("user_id", "password")
-        data = session.get_market_data("MDCSTAT01501", {"mktId": "STK", "trdDd": "20250117"})
+    BLD 엔드포인트 목록과 get_* 조회 메서드를 제공하며,
+    실제 HTTP 요청은 하위 클래스의 _request_market_data()가 담당한다.
+    (KRXSession: 단일 세션, KRXSessionPool: 다중 계정 세션 풀)
     """
 
     BASE_URL = "https://data.krx.co.kr"
-    LOGIN_URL = f"{BASE_URL}/contents/MDC/COMS/client/MDCCOMS001.cmd"
     DATA_URL = f"{BASE_URL}/comm/bldAttendant/getJsonData.cmd"
 
     # BLD 엔드포인트 매핑 (150%+ Coverage - 40+ endpoints)
@@ -150,189 +162,21 @@ class KRXSession:
         "관리종목": "dbms/MDC/STAT/standard/MDCSTAT03601",             # 36001
     }
 
-    def __init__(self, headless: bool = True):
-        """
-        Args:
-            headless: 브라우저 창 숨김 여부 (기본: True)
-        """
-        self.headless = headless
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Referer": self.BASE_URL
-        })
-        self.logged_in = False
-        self.login_time: Optional[datetime] = None
-        self.mbr_no: Optional[str] = None
-
-        # 저장된 세션 복원 시도
-        self._load_session()
-
-    def _load_session(self) -> bool:
-        """저장된 세션 쿠키 로드"""
-        if COOKIE_FILE.exists() and SESSION_FILE.exists():
-            try:
-                # 세션 정보 확인
-                with open(SESSION_FILE, 'r') as f:
-                    session_info = json.load(f)
-
-                login_time = datetime.fromisoformat(session_info.get('login_time', ''))
-                # 세션 유효 시간: 1시간 (KRX mdc.client_session 쿠키 기준 ~50분)
-                if datetime.now() - login_time < timedelta(hours=1):
-                    # 쿠키 로드
-                    with open(COOKIE_FILE, 'rb') as f:
-                        cookies = pickle.load(f)
-
-                    for cookie in cookies:
-                        self.session.cookies.set(cookie['name'], cookie['value'])
-
-                    self.logged_in = True
-                    self.login_time = login_time
-                    self.mbr_no = session_info.get('mbr_no')
-                    print(f"✅ 저장된 세션 복원 완료 (로그인: {login_time.strftime('%H:%M:%S')})")
-                    return True
-            except Exception as e:
-                print(f"⚠️ 세션 복원 실패: {e}")
-
-        return False
-
-    def _save_session(self, cookies: list):
-        """세션 쿠키 저장"""
-        try:
-            with open(COOKIE_FILE, 'wb') as f:
-                pickle.dump(cookies, f)
-
-            with open(SESSION_FILE, 'w') as f:
-                json.dump({
-                    'login_time': self.login_time.isoformat(),
-                    'mbr_no': self.mbr_no
-                }, f)
-
-            print(f"✅ 세션 저장 완료: {COOKIE_FILE}")
-        except Exception as e:
-            print(f"⚠️ 세션 저장 실패: {e}")
-
-    def login(self, user_id: str, password: str, force: bool = False) -> bool:
-        """
-        KRX 로그인 (Selenium 사용)
-
-        Args:
-            user_id: KRX Data Marketplace 아이디
-            password: 비밀번호
-            force: 강제 재로그인 여부
-
-        Returns:
-            로그인 성공 여부
-        """
-        if not SELENIUM_AVAILABLE:
-            raise RuntimeError("Selenium이 설치되지 않았습니다. pip install selenium")
-
-        # 이미 로그인된 경우
-        if self.logged_in and not force:
-            print("✅ 이미 로그인된 상태입니다.")
-            return True
-
-        print(f"🔐 KRX 로그인 시도: {user_id}")
-
-        # Chrome 옵션 설정
-        options = Options()
-        if self.headless:
-            options.add_argument("--headless=new")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-
-        driver = None
-        try:
-            driver = webdriver.Chrome(options=options)
-            wait = WebDriverWait(driver, 20)
-
-            # 1. 로그인 페이지 접속
-            print("   → 로그인 페이지 접속...")
-            driver.get(self.LOGIN_URL)
-            time.sleep(2)
-
-            # 2. iframe 내부로 전환
-            print("   → 로그인 폼 대기...")
-            iframe = wait.until(EC.presence_of_element_located((By.TAG_NAME, "iframe")))
-            driver.switch_to.frame(iframe)
-
-            # 3. 로그인 폼 입력
-            print("   → 자격 증명 입력...")
-
-            # ID 입력
-            id_input = wait.until(EC.presence_of_element_located((By.NAME, "mbrId")))
-            id_input.clear()
-            id_input.send_keys(user_id)
-            time.sleep(0.5)
-
-            # 비밀번호 입력 (E2E 암호화를 위해 직접 입력)
-            pw_input = driver.find_element(By.NAME, "pw")
-            pw_input.clear()
-            # 한 글자씩 입력 (키보드 보안 우회)
-            for char in password:
-                pw_input.send_keys(char)
-                time.sleep(0.05)
-
-            time.sleep(1)
-
-            # 4. 로그인 버튼 클릭
-            print("   → 로그인 버튼 클릭...")
-            login_btn = driver.find_element(By.CSS_SELECTOR, ".jsLoginBtn")
-            login_btn.click()
-
-            # 5. 로그인 결과 확인 (최대 10초 대기)
-            time.sleep(3)
-
-            # iframe에서 나와서 메인 페이지 확인
-            driver.switch_to.default_content()
-
-            # 쿠키 확인
-            cookies = driver.get_cookies()
-            jsessionid = None
-            for cookie in cookies:
-                if cookie['name'] == 'JSESSIONID':
-                    jsessionid = cookie['value']
-                    break
-
-            if jsessionid:
-                # 로그인 성공
-                print(f"✅ 로그인 성공! JSESSIONID: {jsessionid[:20]}...")
-
-                # requests 세션에 쿠키 적용
-                self.session.cookies.clear()
-                for cookie in cookies:
-                    self.session.cookies.set(cookie['name'], cookie['value'])
-
-                self.logged_in = True
-                self.login_time = datetime.now()
-
-                # 세션 저장
-                self._save_session(cookies)
-
-                return True
-            else:
-                # 로그인 실패 - 에러 메시지 확인
-                try:
-                    driver.switch_to.frame(iframe)
-                    error_elem = driver.find_element(By.CSS_SELECTOR, ".error-msg, .alert")
-                    print(f"❌ 로그인 실패: {error_elem.text}")
-                except:
-                    print("❌ 로그인 실패: 알 수 없는 오류")
+    # 당일 데이터 확정 공표 시각 (HH:MM, 영업일 기준)
+    # 이 시각 이후 조회한 당일 데이터는 다음 날 아침까지 캐시하고, 사전 로딩(prewarm) 스케줄에 사용
+    PUBLICATION_TIMES = {
+        "전종목시세": "15:45",
+        "지수_전체": "15:45",
+        "투자자별_거래실적": "16:00",
+        "PER_PBR_배당수익률": "18:00",
+        "외국인보유량": "18:00",
+    }
 
-                return False
+    logged_in = False
 
-        except TimeoutException:
-            print("❌ 로그인 타임아웃: 페이지 로딩 실패")
-            return False
-        except Exception as e:
-            print(f"❌ 로그인 오류: {e}")
-            return False
-        finally:
-            if driver:
-                driver.quit()
+    def _request_market_data(self, data: Dict[str, Any]) -> Dict:
+        """getJsonData.cmd POST 후 JSON 반환 (실패 시 예외)"""
+        raise NotImplementedError
 
     def get_market_data(self, bld: str, params: Dict[str, Any]) -> Optional[Dict]:
         """
@@ -354,13 +198,27 @@ class KRXSession:
             **params
         }
 
-        try:
-            response = self.session.post(self.DATA_URL, data=data)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"❌ API 호출 실패: {e}")
-            return None
+        def fetch():
+            try:
+                return self._request_market_data(data)
+            except Exception as e:
+                print(f"❌ API 호출 실패: {e}")
+                return None
+
+        # 동일 BLD/파라미터 조회는 공용 캐시 사용 (사전 로딩된 데이터 포함)
+        # 공표 전의 빈 블록 응답은 캐시하지 않으므로 사전 로딩 재시도/다음 요청에서 다시 조회한다
+        name = self._bld_names().get(bld)
+        ttl = ttl_for_date(params.get("trdDd"), self.PUBLICATION_TIMES.get(name))
+        key = ("krx", bld, tuple(sorted((k, str(v)) for k, v in params.items())))
+        with tracing.span("krx.get_market_data", **{"krx.bld": bld, "krx.dataset": name}):
+            return data_cache.get_or_fetch(key, fetch, ttl=ttl)
+
+    @classmethod
+    def _bld_names(cls) -> Dict[str, str]:
+        """BLD 경로 → 이름 역매핑"""
+        if "_BLD_NAMES" not in cls.__dict__:
+            cls._BLD_NAMES = {bld: name for name, bld in cls.BLD_ENDPOINTS.items()}
+        return cls._BLD_NAMES
 
     def get_all_stocks(self, date: str, market: str = "STK") -> Optional[Dict]:
         """
@@ -602,6 +460,701 @@ class KRXSession:
         return self.get_market_data(self.BLD_ENDPOINTS[bld_name], params)
 
 
+class KRXSession(KRXDataClient):
+    """
+    KRX Data Marketplace 세션 관리 클래스
+
+    사용법:
+        session = KRXSession()
+        session.login("user_id", "password")
+        data = session.get_market_data("MDCSTAT01501", {"mktId": "STK", "trdDd": "20250117"})
+    """
+
+    LOGIN_URL = f"{KRXDataClient.BASE_URL}/contents/MDC/COMS/client/MDCCOMS001.cmd"
+
+    # 세션 유효 시간: 1시간 (KRX mdc.client_session 쿠키 기준 ~50분)
+    SESSION_TTL = timedelta(hours=1)
+    # 세션 확인: 로그인이 필요한 데이터 호출 (삼성전자 개별종목시세 당일 → 응답 0~1행)
+    # 메인 페이지는 로그인 여부와 무관하게 200이므로 만료를 감지할 수 없음
+    KEEPALIVE_BLD = KRXDataClient.BLD_ENDPOINTS["개별종목시세"]
+    KEEPALIVE_ISIN = "KR7005930003"
+    # 만료 시 응답 본문(로그인 페이지/폼)에 나타나는 표식
+    LOGIN_MARKERS = ("MDCCOMS001", "mbrId", "jsLoginBtn")
+
+    def __init__(self, headless: bool = True, cookie_file: Optional[Path] = None,
+                 session_file: Optional[Path] = None):
+        """
+        Args:
+            headless: 브라우저 창 숨김 여부 (기본: True)
+            cookie_file: 쿠키 저장 경로 (기본: COOKIE_FILE, 계정별 분리 시 지정)
+            session_file: 세션 정보 저장 경로 (기본: SESSION_FILE)
+        """
+        self.headless = headless
+        self.cookie_file = Path(cookie_file) if cookie_file else COOKIE_FILE
+        self.session_file = Path(session_file) if session_file else SESSION_FILE
+        # 공용 연결 풀을 사용하되 쿠키 저장소는 세션(계정)별로 독립
+        self.session = krx_transport.new_session({"Referer": self.BASE_URL})
+        self.logged_in = False
+        self.login_time: Optional[datetime] = None
+        self.mbr_no: Optional[str] = None
+
+        # 저장된 세션 복원 시도
+        self._load_session()
+
+    @property
+    def expires_at(self) -> Optional[datetime]:
+        """세션 만료 예상 시각"""
+        return self.login_time + self.SESSION_TTL if self.login_time else None
+
+    def _load_session(self) -> bool:
+        """저장된 세션 쿠키 로드"""
+        if self.cookie_file.exists() and self.session_file.exists():
+            try:
+                # 세션 정보 확인
+                with open(self.session_file, 'r') as f:
+                    session_info = json.load(f)
+
+                login_time = datetime.fromisoformat(session_info.get('login_time', ''))
+                if datetime.now() - login_time < self.SESSION_TTL:
+                    # 쿠키 로드
+                    with open(self.cookie_file, 'rb') as f:
+                        cookies = pickle.load(f)
+
+                    self._swap_cookie_jar(cookies)
+                    self.logged_in = True
+                    self.login_time = login_time
+                    self.mbr_no = session_info.get('mbr_no')
+                    print(f"✅ 저장된 세션 복원 완료 (로그인: {login_time.strftime('%H:%M:%S')})")
+                    return True
+            except Exception as e:
+                print(f"⚠️ 세션 복원 실패: {e}")
+
+        return False
+
+    def _save_session(self, cookies: list):
+        """
+        세션 쿠키 저장
+
+        다른 워커가 감시하며 읽으므로 임시 파일 작성 후 os.replace로 교체하고,
+        쿠키 → 세션 정보 순서로 기록한다 (세션 정보가 보이면 쿠키는 이미 최신).
+        """
+        try:
+            _atomic_write(self.cookie_file, pickle.dumps(cookies))
+            _atomic_write(self.session_file, json.dumps({
+                'login_time': self.login_time.isoformat(),
+                'mbr_no': self.mbr_no
+            }).encode('utf-8'))
+
+            print(f"✅ 세션 저장 완료: {self.cookie_file}")
+        except Exception as e:
+            print(f"⚠️ 세션 저장 실패: {e}")
+
+    def reload_if_newer(self) -> bool:
+        """
+        다른 프로세스(로그인 리더)가 저장한 더 최신 쿠키가 있으면 적용
+
+        Returns:
+            사용 가능한 로그인 세션이 있으면 True
+        """
+        try:
+            with open(self.session_file, 'r') as f:
+                session_info = json.load(f)
+            login_time = datetime.fromisoformat(session_info.get('login_time', ''))
+        except (OSError, ValueError):
+            return self.logged_in
+
+        if self.login_time and login_time <= self.login_time:
+            return self.logged_in
+        if datetime.now() - login_time >= self.SESSION_TTL:
+            return self.logged_in
+
+        with open(self.cookie_file, 'rb') as f:
+            cookies = pickle.load(f)
+        self._swap_cookie_jar(cookies)
+        self.logged_in = True
+        self.login_time = login_time
+        self.mbr_no = session_info.get('mbr_no')
+        print(f"🔄 저장소 쿠키 적용 (로그인: {login_time.strftime('%H:%M:%S')})")
+        return True
+
+    def _swap_cookie_jar(self, cookies: list):
+        """
+        새 쿠키 jar를 만든 뒤 한 번에 교체
+
+        기존 jar를 clear() 후 채우면 그 사이 요청이 쿠키 없이 나갈 수 있으므로,
+        완성된 jar를 속성 대입(원자적)으로 바꿔 끼운다.
+        self.session을 공유하는 패치된 pykrx webio.Post.read에도 즉시 반영된다.
+        """
+        jar = requests.cookies.RequestsCookieJar()
+        for cookie in cookies:
+            jar.set(cookie['name'], cookie['value'])
+        self.session.cookies = jar
+
+    def apply_cookies(self, cookies: list):
+        """로그인 쿠키 적용 (무중단 교체) 및 저장"""
+        self._swap_cookie_jar(cookies)
+        self.logged_in = True
+        self.login_time = datetime.now()
+        self._save_session(cookies)
+
+    def use_offline(self):
+        """
+        재생 서버(KRX_BASE_URL) 사용 시 로그인 없이 세션을 활성화
+
+        쿠키를 저장하지 않으므로 실제 KRX 세션 파일은 건드리지 않는다.
+        """
+        self._swap_cookie_jar([])
+        self.logged_in = True
+        self.login_time = datetime.now()
+
+    def login(self, user_id: str, password: str, force: bool = False) -> bool:
+        """
+        KRX 로그인 (Selenium 사용)
+
+        Args:
+            user_id: KRX Data Marketplace 아이디
+            password: 비밀번호
+            force: 강제 재로그인 여부
+
+        Returns:
+            로그인 성공 여부
+        """
+        if not SELENIUM_AVAILABLE:
+            raise RuntimeError("Selenium이 설치되지 않았습니다. pip install selenium")
+
+        # 이미 로그인된 경우
+        if self.logged_in and not force:
+            print("✅ 이미 로그인된 상태입니다.")
+            return True
+
+        cookies = self._fetch_login_cookies(user_id, password)
+        if not cookies:
+            return False
+
+        # requests 세션에 쿠키 적용 및 저장
+        self.apply_cookies(cookies)
+        return True
+
+    def _fetch_login_cookies(self, user_id: str, password: str) -> Optional[list]:
+        """
+        Selenium으로 로그인하여 쿠키 목록 반환 (현재 세션은 변경하지 않음)
+
+        Returns:
+            로그인 성공 시 쿠키 목록, 실패 시 None
+        """
+        if not SELENIUM_AVAILABLE:
+            raise RuntimeError("Selenium이 설치되지 않았습니다. pip install selenium")
+
+        print(f"🔐 KRX 로그인 시도: {user_id}")
+
+        # Chrome 옵션 설정
+        options = Options()
+        if self.headless:
+            options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
+
+        driver = None
+        try:
+            driver = webdriver.Chrome(options=options)
+            wait = WebDriverWait(driver, 20)
+
+            # 1. 로그인 페이지 접속
+            print("   → 로그인 페이지 접속...")
+            driver.get(self.LOGIN_URL)
+            time.sleep(2)
+
+            # 2. iframe 내부로 전환
+            print("   → 로그인 폼 대기...")
+            iframe = wait.until(EC.presence_of_element_located((By.TAG_NAME, "iframe")))
+            driver.switch_to.frame(iframe)
+
+            # 3. 로그인 폼 입력
+            print("   → 자격 증명 입력...")
+
+            # ID 입력
+            id_input = wait.until(EC.presence_of_element_located((By.NAME, "mbrId")))
+            id_input.clear()
+            id_input.send_keys(user_id)
+            time.sleep(0.5)
+
+            # 비밀번호 입력 (E2E 암호화를 위해 직접 입력)
+            pw_input = driver.find_element(By.NAME, "pw")
+            pw_input.clear()
+            # 한 글자씩 입력 (키보드 보안 우회)
+            for char in password:
+                pw_input.send_keys(char)
+                time.sleep(0.05)
+
+            time.sleep(1)
+
+            # 4. 로그인 버튼 클릭
+            print("   → 로그인 버튼 클릭...")
+            login_btn = driver.find_element(By.CSS_SELECTOR, ".jsLoginBtn")
+            login_btn.click()
+
+            # 5. 로그인 결과 확인 (최대 10초 대기)
+            time.sleep(3)
+
+            # iframe에서 나와서 메인 페이지 확인
+            driver.switch_to.default_content()
+
+            # 쿠키 확인
+            cookies = driver.get_cookies()
+            jsessionid = None
+            for cookie in cookies:
+                if cookie['name'] == 'JSESSIONID':
+                    jsessionid = cookie['value']
+                    break
+
+            if jsessionid:
+                # 로그인 성공
+                print(f"✅ 로그인 성공! JSESSIONID: {jsessionid[:20]}...")
+                return cookies
+            else:
+                # 로그인 실패 - 에러 메시지 확인
+                try:
+                    driver.switch_to.frame(iframe)
+                    error_elem = driver.find_element(By.CSS_SELECTOR, ".error-msg, .alert")
+                    print(f"❌ 로그인 실패: {error_elem.text}")
+                except:
+                    print("❌ 로그인 실패: 알 수 없는 오류")
+
+                return None
+
+        except TimeoutException:
+            print("❌ 로그인 타임아웃: 페이지 로딩 실패")
+            return None
+        except Exception as e:
+            print(f"❌ 로그인 오류: {e}")
+            return None
+        finally:
+            if driver:
+                driver.quit()
+
+    def keep_alive(self) -> bool:
+        """
+        서버 세션 활동 갱신 + 만료 확인 (로그인이 필요한 작은 데이터 요청, 캐시 미사용)
+
+        Returns:
+            세션이 살아 있으면 True (로그인 페이지로 리다이렉트, 로그인 폼/HTML 응답, 오류 시 False)
+        """
+        if not self.logged_in:
+            return False
+        today = datetime.now().strftime("%Y%m%d")
+        data = {"bld": self.KEEPALIVE_BLD, "isuCd": self.KEEPALIVE_ISIN, "strtDd": today, "endDd": today}
+        try:
+            response = krx_transport.post(self.DATA_URL, session=self.session, data=data, timeout=10,
+                                          allow_redirects=False, policy=RetryPolicy(attempts=1))
+        except Exception as e:
+            print(f"⚠️ 세션 keep-alive 실패: {e}")
+            return False
+        return self._session_alive(response)
+
+    def _session_alive(self, response) -> bool:
+        if 300 <= response.status_code < 400:
+            print(f"🔒 세션 만료: 로그인 페이지로 리다이렉트 ({response.headers.get('Location', '')})")
+            return False
+        if response.status_code != 200:
+            print(f"⚠️ 세션 keep-alive 응답 {response.status_code}")
+            return False
+        if any(marker in response.text for marker in self.LOGIN_MARKERS):
+            print("🔒 세션 만료: 로그인 폼 응답")
+            return False
+        try:
+            response.json()
+        except ValueError:
+            # 만료 시 JSON 대신 HTML 반환
+            print("🔒 세션 만료: JSON이 아닌 응답")
+            return False
+        return True
+
+    def post(self, url: str, **kwargs):
+        """
+        로그인 쿠키가 포함된 POST (패치된 pykrx webio.Post.read에서 사용)
+
+        krx_transport를 통해 공용 연결 풀, 속도 제한, 재시도/타임아웃이 적용된다.
+        """
+        return krx_transport.post(url, session=self.session, **kwargs)
+
+    def _request_market_data(self, data: Dict[str, Any]) -> Dict:
+        response = self.post(self.DATA_URL, data=data)
+        response.raise_for_status()
+        return response.json()
+
+
+class SessionRefresher:
+    """
+    KRX 세션 백그라운드 갱신기
+
+    세션 만료 전에 별도 스레드에서 Selenium 재로그인을 수행하고,
+    성공하면 KRXSession.apply_cookies()로 쿠키를 무중단 교체한다.
+    그 사이에는 keepalive_interval마다 keep-alive 요청으로 세션 상태를 확인하고,
+    세션이 끊긴 것이 감지되거나 request_refresh()가 호출되면 즉시 재로그인한다.
+
+    사용법:
+        refresher = SessionRefresher(krx, user_id, password)
+        refresher.start()
+        ...
+        refresher.stop()
+    """
+
+    def __init__(self, krx: KRXSession, user_id: str, password: str,
+                 refresh_after: timedelta = timedelta(minutes=40),
+                 keepalive_interval: float = 300,
+                 retry_interval: float = 60,
+                 on_refresh: Optional[Callable[[bool], None]] = None):
+        """
+        Args:
+            krx: 갱신할 세션
+            user_id: KRX 아이디
+            password: 비밀번호
+            refresh_after: 로그인 후 재로그인까지의 시간 (쿠키 만료 ~50분보다 짧게)
+            keepalive_interval: keep-alive 확인 간격 (초)
+            retry_interval: 재로그인 실패 시 재시도 간격 (초)
+            on_refresh: 재로그인 시도 후 호출 (성공 여부 전달, 세션 풀 상태 갱신용)
+        """
+        self.krx = krx
+        self.user_id = user_id
+        self.password = password
+        self.refresh_after = refresh_after
+        self.keepalive_interval = keepalive_interval
+        self.retry_interval = retry_interval
+        self.on_refresh = on_refresh
+
+        self.last_refresh: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.refresh_count = 0
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._force = False
+        self._thread: Optional[threading.Thread] = None
+
+    def _refresh_due(self) -> datetime:
+        if not self.krx.login_time:
+            return datetime.now()
+        return self.krx.login_time + self.refresh_after
+
+    def refresh(self) -> bool:
+        """재로그인 후 쿠키 교체 (실패 시 기존 쿠키 유지)"""
+        try:
+            cookies = self.krx._fetch_login_cookies(self.user_id, self.password)
+        except Exception as e:
+            cookies = None
+            self.last_error = str(e)
+
+        if not cookies:
+            self.last_error = self.last_error or "재로그인 실패"
+            print(f"⚠️ [session-refresh] 재로그인 실패: {self.last_error}")
+            self._notify(False)
+            return False
+
+        self.krx.apply_cookies(cookies)
+        self.last_refresh = datetime.now()
+        self.last_error = None
+        self.refresh_count += 1
+        print(f"✅ [session-refresh] 세션 갱신 완료 (다음 갱신: {self._refresh_due().strftime('%H:%M:%S')})")
+        self._notify(True)
+        return True
+
+    def _notify(self, ok: bool):
+        if self.on_refresh:
+            try:
+                self.on_refresh(ok)
+            except Exception as e:
+                print(f"⚠️ [session-refresh] 콜백 오류: {e}")
+
+    def request_refresh(self):
+        """다음 확인 주기를 기다리지 않고 즉시 재로그인 요청"""
+        self._force = True
+        self._wake.set()
+
+    def _wait(self, seconds: float):
+        self._wake.wait(seconds)
+        self._wake.clear()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._force or datetime.now() >= self._refresh_due() or not self.krx.keep_alive():
+                self._force = False
+                if not self.refresh():
+                    self._wait(self.retry_interval)
+                    continue
+            until_due = (self._refresh_due() - datetime.now()).total_seconds()
+            self._wait(min(self.keepalive_interval, max(1.0, until_due)))
+
+    def start(self):
+        """백그라운드 스레드 시작"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"krx-session-refresher-{self.user_id}",
+                                        daemon=True)
+        self._thread.start()
+        print(f"✅ [session-refresh] 시작 (다음 갱신: {self._refresh_due().strftime('%H:%M:%S')})")
+
+    def stop(self):
+        """백그라운드 스레드 종료"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "login_time": self.krx.login_time.isoformat(timespec="seconds") if self.krx.login_time else None,
+            "next_refresh": self._refresh_due().isoformat(timespec="seconds"),
+            "last_refresh": self.last_refresh.isoformat(timespec="seconds") if self.last_refresh else None,
+            "refresh_count": self.refresh_count,
+            "last_error": self.last_error,
+        }
+
+
+class _PoolMember:
+    """세션 풀 구성원 (계정 1개 = 세션 1개)"""
+
+    def __init__(self, krx: KRXSession, user_id: str, password: str):
+        self.krx = krx
+        self.user_id = user_id
+        self.password = password
+        self.refresher: Optional[SessionRefresher] = None
+        self.outstanding = 0          # 처리 중인 요청 수
+        self.requests = 0             # 누적 요청 수
+        self.failures = 0             # 연속 실패 횟수
+        self.healthy = False
+        self.last_error: Optional[str] = None
+
+
+class KRXSessionPool(KRXDataClient):
+    """
+    다중 계정 KRX 세션 풀
+
+    계정별로 독립된 쿠키 저장소를 가진 KRXSession을 N개 관리하고,
+    요청은 처리 중인 요청이 가장 적은 정상 세션으로 분배한다.
+    연속 실패(max_failures)한 세션은 분배 대상에서 제외한 뒤
+    해당 세션의 SessionRefresher로 백그라운드 재로그인하여 복귀시킨다.
+
+    사용법:
+        pool = KRXSessionPool([("id1", "pw1"), ("id2", "pw2")])
+        pool.login_all()
+        data = pool.get_all_stocks("20250117")
+        ...
+        pool.stop()
+    """
+
+    def __init__(self, accounts: List[Tuple[str, str]], headless: bool = True,
+                 max_failures: int = 2, auto_refresh: bool = True):
+        """
+        Args:
+            accounts: (아이디, 비밀번호) 목록
+            headless: 브라우저 창 숨김 여부
+            max_failures: 세션을 분배 대상에서 제외하기까지의 연속 실패 횟수
+            auto_refresh: 세션별 백그라운드 재로그인 사용 여부
+        """
+        if not accounts:
+            raise ValueError("accounts가 비어 있습니다")
+        self.max_failures = max_failures
+        self.auto_refresh = auto_refresh
+        self._lock = threading.Lock()
+        self.members: List[_PoolMember] = []
+        for i, (user_id, password) in enumerate(accounts):
+            # 첫 계정은 기존 단일 세션 파일을 그대로 사용 (단일 → 풀 전환 시 세션 재사용)
+            if i == 0:
+                krx = KRXSession(headless=headless)
+            else:
+                krx = KRXSession(
+                    headless=headless,
+                    cookie_file=COOKIE_FILE.with_name(f".krx_cookies.{user_id}.pkl"),
+                    session_file=SESSION_FILE.with_name(f".krx_session.{user_id}.json"),
+                )
+            member = _PoolMember(krx, user_id, password)
+            member.healthy = krx.logged_in
+            self.members.append(member)
+
+    # ------------------------------------------------------------------
+    # 로그인 / 상태
+    # ------------------------------------------------------------------
+
+    def login_all(self, force: bool = False) -> int:
+        """
+        모든 계정 로그인 (Selenium은 순차 실행)
+
+        로그인에 실패한 계정은 분배 대상에서 제외되고 백그라운드에서 재시도한다.
+
+        Returns:
+            로그인 성공한 세션 수
+        """
+        for member in self.members:
+            ok = member.krx.login(member.user_id, member.password, force=force)
+            with self._lock:
+                member.healthy = ok
+                member.failures = 0
+                member.last_error = None if ok else "로그인 실패"
+            if self.auto_refresh:
+                self._start_refresher(member)
+                if not ok:
+                    member.refresher.request_refresh()
+        healthy = sum(1 for m in self.members if m.healthy)
+        print(f"✅ [session-pool] {healthy}/{len(self.members)}개 세션 로그인")
+        return healthy
+
+    def _start_refresher(self, member: _PoolMember):
+        if member.refresher is None:
+            member.refresher = SessionRefresher(
+                member.krx, member.user_id, member.password,
+                on_refresh=lambda ok, m=member: self._on_refresh(m, ok),
+            )
+        member.refresher.start()
+
+    def _on_refresh(self, member: _PoolMember, ok: bool):
+        with self._lock:
+            if ok:
+                if not member.healthy:
+                    print(f"✅ [session-pool] {member.user_id} 세션 복귀")
+                member.healthy = True
+                member.failures = 0
+                member.last_error = None
+            else:
+                member.healthy = False
+
+    @property
+    def logged_in(self) -> bool:
+        return any(m.healthy and m.krx.logged_in for m in self.members)
+
+    @property
+    def login_time(self) -> Optional[datetime]:
+        times = [m.krx.login_time for m in self.members if m.healthy and m.krx.login_time]
+        return min(times) if times else None
+
+    @property
+    def expires_at(self) -> Optional[datetime]:
+        """정상 세션 중 가장 먼저 만료되는 시각"""
+        times = [m.krx.expires_at for m in self.members if m.healthy and m.krx.expires_at]
+        return min(times) if times else None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self.members),
+                "healthy": sum(1 for m in self.members if m.healthy),
+                "members": [
+                    {
+                        "user_id": m.user_id,
+                        "healthy": m.healthy,
+                        "outstanding": m.outstanding,
+                        "requests": m.requests,
+                        "failures": m.failures,
+                        "last_error": m.last_error,
+                        "expires_at": m.krx.expires_at.isoformat(timespec="seconds")
+                        if m.krx.expires_at else None,
+                        "refresher": m.refresher.status() if m.refresher else None,
+                    }
+                    for m in self.members
+                ],
+            }
+
+    def start_refreshers(self):
+        """모든 세션의 백그라운드 재로그인 시작 (로그인 리더로 승격 시 사용)"""
+        self.auto_refresh = True
+        for member in self.members:
+            self._start_refresher(member)
+
+    def reload_from_disk(self) -> bool:
+        """
+        각 계정의 저장소에서 더 최신 쿠키를 적용 (로그인 팔로워용)
+
+        Returns:
+            사용 가능한 세션이 하나라도 있으면 True
+        """
+        for member in self.members:
+            before = member.krx.login_time
+            if member.krx.reload_if_newer() and member.krx.login_time != before:
+                self._on_refresh(member, True)
+        return self.logged_in
+
+    def stop(self):
+        """모든 세션 갱신기 종료"""
+        for member in self.members:
+            if member.refresher:
+                member.refresher.stop()
+
+    # ------------------------------------------------------------------
+    # 요청 분배
+    # ------------------------------------------------------------------
+
+    def _acquire(self, exclude: List[_PoolMember]) -> Optional[_PoolMember]:
+        """처리 중인 요청이 가장 적은 정상 세션 선택"""
+        with self._lock:
+            candidates = [m for m in self.members
+                          if m.healthy and m.krx.logged_in and m not in exclude]
+            if not candidates:
+                return None
+            member = min(candidates, key=lambda m: (m.outstanding, m.requests))
+            member.outstanding += 1
+            member.requests += 1
+            return member
+
+    def _release(self, member: _PoolMember, error: Optional[Exception] = None):
+        relogin = False
+        with self._lock:
+            member.outstanding -= 1
+            if error is None:
+                member.failures = 0
+                return
+            member.failures += 1
+            member.last_error = str(error)
+            if member.healthy and member.failures >= self.max_failures:
+                member.healthy = False
+                relogin = True
+        if relogin:
+            print(f"⚠️ [session-pool] {member.user_id} 세션 제외 (연속 {member.failures}회 실패) - 재로그인 예약")
+            if self.auto_refresh:
+                self._start_refresher(member)
+                member.refresher.request_refresh()
+
+    def _dispatch(self, call: Callable[[KRXSession], Any], attempts: int = 2) -> Any:
+        """
+        정상 세션으로 call(krx) 실행, 실패 시 다른 세션으로 재시도
+
+        Raises:
+            마지막 시도의 예외 (사용 가능한 세션이 없으면 RuntimeError)
+        """
+        tried: List[_PoolMember] = []
+        last_error: Optional[Exception] = None
+        for _ in range(attempts):
+            member = self._acquire(tried)
+            if member is None:
+                break
+            tried.append(member)
+            try:
+                result = call(member.krx)
+            except Exception as e:
+                self._release(member, e)
+                last_error = e
+                continue
+            self._release(member)
+            return result
+        raise last_error or RuntimeError("사용 가능한 KRX 세션이 없습니다")
+
+    def post(self, url: str, **kwargs):
+        """정상 세션 중 하나로 POST (패치된 pykrx webio.Post.read에서 사용)"""
+        def call(krx: KRXSession):
+            response = krx.post(url, **kwargs)
+            response.raise_for_status()
+            return response
+        return self._dispatch(call)
+
+    def _request_market_data(self, data: Dict[str, Any]) -> Dict:
+        # 세션 만료 시 KRX는 HTML을 반환하므로 JSON 파싱 실패도 세션 실패로 집계
+        return self._dispatch(lambda krx: krx._request_market_data(data))
+
+
 def main():
     """테스트 실행"""
     import sys
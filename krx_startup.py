@@ -0,0 +1,152 @@
+"""
+서버 시작 단계 관리 (빠른 시작 모드)
+=====================================
+
+pykrx import(matplotlib/pandas 포함 ~1초), Selenium 로그인, pykrx 패치, ETF/ETN/ELW 마스터 로드를
+순서대로 실행하고 단계별 상태를 기록한다.
+
+- 기본(blocking): lifespan 안에서 모두 끝낸 뒤 포트 바인딩 (기존 동작)
+- KRX_FAST_STARTUP=1: 포트를 먼저 바인딩하고 백그라운드 스레드에서 실행
+  준비 전 요청은 비로그인 경로로 처리되며, /api/status의 startup.ready로 준비 여부 확인
+
+pykrx는 LazyModule로 감싸 첫 속성 접근 시 import하고, 등록된 on_load 훅(패치/계측)을 한 번 실행한다.
+
+사용법:
+    stock = lazy_import("pykrx.stock")
+    stock.on_load(lambda module: krx_transport.patch_pykrx(get_session))
+
+    startup = StartupTasks([("pykrx", stock.load), ("login", login)])
+    startup.start()          # 백그라운드
+    startup.status()         # {"ready": False, "steps": [...]}
+"""
+
+import importlib
+import threading
+import time
+import types
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class LazyModule(types.ModuleType):
+    """첫 속성 접근 시 import되는 모듈 프록시"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+        self.__dict__["_hooks"] = []
+        self.__dict__["_lock"] = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def on_load(self, hook: Callable[[types.ModuleType], None]):
+        """import 직후 실행할 훅 등록 (이미 로드되었으면 즉시 실행)"""
+        with self._lock:
+            if self._module is None:
+                self._hooks.append(hook)
+                return hook
+        hook(self._module)
+        return hook
+
+    def load(self) -> types.ModuleType:
+        """모듈 import 및 훅 실행 (여러 스레드에서 호출해도 1회)"""
+        module = self._module
+        if module is not None:
+            return module
+        with self._lock:
+            if self._module is None:
+                module = importlib.import_module(self.__name__)
+                for hook in self._hooks:
+                    hook(module)
+                self._hooks.clear()
+                self.__dict__["_module"] = module
+            return self._module
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.load(), name)
+
+    def __dir__(self):
+        return dir(self.load())
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+class StartupTasks:
+    """
+    시작 단계 순차 실행기
+
+    Args:
+        steps: (이름, 함수) 목록. 함수가 False를 반환하거나 예외를 던지면 실패로 기록하고 다음 단계 진행
+        on_done: 모든 단계 종료 후 호출 (백그라운드 스레드에서 실행됨)
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], Any]]],
+                 on_done: Optional[Callable[[], None]] = None):
+        self.steps = steps
+        self.on_done = on_done
+        self.mode = "blocking"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._state: Dict[str, Dict[str, Any]] = {
+            name: {"state": "pending", "seconds": None, "error": None} for name, _ in steps
+        }
+        self._ready = threading.Event()
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def run(self):
+        """모든 단계를 현재 스레드에서 실행"""
+        self.started_at = time.monotonic()
+        try:
+            for name, func in self.steps:
+                if self._cancel.is_set():
+                    self._state[name]["state"] = "cancelled"
+                    continue
+                state = self._state[name]
+                state["state"] = "running"
+                t = time.monotonic()
+                try:
+                    ok = func()
+                    state["state"] = "failed" if ok is False else "done"
+                except Exception as e:
+                    state["state"] = "failed"
+                    state["error"] = str(e)
+                    print(f"⚠️ [startup] {name} 실패: {e}")
+                state["seconds"] = round(time.monotonic() - t, 3)
+        finally:
+            self.finished_at = time.monotonic()
+            self._ready.set()
+        print(f"✅ [startup] 준비 완료 ({self.finished_at - self.started_at:.1f}초, {self.mode})")
+        if self.on_done and not self._cancel.is_set():
+            self.on_done()
+
+    def start(self):
+        """백그라운드 스레드에서 실행 (포트 바인딩을 막지 않음)"""
+        self.mode = "background"
+        self._thread = threading.Thread(target=self.run, name="krx-startup", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def cancel(self):
+        """남은 단계 건너뛰기 (서버 종료 시)"""
+        self._cancel.set()
+
+    def status(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.monotonic()) - self.started_at, 3)
+        return {
+            "mode": self.mode,
+            "ready": self.ready,
+            "elapsed_sec": elapsed,
+            "steps": [dict(name=name, **self._state[name]) for name, _ in self.steps],
+        }
@@ -0,0 +1,226 @@
+"""
+KRX HTTP 전송 계층
+=====================================
+
+KRX(data.krx.co.kr)로 나가는 모든 HTTP 요청의 단일 경로.
+
+- 연결 풀: 모든 세션이 하나의 HTTPAdapter를 공유 (keep-alive 연결 재사용)
+  쿠키 저장소는 세션마다 독립 → 계정별 세션(KRXSessionPool)도 같은 연결 풀 사용
+- 속도 제한/재시도/타임아웃: krx_ratelimit.request_with_retry
+- 요청 통계: BLD(또는 URL 경로)별 호출 수, 오류 수, 지연 시간 (+ /metrics 히스토그램)
+- pykrx 연동: webio.Post.read를 한 번만 패치하고, 요청 시점에 현재 로그인 세션을 조회
+
+- 오프라인 재생: KRX_BASE_URL이 있으면 data.krx.co.kr 요청을 해당 호스트(krx_replay 서버)로 전환
+- 녹화: KRX_RECORD_DIR이 있으면 getJsonData.cmd 응답을 fixture로 저장 (krx_replay.FixtureRecorder)
+
+응답 캐시는 데이터 단위(KRXDataClient.get_market_data, IntentContext.fetch)에서 data_cache로 처리한다.
+
+사용법:
+    import krx_transport
+    session = krx_transport.new_session()
+    resp = krx_transport.post(url, session=session, data={"bld": ...})
+
+    krx_transport.patch_pykrx(get_session)   # get_session() → 로그인 세션 또는 None
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from krx_ratelimit import RetryPolicy, request_with_retry
+from metrics import UPSTREAM_ERRORS, UPSTREAM_IN_FLIGHT, UPSTREAM_LATENCY
+import tracing
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Referer": "https://data.krx.co.kr",
+}
+
+# 프로세스 공용 연결 풀 (재시도는 request_with_retry가 담당하므로 max_retries=0)
+SHARED_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=0)
+
+
+def new_session(headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """공용 연결 풀을 사용하는 requests 세션 생성 (쿠키 저장소는 독립)"""
+    session = requests.Session()
+    session.mount("https://", SHARED_ADAPTER)
+    session.mount("http://", SHARED_ADAPTER)
+    session.headers.update(DEFAULT_HEADERS)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+# 로그인 없이 보내는 요청용 세션
+_anonymous = new_session()
+
+
+class TransportStats:
+    """BLD/경로별 요청 통계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, key: str, latency: float, error: bool):
+        with self._lock:
+            s = self._stats.setdefault(key, {"count": 0, "errors": 0, "total_sec": 0.0, "max_sec": 0.0})
+            s["count"] += 1
+            s["errors"] += int(error)
+            s["total_sec"] += latency
+            s["max_sec"] = max(s["max_sec"], latency)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                key: {
+                    "count": int(s["count"]),
+                    "errors": int(s["errors"]),
+                    "avg_ms": round(s["total_sec"] / s["count"] * 1000, 1) if s["count"] else None,
+                    "max_ms": round(s["max_sec"] * 1000, 1),
+                }
+                for key, s in self._stats.items()
+            }
+
+
+transport_stats = TransportStats()
+
+
+def _request_key(url: str, kwargs: Dict[str, Any]) -> str:
+    data = kwargs.get("data")
+    if isinstance(data, dict) and data.get("bld"):
+        return data["bld"]
+    return urlparse(url).path
+
+
+# ----------------------------------------------------------------------
+# 오프라인 재생 / 녹화
+# ----------------------------------------------------------------------
+
+KRX_HOSTS = ("data.krx.co.kr",)
+
+# 예: http://127.0.0.1:8765 (python krx_replay.py serve)
+BASE_URL_OVERRIDE = os.getenv("KRX_BASE_URL", "").strip().rstrip("/")
+
+# (method, url, data, response) → None
+_recorder: Optional[Callable[[str, str, Optional[Dict[str, Any]], requests.Response], None]] = None
+
+
+def offline() -> bool:
+    """KRX 대신 재생 서버를 사용하는지 여부"""
+    return bool(BASE_URL_OVERRIDE)
+
+
+def resolve_url(url: str) -> str:
+    """KRX_BASE_URL이 설정되어 있으면 KRX 호스트를 재생 서버로 치환"""
+    if not BASE_URL_OVERRIDE:
+        return url
+    parsed = urlparse(url)
+    if parsed.hostname not in KRX_HOSTS:
+        return url
+    return BASE_URL_OVERRIDE + parsed.path + (f"?{parsed.query}" if parsed.query else "")
+
+
+def set_recorder(recorder: Optional[Callable[..., None]]):
+    """응답 녹화 콜백 등록 (None이면 해제)"""
+    global _recorder
+    _recorder = recorder
+
+
+def _record(method: str, url: str, kwargs: Dict[str, Any], resp: requests.Response):
+    data = kwargs.get("data")
+    try:
+        _recorder(method, url, data if isinstance(data, dict) else None, resp)
+    except Exception as e:
+        print(f"⚠️ [record] 녹화 실패: {e}")
+
+
+if os.getenv("KRX_RECORD_DIR"):
+    from krx_replay import FixtureRecorder
+    set_recorder(FixtureRecorder(os.environ["KRX_RECORD_DIR"]))
+    print(f"🎥 [record] KRX 응답 녹화 → {os.environ['KRX_RECORD_DIR']}")
+
+
+def send(method: str, url: str, session: Optional[requests.Session] = None,
+         policy: Optional[RetryPolicy] = None, **kwargs) -> requests.Response:
+    """
+    KRX 요청 전송 (연결 풀 + 속도 제한 + 재시도 + 통계)
+
+    Args:
+        method: HTTP 메서드
+        url: 요청 URL
+        session: 쿠키가 담긴 세션 (None이면 비로그인 공용 세션)
+        policy: 재시도 정책 (기본: krx_ratelimit.DEFAULT_RETRY)
+        **kwargs: requests.Session.request 인자 (timeout 지정 시 정책 타임아웃 대신 사용)
+    """
+    session = session or _anonymous
+    url = resolve_url(url)
+    key = _request_key(url, kwargs)
+    started = time.monotonic()
+    error = True
+    UPSTREAM_IN_FLIGHT.inc()
+    try:
+        with tracing.span("krx.http", **{"http.method": method, "krx.bld": key}) as s:
+            resp = request_with_retry(
+                lambda timeout: session.request(method, url, **{"timeout": timeout, **kwargs}),
+                policy=policy,
+            )
+            if s:
+                s.set(**{"http.status_code": resp.status_code})
+        error = resp.status_code >= 400
+        if error:
+            UPSTREAM_ERRORS.inc(bld=key, kind=f"http_{resp.status_code}")
+        elif _recorder is not None:
+            _record(method, url, kwargs, resp)
+        return resp
+    except Exception as e:
+        UPSTREAM_ERRORS.inc(bld=key, kind=type(e).__name__)
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec()
+        elapsed = time.monotonic() - started
+        UPSTREAM_LATENCY.observe(elapsed, bld=key)
+        transport_stats.record(key, elapsed, error)
+
+
+def post(url: str, session: Optional[requests.Session] = None, **kwargs) -> requests.Response:
+    return send("POST", url, session=session, **kwargs)
+
+
+def get(url: str, session: Optional[requests.Session] = None, **kwargs) -> requests.Response:
+    return send("GET", url, session=session, **kwargs)
+
+
+# ----------------------------------------------------------------------
+# pykrx 연동
+# ----------------------------------------------------------------------
+
+_session_provider: Callable[[], Any] = lambda: None
+
+
+def _post_read(self, **params):
+    """pykrx webio.Post.read 대체: 로그인 세션(또는 세션 풀)이 있으면 사용, 없으면 비로그인"""
+    client = _session_provider()
+    if client is not None and client.logged_in:
+        return client.post(self.url, headers=self.headers, data=params)
+    return post(self.url, headers=self.headers, data=params)
+
+
+def patch_pykrx(session_provider: Optional[Callable[[], Any]] = None):
+    """
+    pykrx webio.Post.read 패치 (여러 번 호출해도 안전)
+
+    Args:
+        session_provider: 현재 로그인 세션(KRXSession/KRXSessionPool)을 반환하는 함수
+    """
+    global _session_provider
+    from pykrx.website.comm import webio
+
+    if session_provider is not None:
+        _session_provider = session_provider
+    webio.Post.read = _post_read
@@ -13,166 +13,58 @@ import os
 if sys.platform == 'win32':
     os.environ['PYTHONIOENCODING'] = 'utf-8'
 
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
 import json
+import asyncio
+import time
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Callable, Literal, Tuple, Union
 import uvicorn
 import os
-import requests
-import pickle
 
 # ============================================================================
-# [중요] pykrx import 전에 쿠키 주입 먼저 수행!
-# pykrx가 import되면 webio.Post 클래스가 이미 로드되므로,
-# import 전에 패치해야 함
+# pykrx / KRX 세션 모듈
+# (pykrx webio.Post.read 패치는 krx_transport.patch_pykrx 한 곳에서만 수행)
 # ============================================================================
 
-def _inject_cookies_before_pykrx_import():
-    """
-    pykrx import 전에 webio.Post.read를 패치
-    이 함수는 pykrx import 전에 호출되어야 함!
-    """
-    cookie_file = os.path.join(os.path.dirname(__file__), '.krx_cookies.pkl')
-
-    if not os.path.exists(cookie_file):
-        print("[WARN] KRX 쿠키 파일 없음 - ETF/ETN/ELW API 제한됨")
-        return False
-
-    try:
-        with open(cookie_file, 'rb') as f:
-            cookies_list = pickle.load(f)
-
-        cookies_dict = {}
-        for c in cookies_list:
-            name = c.get('name')
-            value = c.get('value')
-            if name and value:
-                cookies_dict[name] = value
-
-        if not cookies_dict:
-            print("[WARN] 유효한 쿠키 없음")
-            return False
-
-        print(f"[OK] KRX 쿠키 로드: {len(cookies_dict)}개 - {list(cookies_dict.keys())}")
-
-        # 쿠키를 사용하는 requests 세션 생성
-        session = requests.Session()
-        session.cookies.update(cookies_dict)
-        session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Referer": "http://data.krx.co.kr/"
-        })
-
-        # pykrx webio 모듈 import (아직 pykrx 전체를 import하지 않음)
-        from pykrx.website.comm import webio
-
-        # 원본 Post.read 메서드 저장
-        original_post_read = webio.Post.read
-
-        def patched_post_read(self, **params):
-            """쿠키가 포함된 세션으로 POST 요청"""
-            try:
-                resp = session.post(self.url, headers=self.headers, data=params)
-                return resp
-            except Exception as e:
-                print(f"[WARN] pykrx POST 요청 실패: {e}")
-                return original_post_read(self, **params)
-
-        # Post 클래스의 read 메서드 패치
-        webio.Post.read = patched_post_read
-
-        print("[OK] pykrx webio.Post.read 패치 완료 (import 전)")
-        return True
-
-    except Exception as e:
-        print(f"[ERROR] 쿠키 주입 실패: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
-
-
-# === pykrx import 전에 쿠키 주입 실행! ===
-print("[STARTUP] pykrx import 전 쿠키 주입 시작...")
-_cookie_injected = _inject_cookies_before_pykrx_import()
-print(f"[STARTUP] 쿠키 주입 결과: {_cookie_injected}")
-
-# 이제 pykrx를 import (패치된 webio.Post가 사용됨)
-print("[STARTUP] pykrx 모듈 import 시작...")
-from pykrx_with_login import login_and_patch, get_session
-from pykrx import stock
-from krx_session import KRXSession
-print("[STARTUP] pykrx 모듈 import 완료!")
-
-# ============================================================================
-# pykrx requests 세션에 KRX 쿠키 주입 (레거시 - 이제 위에서 처리됨)
-# ============================================================================
-
-def inject_krx_cookies_to_pykrx():
-    """
-    pykrx의 requests 호출에 KRX 로그인 쿠키를 주입
-
-    문제: pykrx는 requests.post()를 직접 호출하여 쿠키 없이 요청
-    해결: pykrx의 webio.Post 클래스를 패치하여 쿠키 포함 세션 사용
-    """
-    import pickle
-    from pykrx.website.comm import webio
-
-    cookie_file = os.path.join(os.path.dirname(__file__), '.krx_cookies.pkl')
-
-    try:
-        # 저장된 쿠키 로드
-        if not os.path.exists(cookie_file):
-            print("⚠️ KRX 쿠키 파일 없음 - ETF/ETN/ELW API 제한")
-            return False
-
-        with open(cookie_file, 'rb') as f:
-            cookies_list = pickle.load(f)
-
-        # 쿠키를 dict로 변환
-        cookies_dict = {}
-        for c in cookies_list:
-            name = c.get('name')
-            value = c.get('value')
-            if name and value:
-                cookies_dict[name] = value
-
-        print(f"🍪 KRX 쿠키 로드: {len(cookies_dict)}개")
-
-        # 쿠키를 사용하는 requests 세션 생성
-        session = requests.Session()
-        session.cookies.update(cookies_dict)
-        session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Referer": "http://data.krx.co.kr/"
-        })
-
-        # 원본 Post.read 메서드 저장
-        original_post_read = webio.Post.read
-
-        def patched_post_read(self, **params):
-            """쿠키가 포함된 세션으로 POST 요청"""
-            try:
-                resp = session.post(self.url, headers=self.headers, data=params)
-                return resp
-            except Exception as e:
-                print(f"⚠️ pykrx POST 요청 실패: {e}")
-                # 폴백: 원본 메서드 사용
-                return original_post_read(self, **params)
-
-        # Post 클래스의 read 메서드 패치
-        webio.Post.read = patched_post_read
-
-        print("✅ pykrx requests 세션에 쿠키 주입 완료")
-        return True
-
-    except Exception as e:
-        print(f"⚠️ pykrx 쿠키 주입 실패: {e}")
-        return False
+from pykrx_with_login import (
+    login_and_patch, login_pool_and_patch, parse_accounts,
+    get_session, get_refresher, get_coordinator, stop_refresher,
+    stock,  # 지연 로드 (krx_startup.LazyModule)
+)
+from krx_session import KRXDataClient, KRXSession, KRXSessionPool
+from intent_handlers import IntentContext, register_intent, INTENT_HANDLERS
+from krx_cache import data_cache, ttl_for_date
+from krx_ratelimit import krx_limiter
+import krx_transport
+from krx_prewarm import PrewarmScheduler, PrewarmJob
+import metrics
+import tracing
+import profiler
+from krx_startup import StartupTasks
+from etx_master import etx_master
+from krx_decode import decode_frame, decode_block, decode_table, to_records, attach_names
+from market_store import MarketSnapshot, current_pool, pool_status
+from screener import ScreenerError, build_screen_snapshot, screen
+from indicators import IndicatorError, OhlcvPanel, compute_indicator, parse_indicators, required_days
+from portfolio import ReturnMatrix
+
+
+@stock.on_load
+def _setup_pykrx(module):
+    """pykrx 첫 로드 시 1회: 전송 계층 패치 및 계측"""
+    # pykrx의 모든 KRX 요청을 krx_transport 경유로 전환 (로그인 전에는 비로그인 요청)
+    krx_transport.patch_pykrx(get_session)
+
+    # pykrx.stock 공개 함수별 호출 시간/예외 수 기록 (/metrics)
+    metrics.instrument_module(module, metrics.PYKRX_LATENCY, metrics.PYKRX_ERRORS)
+    tracing.instrument_module(module, "pykrx")
 
 
 # ============================================================================
@@ -185,114 +77,66 @@ def patch_pykrx_etx_ticker():
 
     문제: pykrx/website/krx/etx/ticker.py의 한글 컬럼명('시장', '종목명', '상장일')이
           Windows에서 깨진 문자로 인식됨
-    해결: DataFrame 컬럼을 영문으로 변경하고 검색 조건도 수정
+    해결: 조회를 etx_master(영문 필드, 티커 dict + 상장일 bisect 인덱스, 디스크 저장)로 위임
+          is_etf/get_etx_isin 등 모듈 함수도 DataFrame 대신 dict 조회로 교체
     """
     try:
+        stock.load()  # 내부 모듈 직접 사용 전 pykrx 패치/계측 적용
         from pykrx.website.krx.etx import ticker as etx_ticker
-        from pykrx.website.krx.etx.core import (
-            ETF_전종목기본종목, ETN_전종목기본종목, ELW_전종목기본종목
-        )
-        import pandas as pd
-
-        # 기존 싱글톤 인스턴스 초기화 (있다면)
-        if hasattr(etx_ticker, 'EtxTicker'):
-            # 싱글톤 데코레이터 우회하여 새로 생성
-
-            class PatchedEtxTicker:
-                """인코딩 문제가 해결된 EtxTicker"""
-
-                _instance = None
-                _df = None
-
-                def __new__(cls):
-                    if cls._instance is None:
-                        cls._instance = super().__new__(cls)
-                        cls._df = cls._get_tickers_safe()
-                    return cls._instance
-
-                @classmethod
-                def _get_tickers_safe(cls):
-                    """인코딩 문제 없이 티커 목록 로드"""
-                    try:
-                        # ETF
-                        df_etf = ETF_전종목기본종목().fetch()
-                        if df_etf is not None and not df_etf.empty:
-                            df_etf = df_etf[["ISU_CD", "ISU_SRT_CD", "ISU_ABBRV", "LIST_DD"]].copy()
-                            df_etf['CATEGORY'] = "ETF"
-                        else:
-                            df_etf = pd.DataFrame(columns=["ISU_CD", "ISU_SRT_CD", "ISU_ABBRV", "LIST_DD", "CATEGORY"])
-
-                        # ETN
-                        df_etn = ETN_전종목기본종목().fetch()
-                        if df_etn is not None and not df_etn.empty:
-                            df_etn = df_etn[["ISU_CD", "ISU_SRT_CD", "ISU_ABBRV", "LIST_DD"]].copy()
-                            df_etn['CATEGORY'] = "ETN"
-                        else:
-                            df_etn = pd.DataFrame(columns=["ISU_CD", "ISU_SRT_CD", "ISU_ABBRV", "LIST_DD", "CATEGORY"])
-
-                        # ELW
-                        df_elw = ELW_전종목기본종목().fetch()
-                        if df_elw is not None and not df_elw.empty:
-                            df_elw = df_elw[["ISU_CD", "ISU_SRT_CD", "ISU_ABBRV", "LIST_DD"]].copy()
-                            df_elw['CATEGORY'] = "ELW"
-                        else:
-                            df_elw = pd.DataFrame(columns=["ISU_CD", "ISU_SRT_CD", "ISU_ABBRV", "LIST_DD", "CATEGORY"])
-
-                        df = pd.concat([df_etf, df_etn, df_elw], ignore_index=True)
-
-                        # 영문 컬럼명 사용 (인코딩 문제 해결)
-                        df.columns = ["isin", "ticker", "name", "list_date", "market"]
-                        df = df.replace('/', '', regex=True)
-
-                        if not df.empty:
-                            return df.set_index('ticker')
-                        return pd.DataFrame()
-
-                    except Exception as e:
-                        print(f"⚠️ PatchedEtxTicker 초기화 에러: {e}")
-                        return pd.DataFrame()
-
-                @property
-                def df(self):
-                    if self._df is None:
-                        self._df = self._get_tickers_safe()
-                    return self._df
-
-                def get_ticker(self, market, date) -> list:
-                    if self._df is None or self._df.empty:
-                        return []
-                    if market == "ALL":
-                        return self._df.index.to_list()
-                    # 영문 컬럼명 사용
-                    cond1 = self._df['market'] == market
-                    cond2 = self._df['list_date'] <= date
-                    return self._df[cond1 & cond2].index.to_list()
-
-                def get_name(self, ticker) -> str:
-                    if self._df is None or self._df.empty:
-                        return ticker
-                    try:
-                        return self._df.loc[ticker, 'name']
-                    except:
-                        return ticker
-
-                def get_market(self, ticker) -> str:
-                    if self._df is None or self._df.empty:
-                        return "UNKNOWN"
-                    try:
-                        return self._df.loc[ticker, 'market']
-                    except:
-                        return "UNKNOWN"
-
-            # 모듈의 EtxTicker를 패치된 버전으로 교체
-            etx_ticker.EtxTicker = PatchedEtxTicker
+        from pykrx.website.krx.etx import wrap as etx_wrap
+
+        class PatchedEtxTicker:
+            """인코딩 문제가 해결된 EtxTicker (etx_master 위임, 첫 사용 시 로드)"""
+
+            _instance = None
+            _df = None
+            _df_version = -1
+
+            def __new__(cls):
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                return cls._instance
+
+            @property
+            def df(self):
+                """pykrx 호환 DataFrame (마스터가 바뀔 때만 재생성)"""
+                cls = type(self)
+                if cls._df is None or cls._df_version != etx_master.version:
+                    cls._df = etx_master.to_frame()
+                    cls._df_version = etx_master.version
+                return cls._df
+
+            def get_ticker(self, market, date) -> list:
+                return etx_master.get_ticker(market, date)
+
+            def get_name(self, ticker) -> str:
+                return etx_master.get_name(ticker)
+
+            def get_market(self, ticker) -> str:
+                return etx_master.get_market(ticker)
+
+        # 모듈의 EtxTicker를 패치된 버전으로 교체
+        etx_ticker.EtxTicker = PatchedEtxTicker
+
+        # 한글 컬럼으로 df.loc을 조회하는 모듈 함수 교체 (wrap은 이름으로 import하므로 함께 교체)
+        replacements = {
+            "get_etx_name": etx_master.get_name,
+            "get_etx_isin": etx_master.get_isin,
+            "is_etf": lambda ticker: etx_master.get_market(ticker) == "ETF",
+            "is_etn": lambda ticker: etx_master.get_market(ticker) == "ETN",
+            "is_elw": lambda ticker: etx_master.get_market(ticker) == "ELW",
+        }
+        for module in (etx_ticker, etx_wrap):
+            for name, func in replacements.items():
+                if hasattr(module, name):
+                    setattr(module, name, func)
 
-            # 싱글톤 캐시 클리어 (데코레이터 관련)
-            if hasattr(etx_ticker, '_singleton_instances'):
-                etx_ticker._singleton_instances = {}
+        # 싱글톤 캐시 클리어 (데코레이터 관련)
+        if hasattr(etx_ticker, '_singleton_instances'):
+            etx_ticker._singleton_instances = {}
 
-            print("✅ pykrx EtxTicker 인코딩 패치 완료")
-            return True
+        print("✅ pykrx EtxTicker 인코딩 패치 완료")
+        return True
 
     except Exception as e:
         print(f"⚠️ pykrx EtxTicker 패치 실패: {e}")
@@ -330,7 +174,7 @@ def get_krx_etf_list_direct(date: str = None) -> List[Dict]:
     }
 
     try:
-        response = requests.post(url, data=params, headers=headers, timeout=30)
+        response = krx_transport.post(url, data=params, headers=headers)
         response.encoding = 'utf-8'
         data = response.json()
 
@@ -383,7 +227,7 @@ def get_krx_etn_list_direct(date: str = None) -> List[Dict]:
     }
 
     try:
-        response = requests.post(url, data=params, headers=headers, timeout=30)
+        response = krx_transport.post(url, data=params, headers=headers)
         response.encoding = 'utf-8'
         data = response.json()
 
@@ -434,7 +278,7 @@ def get_krx_elw_list_direct(date: str = None) -> List[Dict]:
     }
 
     try:
-        response = requests.post(url, data=params, headers=headers, timeout=30)
+        response = krx_transport.post(url, data=params, headers=headers)
         response.encoding = 'utf-8'
         data = response.json()
 
@@ -604,6 +448,7 @@ def get_etf_list_safe(date: str, limit: int = 30):
     pykrx core 함수를 직접 호출하여 인코딩 문제 완전 우회
     """
     try:
+        stock.load()
         from pykrx.website.krx.etx.core import ETF_전종목기본종목
 
         # 직접 fetch 호출 (쿠키가 주입된 세션 사용)
@@ -627,17 +472,82 @@ def get_etf_list_safe(date: str, limit: int = 30):
         return pd.DataFrame()
 
 
+def _all_stock_prices_key(date: str, mktid: str) -> tuple:
+    return ("전종목시세", "snapshot", date, mktid)
+
+
+def get_all_stock_prices_snapshot(date: str, mktid: str = "STK") -> Optional[MarketSnapshot]:
+    """
+    전종목시세 스냅샷 조회 (공용 캐시 사용)
+
+    pykrx core 전종목시세().fetch 결과를 타입 변환하여 MarketSnapshot(압축 배열)으로 보관하고,
+    적재 시 숫자 열별 순위 인덱스를 계산해 둔다 (시가총액/거래대금 상위 N은 정렬 없이 슬라이스).
+    """
+    stock.load()
+    from pykrx.website.krx.market.core import 전종목시세
+
+    def fetch():
+        raw = 전종목시세().fetch(date, mktid)
+        if raw is None or raw.empty:
+            return None
+        snapshot = MarketSnapshot.from_frame(decode_table(raw, "전종목시세"), current_pool())
+        snapshot.index_rankings()
+        return snapshot
+
+    ttl = ttl_for_date(date, KRXSession.PUBLICATION_TIMES["전종목시세"])
+    return _with_rankings(data_cache.get_or_fetch(_all_stock_prices_key(date, mktid), fetch, ttl=ttl))
+
+
+def _with_rankings(snapshot: Optional[MarketSnapshot]) -> Optional[MarketSnapshot]:
+    # 순위 인덱스 도입 전에 공유 캐시(L2)에 저장된 스냅샷 대비
+    if snapshot is not None and snapshot.rankings is None:
+        snapshot.index_rankings()
+    return snapshot
+
+
+def fetch_all_stock_prices(date: str, mktid: str = "STK") -> pd.DataFrame:
+    """
+    전종목시세 조회 (공용 캐시 사용)
+
+    타입 변환된 DataFrame 반환 (영문 컬럼명, 숫자 열은 정수/실수, 종목명/코드는 category)
+    """
+    snapshot = get_all_stock_prices_snapshot(date, mktid)
+    return snapshot.to_frame() if snapshot is not None else pd.DataFrame()
+
+
+def get_index_ticker_list_cached(date: str, market: str = "KOSPI") -> list:
+    """지수 목록 조회 (공용 캐시 사용)"""
+    ttl = ttl_for_date(date, KRXSession.PUBLICATION_TIMES["지수_전체"])
+    return data_cache.get_or_fetch(
+        ("index_ticker_list", date, market),
+        lambda: stock.get_index_ticker_list(date, market=market),
+        ttl=ttl,
+    )
+
+
+# 전종목시세 → 시가총액 응답 컬럼 (영문 컬럼명만 사용하여 한글 인코딩 문제 회피)
+MARKET_CAP_SCHEMA = [
+    ("ISU_SRT_CD", "티커", "str"),
+    ("ISU_ABBRV", "종목명", "str"),
+    ("TDD_CLSPRC", "종가", "int"),
+    ("MKTCAP", "시가총액", "int"),
+    ("ACC_TRDVOL", "거래량", "int"),
+    ("ACC_TRDVAL", "거래대금", "int"),
+    ("LIST_SHRS", "상장주식수", "int"),
+]
+
+
 def get_market_cap_safe(date: str, market: str = "KOSPI", limit: int = 20):
     """
     시가총액 데이터를 안전하게 조회
     pykrx core 함수를 직접 호출하여 한글 인코딩 문제 완전 우회
 
-    영문 컬럼명 사용: ISU_SRT_CD, TDD_CLSPRC, MKTCAP, ACC_TRDVOL, ACC_TRDVAL, LIST_SHRS
+    영문 컬럼명 사용: ISU_SRT_CD, ISU_ABBRV, TDD_CLSPRC, MKTCAP, ACC_TRDVOL, ACC_TRDVAL, LIST_SHRS
+    숫자 열은 krx_decode로 열 단위 변환, 종목명은 같은 응답의 ISU_ABBRV 사용
+    (없으면 상위 N개에 대해서만 티커 → 종목명 join)
+    상위 N개는 스냅샷 적재 시 계산한 시가총액 순서에서 잘라 사용 (요청 시 정렬 없음)
     """
     try:
-        from pykrx.website.krx.market.core import 전종목시세
-        import numpy as np
-
         # 시장 코드 매핑
         market2mktid = {
             "ALL": "ALL",
@@ -648,65 +558,34 @@ def get_market_cap_safe(date: str, market: str = "KOSPI", limit: int = 20):
 
         mktid = market2mktid.get(market, "STK")
 
-        # pykrx core에서 직접 fetch (영문 컬럼명 반환)
-        df = 전종목시세().fetch(date, mktid)
-        print(f"[get_market_cap_safe] fetch 결과: {type(df)}, empty={df is None or (hasattr(df, 'empty') and df.empty)}")
+        # pykrx core에서 직접 fetch (영문 컬럼명, 순위 인덱스 포함 스냅샷)
+        snapshot = get_all_stock_prices_snapshot(date, mktid)
 
-        if df is None or df.empty:
+        if snapshot is None or not len(snapshot):
             print(f"⚠️ 전종목시세 fetch 결과 없음: date={date}, market={market}")
             return pd.DataFrame()
 
-        print(f"[get_market_cap_safe] 컬럼: {list(df.columns)}")
-        print(f"[get_market_cap_safe] MKTCAP 샘플: {df['MKTCAP'].head(3).tolist()}")
-
-        # 시가총액이 '-'인 경우 (장 시작 전) 빈 DataFrame 반환 → fallback 트리거
-        if len(df) > 0 and df['MKTCAP'].iloc[0] == '-':
+        # 시가총액이 '-'인 경우 (장 시작 전, 디코딩 후 NaN) 빈 DataFrame 반환 → fallback 트리거
+        if not (snapshot.columns['MKTCAP'] > 0).any():
             print(f"[get_market_cap_safe] MKTCAP이 '-' (장 시작 전) → fallback 필요")
             return pd.DataFrame()
 
-        # 영문 컬럼명만 사용하여 한글 인코딩 문제 완전 회피
-        required_cols = ['ISU_SRT_CD', 'TDD_CLSPRC', 'MKTCAP', 'ACC_TRDVOL', 'ACC_TRDVAL', 'LIST_SHRS']
-
-        # 필요한 컬럼만 추출
-        df = df[required_cols].copy()
-
-        # 한글 컬럼명으로 변환 (Python 코드 내에서 직접 설정)
-        df.columns = ['티커', '종가', '시가총액', '거래량', '거래대금', '상장주식수']
-
-        # 데이터 정제
-        df = df.replace(r'\W', '', regex=True)
-        df = df.replace('', 0)
-
-        # 숫자 컬럼 변환
-        for col in ['종가', '시가총액', '거래량', '거래대금', '상장주식수']:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(np.int64)
-
-        # 시가총액 기준 내림차순 정렬
-        df = df.sort_values('시가총액', ascending=False)
-
-        # 상위 N개만 선택
-        df = df.head(limit)
+        # 시가총액 기준 상위 N개 (적재 시 계산한 순서 슬라이스)
+        rows = snapshot.rankings.top('MKTCAP', limit)
+        has_names = 'ISU_ABBRV' in snapshot.columns
+        schema = MARKET_CAP_SCHEMA if has_names else [f for f in MARKET_CAP_SCHEMA if f[0] != 'ISU_ABBRV']
+        result = decode_frame(snapshot.to_frame([f[0] for f in schema if f[0] in snapshot.columns], rows=rows), schema)
 
-        # 종목명 추가
-        results = []
-        for _, row in df.iterrows():
-            ticker = row['티커']
-            try:
-                name = stock.get_market_ticker_name(ticker)
-            except:
-                name = ticker
-
-            results.append({
-                "티커": ticker,
-                "종목명": name,
-                "종가": int(row['종가']),
-                "시가총액": int(row['시가총액']),
-                "거래량": int(row['거래량']),
-                "거래대금": int(row['거래대금']),
-                "상장주식수": int(row['상장주식수'])
-            })
+        if not has_names:
+            names = {}
+            for ticker in result['티커']:
+                try:
+                    names[ticker] = stock.get_market_ticker_name(ticker)
+                except Exception:
+                    pass
+            result = attach_names(result, names)
 
-        return pd.DataFrame(results)
+        return result
 
     except Exception as e:
         print(f"⚠️ get_market_cap_safe 에러: {e}")
@@ -721,6 +600,7 @@ def get_etn_list_safe(date: str, limit: int = 30):
     pykrx core 함수를 직접 호출하여 인코딩 문제 완전 우회
     """
     try:
+        stock.load()
         from pykrx.website.krx.etx.core import ETN_전종목기본종목
 
         # 직접 fetch 호출 (쿠키가 주입된 세션 사용)
@@ -750,6 +630,7 @@ def get_elw_list_safe(date: str, limit: int = 30):
     pykrx core 함수를 직접 호출하여 인코딩 문제 완전 우회
     """
     try:
+        stock.load()
         from pykrx.website.krx.etx.core import ELW_전종목기본종목
 
         # 직접 fetch 호출 (쿠키가 주입된 세션 사용)
@@ -822,32 +703,94 @@ def get_fundamental_safe(date: str, market: str = "KOSPI", limit: int = 20):
 
 _is_logged_in = False
 _login_error: Optional[str] = None
-_krx_session: Optional[KRXSession] = None
+_krx_session: Optional[KRXDataClient] = None  # KRXSession 또는 KRXSessionPool
+_prewarm_scheduler: Optional[PrewarmScheduler] = None
+
+PREWARM_MARKETS = ("STK", "KSQ")  # KOSPI, KOSDAQ
+
+
+# ============================================================================
+# 장 마감 후 사전 로딩 (prewarm)
+# ============================================================================
+
+def _prewarm_session_dataset(getter_name: str) -> Callable[[str], bool]:
+    """로그인 세션 데이터셋 사전 로딩 함수 (get_market_data 캐시에 적재됨)"""
+    def fetch(date: str) -> bool:
+        if not _is_logged_in or not _krx_session:
+            return False
+        getter = getattr(_krx_session, getter_name)
+        return all(_has_outblock(getter(date, market=m)) for m in PREWARM_MARKETS)
+    return fetch
+
+
+def _has_outblock(data: Optional[dict]) -> bool:
+    return bool(data) and bool(data.get('output', data.get('OutBlock_1')))
+
+
+def _prewarm_all_stock_prices(date: str) -> bool:
+    for mktid in PREWARM_MARKETS:
+        df = fetch_all_stock_prices(date, mktid)
+        # 장 시작 전/공표 전에는 MKTCAP이 '-'로 내려옴 (디코딩 후 NaN)
+        if df is None or df.empty or not (df['MKTCAP'] > 0).any():
+            data_cache.invalidate(_all_stock_prices_key(date, mktid))
+            return False
+    return True
+
+
+def _prewarm_index_lists(date: str) -> bool:
+    return all(len(get_index_ticker_list_cached(date, market=m) or []) > 0 for m in ("KOSPI", "KOSDAQ"))
+
+
+def build_prewarm_jobs() -> List[PrewarmJob]:
+    """KRX 공표 시각 기준 사전 로딩 작업 목록"""
+    times = KRXSession.PUBLICATION_TIMES
+    return [
+        PrewarmJob("전종목시세", times["전종목시세"], _prewarm_all_stock_prices),
+        PrewarmJob("지수_전체", times["지수_전체"], _prewarm_index_lists),
+        PrewarmJob("투자자별_거래실적", times["투자자별_거래실적"], _prewarm_session_dataset("get_investor_trading")),
+        PrewarmJob("PER_PBR_배당수익률", times["PER_PBR_배당수익률"], _prewarm_session_dataset("get_per_pbr_div")),
+        PrewarmJob("외국인보유량", times["외국인보유량"], _prewarm_session_dataset("get_foreign_holding")),
+    ]
+
 
 # ============================================================================
 # 서버 시작/종료 라이프사이클
 # ============================================================================
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """서버 시작 시 KRX 로그인 및 pykrx 패치"""
+# KRX_FAST_STARTUP=1: 포트를 먼저 바인딩하고 로그인/패치/마스터 로드는 백그라운드에서 수행
+FAST_STARTUP = os.getenv("KRX_FAST_STARTUP", "0") == "1"
+_startup: Optional[StartupTasks] = None
+
+
+def _on_login_ready():
+    """리더 대기 시간이 지난 팔로워 워커가 나중에 로그인 쿠키를 받았을 때 로그인 상태로 전환"""
+    global _is_logged_in, _login_error, _krx_session
+    _krx_session = get_session()
+    _is_logged_in = True
+    _login_error = None
+
+
+def _startup_login() -> bool:
+    """KRX 로그인 및 pykrx 패치 (KRX_ACCOUNTS="id1:pw1,id2:pw2" 이면 다중 계정 세션 풀)"""
     global _is_logged_in, _login_error, _krx_session
 
     # 환경변수 또는 기본값에서 자격증명 로드
     user_id = os.getenv("KRX_USER_ID", "goguma")
     password = os.getenv("KRX_PASSWORD", "wjdqh12!@")
-
-    print("=" * 60)
-    print("🚀 PyKRX API Server 시작")
-    print("=" * 60)
+    accounts = parse_accounts()
 
     try:
-        print(f"🔐 KRX 로그인 시도: {user_id}")
-        success = login_and_patch(user_id, password)
+        if accounts:
+            print(f"🔐 KRX 세션 풀 로그인 시도: {', '.join(a[0] for a in accounts)}")
+            success = login_pool_and_patch(accounts, on_ready=_on_login_ready)
+        else:
+            print(f"🔐 KRX 로그인 시도: {user_id}")
+            success = login_and_patch(user_id, password, on_ready=_on_login_ready)
 
         if success:
-            _is_logged_in = True
             _krx_session = get_session()
+            _is_logged_in = True
+            _login_error = None
             print("✅ KRX 로그인 성공! 모든 API 사용 가능")
         else:
             _login_error = "로그인 실패"
@@ -855,18 +798,56 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         _login_error = str(e)
         print(f"⚠️ KRX 로그인 오류: {e}")
+    return _is_logged_in
+
+
+def _startup_etx_master() -> bool:
+    """ETF/ETN/ELW 마스터 미리 로드 (빠른 시작 모드에서만, 첫 요청의 콜드 조회 방지)"""
+    return etx_master.load() > 0
+
 
-    # 쿠키 주입은 이미 파일 로드 시 _inject_cookies_before_pykrx_import()에서 완료됨
-    # (pykrx import 전에 패치해야 하므로)
+def _start_prewarm():
+    """장 마감 후 데이터 사전 로딩 (KRX_PREWARM=0 으로 비활성화, 이벤트 루프에서 호출)"""
+    global _prewarm_scheduler
+    if os.getenv("KRX_PREWARM", "1") != "0":
+        _prewarm_scheduler = PrewarmScheduler(build_prewarm_jobs())
+        _prewarm_scheduler.start()
 
-    # pykrx ETX 인코딩 패치 (ETF/ETN/ELW)
-    patch_pykrx_etx_ticker()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """서버 시작 시 KRX 로그인 및 pykrx 패치 (빠른 시작 모드면 백그라운드)"""
+    global _startup
+
+    print("=" * 60)
+    print("🚀 PyKRX API Server 시작" + (" (빠른 시작)" if FAST_STARTUP else ""))
+    print("=" * 60)
+
+    steps = [
+        ("pykrx", stock.load),
+        ("login", _startup_login),
+        # pykrx ETX 인코딩 패치 (ETF/ETN/ELW)
+        ("etx_patch", patch_pykrx_etx_ticker),
+    ]
+    if FAST_STARTUP:
+        loop = asyncio.get_running_loop()
+        steps.append(("etx_master", _startup_etx_master))
+        _startup = StartupTasks(steps, on_done=lambda: loop.call_soon_threadsafe(_start_prewarm))
+        _startup.start()
+    else:
+        _startup = StartupTasks(steps)
+        _startup.run()
+        _start_prewarm()
 
     print("=" * 60)
 
     yield  # 서버 실행
 
     # 서버 종료 시 정리
+    _startup.cancel()
+    if _prewarm_scheduler:
+        await _prewarm_scheduler.stop()
+    stop_refresher()
     print("🛑 PyKRX API Server 종료")
 
 
@@ -874,14 +855,15 @@ async def lifespan(app: FastAPI):
 class UnicodeJSONResponse(JSONResponse):
     """ensure_ascii=False로 한글을 올바르게 인코딩하는 JSON 응답"""
     def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-            default=str  # datetime 등 직렬화 불가 객체 처리
-        ).encode("utf-8")
+        with tracing.span("serialize"):
+            return json.dumps(
+                content,
+                ensure_ascii=False,
+                allow_nan=False,
+                indent=None,
+                separators=(",", ":"),
+                default=str  # datetime 등 직렬화 불가 객체 처리
+            ).encode("utf-8")
 
 
 app = FastAPI(
@@ -901,6 +883,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    요청 단위 trace (KRX_TRACE_EXPORT 설정 또는 KRX_TRACE_DEBUG=1 + X-Debug-Trace: 1 헤더)
+
+    디버그 헤더가 있으면 JSON 응답 본문에 "_trace"(OTLP/JSON)를 포함한다.
+    """
+    debug = tracing.DEBUG_ENABLED and request.headers.get(tracing.DEBUG_HEADER) == "1"
+    enabled, export = tracing.should_trace(debug)
+    if not enabled:
+        return await call_next(request)
+
+    with tracing.request_trace(f"{request.method} {request.url.path}", export,
+                               **{"http.method": request.method, "http.target": request.url.path}) as (trace, root):
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            root.name = f"{request.method} {route.path}"
+        root.set(**{"http.status_code": response.status_code})
+    response.headers["X-Trace-Id"] = trace.trace_id
+
+    if not debug or not response.headers.get("content-type", "").startswith("application/json"):
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    try:
+        content = json.loads(body)
+    except ValueError:
+        content = None
+    if not isinstance(content, dict):
+        return Response(content=body, status_code=response.status_code,
+                        headers=dict(response.headers), media_type=response.media_type)
+    content["_trace"] = trace.to_otlp()
+    traced = UnicodeJSONResponse(content, status_code=response.status_code)
+    # 핸들러/안쪽 미들웨어가 설정한 헤더(CORS, Cache-Control, X-Trace-Id 등) 유지, 본문 길이/타입만 새로 계산
+    body_headers = (b"content-length", b"content-type")
+    traced.raw_headers = ([h for h in response.headers.raw if h[0].lower() not in body_headers]
+                          + [h for h in traced.raw_headers if h[0] in body_headers])
+    return traced
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """엔드포인트별 응답 시간 / 처리 중 요청 수 기록"""
+    start = time.perf_counter()
+    status = 500
+    metrics.HTTP_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.HTTP_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        metrics.HTTP_LATENCY.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+
 # ============================================================================
 # 주요 종목 목록
 # ============================================================================
@@ -947,22 +990,73 @@ def get_market_name(market: str) -> str:
     return {"KOSPI": "코스피", "KOSDAQ": "코스닥", "KONEX": "코넥스"}.get(market, market)
 
 
-def _safe_float(value) -> Optional[float]:
-    """안전한 float 변환 (None, 빈 문자열, 잘못된 값 처리)"""
-    if value is None:
-        return None
-    if isinstance(value, (int, float)):
-        return float(value) if value != 0 else None
-    if isinstance(value, str):
-        value = value.strip().replace(',', '')
-        if not value or value == '-':
-            return None
-        try:
-            result = float(value)
-            return result if result != 0 else None
-        except ValueError:
+# 순위 기본 지표 (BLD 이름 → KRX 필드, 없으면 거래대금/금액 계열 첫 숫자 열)
+RANK_DEFAULT_METRICS = {
+    "전종목시세": "MKTCAP",
+    "외국인보유량": "FORN_SHR_RT",
+    "공매도_거래_종목별": "CVSRTSELL_TRDVAL",
+    "공매도_잔고_종목별": "BAL_AMT",
+}
+
+
+def get_ranked_block(getter_name: str, bld_name: str, date: str, mkt_code: str) -> Optional[MarketSnapshot]:
+    """
+    KRXSession.get_* 응답 → 순위 인덱스 포함 스냅샷 (공용 캐시 사용)
+
+    적재 시 한 번 디코딩/정렬해 두고, 요청은 상위 N 슬라이스와 순위 조회만 수행한다.
+    """
+    def build():
+        df = decode_block(getattr(_krx_session, getter_name)(date, market=mkt_code), bld_name)
+        if df.empty:
             return None
-    return None
+        snapshot = MarketSnapshot.from_frame(df, current_pool())
+        snapshot.index_rankings()
+        return snapshot
+
+    ttl = ttl_for_date(date, KRXSession.PUBLICATION_TIMES.get(bld_name))
+    return _with_rankings(data_cache.get_or_fetch(("ranked", bld_name, date, mkt_code), build, ttl=ttl))
+
+
+def resolve_rank_metric(snapshot: MarketSnapshot, bld_name: str, sort_by: Optional[str] = None) -> str:
+    """정렬 지표 결정 (지정값 → BLD 기본값 → 금액 계열 → 첫 숫자 열), 없는 지표면 ValueError"""
+    metrics = list(snapshot.rankings.orders)
+    if sort_by:
+        for metric in metrics:
+            if metric.upper() == sort_by.upper():
+                return metric
+        raise ValueError(f"정렬 지표 {sort_by} 없음 (사용 가능: {', '.join(metrics)})")
+    preferred = RANK_DEFAULT_METRICS.get(bld_name)
+    if preferred in snapshot.rankings:
+        return preferred
+    for metric in metrics:
+        if metric.endswith(("_AMT", "TRDVAL")):
+            return metric
+    if not metrics:
+        raise ValueError("정렬 가능한 숫자 필드 없음")
+    return metrics[0]
+
+
+def ranked_records(snapshot: Optional[MarketSnapshot], bld_name: str, top_n: int,
+                   sort_by: Optional[str] = None, ascending: bool = False) -> Tuple[Optional[str], list]:
+    """상위 N개 행 (metric 순) → (지표, JSON 행 목록)"""
+    if snapshot is None:
+        return None, []
+    try:
+        metric = resolve_rank_metric(snapshot, bld_name, sort_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = snapshot.rankings.top(metric, top_n, ascending=ascending)
+    return metric, to_records(snapshot.to_frame(rows=rows))
+
+
+def _fundamental_by_ticker(data: dict) -> pd.DataFrame:
+    """PER_PBR_배당수익률 응답 → 티커 인덱스 DataFrame (PER, PBR, DIV, EPS, BPS / 0·결측 → NaN)"""
+    df = decode_block(data, "PER_PBR_배당수익률")
+    if df.empty or 'ISU_SRT_CD' not in df.columns:
+        return pd.DataFrame()
+    fund = df.set_index('ISU_SRT_CD')[['PER', 'PBR', 'DVD_YLD', 'EPS', 'BPS']].rename(columns={'DVD_YLD': 'DIV'})
+    fund = fund[fund.index != '']
+    return fund.mask(fund == 0)
 
 
 def find_valid_trading_date(ticker: str = "005930", max_days: int = 14) -> Optional[str]:
@@ -1005,14 +1099,28 @@ def root():
 
 @app.get("/api/status")
 def get_status():
-    """상세 상태 확인"""
+    """상세 상태 확인 (startup.ready: 로그인/패치/마스터 로드 완료 여부)"""
     return {
         "server": "running",
+        "ready": _startup.ready if _startup else False,
+        "startup": _startup.status() if _startup else None,
         "krx_login": {
             "logged_in": _is_logged_in,
             "error": _login_error,
-            "session_valid": _krx_session.logged_in if _krx_session else False
+            "session_valid": _krx_session.logged_in if _krx_session else False,
+            "expires_at": _krx_session.expires_at.isoformat(timespec="seconds")
+            if _krx_session and _krx_session.expires_at else None,
+            "refresher": get_refresher().status() if get_refresher() else None,
+            "pool": _krx_session.status() if isinstance(_krx_session, KRXSessionPool) else None,
+            "leader": get_coordinator().status() if get_coordinator() else None
         },
+        "cache": data_cache.stats(),
+        "string_pool": pool_status(),
+        "rate_limit": krx_limiter.status(),
+        "transport": krx_transport.transport_stats.snapshot(),
+        "prewarm": _prewarm_scheduler.status() if _prewarm_scheduler else None,
+        "etx_master": etx_master.status(),
+        "profiler": profiler.status(),
         "available_endpoints": [
             "/api/stocks/list",
             "/api/stocks/ohlcv",
@@ -1026,6 +1134,59 @@ def get_status():
     }
 
 
+@metrics.register_collector
+def _collect_runtime_metrics():
+    """캐시/속도 제한기/세션 상태 (수집 시점 값)"""
+    cache = data_cache.stats()
+    yield ("krx_cache_hits", "counter", "공용 캐시 hit 수", [({}, cache["hits"])])
+    yield ("krx_cache_misses", "counter", "공용 캐시 miss 수", [({}, cache["misses"])])
+    yield ("krx_cache_hit_ratio", "gauge", "공용 캐시 hit 비율", [({}, cache["hit_ratio"])])
+    yield ("krx_cache_entries", "gauge", "프로세스 캐시 항목 수", [({}, cache["entries"])])
+    if cache["shared"]:
+        yield ("krx_cache_shared_hits", "counter", "워커 공유 캐시(L2) hit 수", [({}, cache["shared"]["hits"])])
+        yield ("krx_cache_shared_errors", "counter", "워커 공유 캐시(L2) 오류 수", [({}, cache["shared"]["errors"])])
+
+    limiter = krx_limiter.status()
+    yield ("krx_rate_limit_rps", "gauge", "현재 KRX 허용 초당 요청 수", [({}, limiter["rate"])])
+    yield ("krx_rate_limit_throttled", "counter", "KRX 차단/과부하 응답 수", [({}, limiter["throttled"])])
+    yield ("krx_rate_limit_wait_seconds", "counter", "속도 제한 대기 누적 시간", [({}, limiter["waited_sec"])])
+
+    yield ("krx_session_logged_in", "gauge", "KRX 로그인 세션 사용 가능 여부",
+           [({}, 1 if _krx_session and _krx_session.logged_in else 0)])
+    if isinstance(_krx_session, KRXSessionPool):
+        pool = _krx_session.status()
+        yield ("krx_session_pool_healthy", "gauge", "세션 풀 정상 세션 수", [({}, pool["healthy"])])
+        yield ("krx_session_pool_outstanding", "gauge", "세션별 처리 중 요청 수",
+               [({"user_id": m["user_id"]}, m["outstanding"]) for m in pool["members"]])
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus 메트릭 (text exposition 0.0.4)"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/api/admin/profile")
+async def run_profiler(
+    seconds: float = Query(10, gt=0, le=profiler.MAX_SECONDS, description="샘플링 시간 (초)"),
+    interval_ms: float = Query(10, ge=profiler.MIN_INTERVAL * 1000, le=1000, description="샘플 간격 (ms)"),
+    idle: bool = Query(False, description="대기 중인 스레드 포함 여부")
+):
+    """
+    실행 중인 프로세스 샘플링 프로파일 (collapsed stack, flamegraph.pl/speedscope 입력)
+
+    KRX_PROFILER=1 일 때만 사용 가능, 동시에 하나만 실행
+    """
+    if not profiler.ENABLED:
+        raise HTTPException(status_code=403, detail="프로파일러 비활성화 상태 (KRX_PROFILER=1 필요)")
+    try:
+        text = await asyncio.to_thread(profiler.profile, seconds, interval_ms / 1000, idle)
+    except profiler.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return Response(content=text, media_type="text/plain; charset=utf-8",
+                    headers={"Content-Disposition": f"attachment; filename=profile-{os.getpid()}.collapsed"})
+
+
 @app.post("/api/login")
 def manual_login(
     user_id: str = Query(..., description="KRX 아이디"),
@@ -1035,7 +1196,7 @@ def manual_login(
     global _is_logged_in, _login_error, _krx_session
 
     try:
-        success = login_and_patch(user_id, password, force=True)
+        success = login_and_patch(user_id, password, force=True, on_ready=_on_login_ready)
         if success:
             _is_logged_in = True
             _krx_session = get_session()
@@ -1113,6 +1274,473 @@ def get_ohlcv(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ----------------------------------------------------------------------------
+# 다종목/다기간 OHLCV 배치 조회
+# ----------------------------------------------------------------------------
+
+OHLCV_BATCH_MAX_TICKERS = 3000
+# 조회 기간 상한 (일, period와 start~end 모두 적용)
+OHLCV_BATCH_MAX_DAYS = 3650
+# 스냅샷 방식 최대 영업일 수 (L1 캐시 절반, 초과하면 auto는 종목별 조회로 전환)
+OHLCV_BATCH_MAX_SNAPSHOTS = data_cache.max_entries // 2
+OHLCV_LONG_COLUMNS = ["날짜", "티커", "시가", "고가", "저가", "종가", "거래량", "거래대금", "등락률"]
+
+# 전종목 스냅샷 1회 조회 비용 (종목별 기간 조회 1회 = 1.0 기준, 응답 크기 반영)
+SNAPSHOT_FETCH_COST = 1.5
+
+
+def plan_ohlcv_fetches(tickers: List[str], start: str, end: str, strategy: str = "auto") -> dict:
+    """
+    최소 upstream 호출 계획 수립
+
+    - snapshot: 영업일마다 전종목 OHLCV 1회 (get_market_ohlcv(date, market="ALL"))
+    - ticker:   종목마다 기간 OHLCV 1회 (get_market_ohlcv(start, end, ticker))
+
+    영업일이 OHLCV_BATCH_MAX_SNAPSHOTS를 넘으면 auto는 항상 ticker를 선택한다.
+
+    Returns:
+        {"strategy", "dates", "upstream_calls", "alternative_calls"}
+    """
+    dates = [d.strftime("%Y%m%d") for d in pd.bdate_range(
+        datetime.strptime(start, "%Y%m%d"), datetime.strptime(end, "%Y%m%d")
+    )]
+    snapshot_cost = len(dates) * SNAPSHOT_FETCH_COST
+    ticker_cost = len(tickers)
+
+    if strategy == "auto":
+        use_snapshot = snapshot_cost < ticker_cost and len(dates) <= OHLCV_BATCH_MAX_SNAPSHOTS
+        strategy = "snapshot" if use_snapshot else "ticker"
+
+    calls = {"snapshot": len(dates), "ticker": len(tickers)}
+    return {
+        "strategy": strategy,
+        "dates": dates,
+        "upstream_calls": calls[strategy],
+        "alternative_calls": calls["ticker" if strategy == "snapshot" else "snapshot"],
+    }
+
+
+def fetch_ohlcv_long(tickers: List[str], start: str, end: str, plan: dict,
+                     ctx: Optional[IntentContext] = None, max_workers: int = 4) -> pd.DataFrame:
+    """계획에 따라 OHLCV 조회 후 long-format(날짜, 티커, ...) DataFrame으로 병합"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    ctx = ctx or IntentContext()
+    frames = []
+
+    if plan["strategy"] == "snapshot":
+        wanted = set(tickers)
+
+        def fetch_day(date):
+            df = ctx.fetch(stock.get_market_ohlcv, date, market="ALL")
+            if df is None or df.empty:
+                return None  # 휴장일
+            df = df[df.index.isin(wanted)].reset_index()
+            df.insert(0, "날짜", pd.Timestamp(date))
+            return df
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            frames = [f for f in pool.map(tracing.wrap_context(fetch_day), plan["dates"]) if f is not None]
+    else:
+        def fetch_ticker(ticker):
+            df = ctx.fetch(stock.get_market_ohlcv, start, end, ticker)
+            if df is None or df.empty:
+                return None
+            df = df.reset_index()
+            df.insert(1, "티커", ticker)
+            return df
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            frames = [f for f in pool.map(tracing.wrap_context(fetch_ticker), tickers) if f is not None]
+
+    if not frames:
+        return pd.DataFrame(columns=OHLCV_LONG_COLUMNS)
+
+    df = pd.concat(frames, ignore_index=True)
+    df.columns = ["날짜", "티커"] + list(df.columns[2:])
+    cols = [c for c in OHLCV_LONG_COLUMNS if c in df.columns]
+    return df[cols].sort_values(["날짜", "티커"], ignore_index=True)
+
+
+class OhlcvBatchRequest(BaseModel):
+    """POST /api/stocks/ohlcv/batch 요청 본문 (타입 오류는 422, 날짜/기간 오류는 400)"""
+    tickers: List[Union[str, int]] = Field(..., description="종목코드 목록")
+    start: Optional[str] = Field(None, description="시작일 (YYYYMMDD)")
+    end: Optional[str] = Field(None, description="종료일 (YYYYMMDD, 기본: 오늘)")
+    period: int = Field(30, ge=1, le=OHLCV_BATCH_MAX_DAYS, description="start 미입력 시 end 이전 기간 (일)")
+    strategy: Literal["auto", "snapshot", "ticker"] = "auto"
+
+
+def _parse_date(value: str, name: str) -> datetime:
+    """YYYYMMDD 문자열 → datetime (형식 오류는 400)"""
+    try:
+        if len(value) != 8 or not value.isdigit():
+            raise ValueError(value)
+        return datetime.strptime(value, "%Y%m%d")
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"{name}는 YYYYMMDD 형식이어야 함: {value!r}")
+
+
+@app.post("/api/stocks/ohlcv/batch")
+def get_ohlcv_batch(request: OhlcvBatchRequest):
+    """
+    여러 종목 × 기간 OHLCV 일괄 조회
+
+    종목 수와 영업일 수를 비교하여 upstream 호출이 적은 방식을 선택:
+    종목이 많으면 일자별 전종목 스냅샷, 적으면 종목별 기간 조회.
+
+    Request Body:
+        {"tickers": ["005930", "000660"], "start": "20250101", "end": "20250131",
+         "strategy": "auto"}  // auto | snapshot | ticker, start 생략 시 "period": 30 (일)
+
+    Response (long-format 컬럼 지향):
+        {"count": 42, "columns": ["날짜", "티커", "시가", ...],
+         "data": {"날짜": [...], "티커": [...], "시가": [...], ...},
+         "plan": {"strategy": "ticker", "upstream_calls": 2, "alternative_calls": 23}}
+    """
+    tickers = list(dict.fromkeys(str(t).strip() for t in request.tickers if str(t).strip()))
+    if not tickers:
+        raise HTTPException(status_code=400, detail="tickers 파라미터(list) 필요")
+    if len(tickers) > OHLCV_BATCH_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"tickers는 최대 {OHLCV_BATCH_MAX_TICKERS}개까지 가능")
+
+    end_date = _parse_date(request.end, "end") if request.end else datetime.now()
+    start_date = _parse_date(request.start, "start") if request.start else end_date - timedelta(days=request.period)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start는 end보다 늦을 수 없음")
+    if (end_date - start_date).days > OHLCV_BATCH_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"조회 기간은 최대 {OHLCV_BATCH_MAX_DAYS}일")
+    start, end = start_date.strftime("%Y%m%d"), end_date.strftime("%Y%m%d")
+    strategy = request.strategy
+
+    try:
+        plan = plan_ohlcv_fetches(tickers, start, end, strategy)
+        if plan["strategy"] == "snapshot" and len(plan["dates"]) > OHLCV_BATCH_MAX_SNAPSHOTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"snapshot 방식은 영업일 최대 {OHLCV_BATCH_MAX_SNAPSHOTS}일 (auto 또는 ticker 사용)")
+        df = fetch_ohlcv_long(tickers, start, end, plan)
+
+        df["날짜"] = pd.to_datetime(df["날짜"]).dt.strftime('%Y-%m-%d')
+        df = df.astype(object).where(df.notna(), None)  # NaN → null
+
+        return {
+            "start": start,
+            "end": end,
+            "tickers": len(tickers),
+            "count": len(df),
+            "columns": list(df.columns),
+            "data": {col: df[col].tolist() for col in df.columns},
+            "plan": {k: v for k, v in plan.items() if k != "dates"}
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ----------------------------------------------------------------------------
+# 기술적 지표 (이동평균/RSI/볼린저 밴드/변동성)
+# ----------------------------------------------------------------------------
+
+INDICATOR_MARKETS = {"KOSPI": ("STK",), "KOSDAQ": ("KSQ",), "ALL": ("STK", "KSQ")}
+INDICATOR_MAX_DAYS = 260
+# 시장 전체 패널이 한 번에 읽는 일자별 스냅샷 수 (영업일 × 시장) 상한
+# L1 캐시의 절반 이하로 두어 패널 구성 중 자기 입력 스냅샷을 밀어내지 않게 한다
+INDICATOR_MAX_SNAPSHOTS = data_cache.max_entries // 2
+
+
+def get_trading_dates(end: str, count: int) -> List[str]:
+    """end 이전(포함) 최근 count 영업일 (삼성전자 OHLCV 기준, 공용 캐시 사용)"""
+    def fetch():
+        start = (datetime.strptime(end, "%Y%m%d") - timedelta(days=count * 7 // 5 + 30)).strftime("%Y%m%d")
+        df = stock.get_market_ohlcv(start, end, "005930")
+        if df is None or df.empty:
+            return []
+        return [d.strftime("%Y%m%d") for d in df.index[-count:]]
+
+    ttl = ttl_for_date(end, KRXSession.PUBLICATION_TIMES["전종목시세"])
+    return data_cache.get_or_fetch(("trading_dates", end, count), fetch, ttl=ttl)
+
+
+def get_ohlcv_panel(end: str, days: int, market: str = "KOSPI") -> Optional[OhlcvPanel]:
+    """
+    시장 전체 OHLCV 패널 (최근 days 영업일 × 전 종목, 공용 캐시 사용)
+
+    일자별 전종목시세 스냅샷(캐시 공유)을 모아 구성하므로 종목별 조회가 없다.
+    """
+    def snapshot_of(job):
+        try:
+            snapshot = get_all_stock_prices_snapshot(*job)
+        except Exception as e:
+            print(f"⚠️ [indicators] {job[0]} {job[1]} 전종목시세 조회 실패: {e}")
+            return None
+        # 장 시작 전 스냅샷(시가총액 '-' → NaN)은 제외
+        return snapshot if snapshot is not None and (snapshot.columns["MKTCAP"] > 0).any() else None
+
+    def build():
+        from concurrent.futures import ThreadPoolExecutor
+
+        jobs = [(date, mktid) for date in get_trading_dates(end, days) for mktid in INDICATOR_MARKETS[market]]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            snapshots = list(pool.map(tracing.wrap_context(snapshot_of), jobs))
+        panel = OhlcvPanel.from_snapshots((date, s) for (date, _), s in zip(jobs, snapshots))
+        return panel if panel.shape[1] else None
+
+    ttl = ttl_for_date(end, KRXSession.PUBLICATION_TIMES["전종목시세"])
+    return data_cache.get_or_fetch(("ohlcv_panel", "market", end, days, market), build, ttl=ttl)
+
+
+def get_ticker_ohlcv_panel(end: str, days: int, ticker: str) -> Optional[OhlcvPanel]:
+    """종목 1개 OHLCV 패널 (기간 OHLCV 1회 조회, 공용 캐시 사용)"""
+    def build():
+        start = (datetime.strptime(end, "%Y%m%d") - timedelta(days=days * 7 // 5 + 30)).strftime("%Y%m%d")
+        df = stock.get_market_ohlcv(start, end, ticker)
+        if df is None or df.empty:
+            return None
+        df = df[df["종가"] > 0].tail(days)
+        return OhlcvPanel.from_frame(df, ticker, stock.get_market_ticker_name(ticker))
+
+    ttl = ttl_for_date(end, KRXSession.PUBLICATION_TIMES["전종목시세"])
+    return data_cache.get_or_fetch(("ohlcv_panel", "ticker", end, days, ticker), build, ttl=ttl)
+
+
+def get_indicator(panel: OhlcvPanel, scope: str, end: str, days: int, name: str, window: int) -> Dict[str, np.ndarray]:
+    """지표 계산 결과 캐시 ((종목 또는 시장, 지표, 창) 단위, float32 보관)"""
+    def build():
+        return {k: v.astype(np.float32) for k, v in compute_indicator(panel, name, window).items()}
+
+    ttl = ttl_for_date(end, KRXSession.PUBLICATION_TIMES["전종목시세"])
+    return data_cache.get_or_fetch(("indicator", scope, end, days, name, window), build, ttl=ttl)
+
+
+def _indicator_values(values: np.ndarray) -> list:
+    return [None if v != v else v for v in np.round(values.astype(np.float64), 2).tolist()]
+
+
+@app.get("/api/stocks/indicators")
+def get_stock_indicators(
+    indicators: str = Query("ma20,rsi14", description="지표 목록 (ma, ema, rsi, bollinger, volatility + 창 크기, 예: ma20,rsi14,bb20)"),
+    ticker: Optional[str] = Query(None, description="종목코드 (생략 시 시장 전체 종목의 최신값)"),
+    market: str = Query("KOSPI", description="시장 구분 (ticker 생략 시): KOSPI, KOSDAQ, ALL"),
+    date: Optional[str] = Query(None, description="기준일 (YYYYMMDD, 기본: 오늘)"),
+    days: int = Query(60, ge=2, le=INDICATOR_MAX_DAYS,
+                      description=f"계산 기간 (영업일, 시장 전체는 영업일 × 시장 수 ≤ {INDICATOR_MAX_SNAPSHOTS})")
+):
+    """
+    기술적 지표 조회 (컬럼 지향 응답)
+
+    - ticker 지정: 기간 전체 시계열 {"날짜": [...], "종가": [...], "MA20": [...], ...}
+    - ticker 생략: 시장 전체 종목의 기준일 값 {"티커": [...], "종목명": [...], "종가": [...], "MA20": [...], ...}
+      (일자별 전종목시세 스냅샷으로 패널 구성, 종목별 조회 없음)
+    """
+    try:
+        specs = parse_indicators(indicators)
+    except IndicatorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if days < required_days(specs):
+        raise HTTPException(status_code=400, detail=f"days는 최소 {required_days(specs)} (지표 창 크기 기준)")
+    market = market.upper()
+    if not ticker and market not in INDICATOR_MARKETS:
+        raise HTTPException(status_code=400, detail=f"market은 {', '.join(INDICATOR_MARKETS)} 중 하나")
+    if not ticker and days * len(INDICATOR_MARKETS[market]) > INDICATOR_MAX_SNAPSHOTS:
+        max_days = INDICATOR_MAX_SNAPSHOTS // len(INDICATOR_MARKETS[market])
+        raise HTTPException(status_code=400, detail=f"market={market} 전체 조회는 days 최대 {max_days}")
+
+    end = date or datetime.now().strftime("%Y%m%d")
+    _parse_date(end, "date")
+    try:
+        if ticker:
+            panel = get_ticker_ohlcv_panel(end, days, ticker)
+        else:
+            panel = get_ohlcv_panel(end, days, market)
+        if panel is None:
+            return {"date": None, "ticker": ticker, "market": market, "count": 0, "columns": [], "data": {}}
+
+        scope = ticker or market
+        outputs: Dict[str, np.ndarray] = {}
+        for name, window in specs:
+            outputs.update(get_indicator(panel, scope, end, days, name, window))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    close = panel.fields["종가"]
+    if ticker:
+        data = {"날짜": [f"{d[:4]}-{d[4:6]}-{d[6:]}" for d in panel.dates], "종가": _indicator_values(close[:, 0])}
+        data.update({k: _indicator_values(v[:, 0]) for k, v in outputs.items()})
+    else:
+        data = {"티커": panel.tickers.tolist(), "종목명": panel.names.tolist(), "종가": _indicator_values(close[-1])}
+        data.update({k: _indicator_values(v[-1]) for k, v in outputs.items()})
+
+    return {
+        "date": panel.dates[-1],
+        "ticker": ticker,
+        "name": panel.names[0] if ticker else None,
+        "market": None if ticker else market,
+        "indicators": [f"{name}{window}" for name, window in specs],
+        "days": len(panel.dates),
+        "count": len(data["종가"]),
+        "columns": list(data),
+        "data": data,
+    }
+
+
+# ----------------------------------------------------------------------------
+# 수익률/상관관계 행렬 (지수 구성종목 등 종목 집합)
+# ----------------------------------------------------------------------------
+
+RETURNS_MAX_TICKERS = 500
+RETURNS_MAX_WINDOW = 250
+
+
+def get_index_members(index_code: str, date: str) -> List[str]:
+    """지수 구성종목 티커 (공용 캐시 사용)"""
+    def fetch():
+        df = stock.get_index_portfolio_deposit_file(index_code, date)
+        if df is None:
+            return []
+        return [str(t) for t in (df.index if isinstance(df, pd.DataFrame) else df)]
+
+    return data_cache.get_or_fetch(("index_members", index_code, date), fetch, ttl=ttl_for_date(date))
+
+
+def universe_closes(date: str, tickers: List[str]) -> tuple:
+    """
+    전종목시세 스냅샷(KOSPI → KOSDAQ 순)에서 종목 집합의 종가/종목명 → (종가 배열, 종목명 목록)
+
+    스냅샷에 없는 종목은 NaN. KOSPI에서 모두 찾으면 KOSDAQ은 조회하지 않는다.
+    """
+    closes = np.full(len(tickers), np.nan)
+    names = list(tickers)
+    pending = list(range(len(tickers)))
+    for mktid in ("STK", "KSQ"):
+        snapshot = get_all_stock_prices_snapshot(date, mktid)
+        if snapshot is None:
+            continue
+        close = snapshot.columns["TDD_CLSPRC"]
+        abbrv = snapshot.columns.get("ISU_ABBRV")
+        strings = snapshot.pool.strings()
+        missing = []
+        for i in pending:
+            row = snapshot.rankings.row_of(tickers[i])
+            if row is None:
+                missing.append(i)
+                continue
+            closes[i] = close[row]
+            if abbrv is not None:
+                names[i] = strings[abbrv[row]]
+        pending = missing
+        if not pending:
+            break
+    return closes, names
+
+
+def get_return_matrix(universe: tuple, tickers: List[str], dates: List[str]) -> Optional[ReturnMatrix]:
+    """
+    (종목 집합, 창) 수익률 행렬 (공용 캐시 사용)
+
+    dates: 오름차순 영업일 (창 + 1일). 직전 영업일 행렬이 캐시에 있으면 새 날 스냅샷 1개만 읽어
+    rank-1 갱신하고, 없으면 전체 기간 스냅샷으로 새로 구성한다.
+    """
+    window = len(dates) - 1
+
+    def build():
+        hit, previous = data_cache.get(("return_matrix", universe, window, dates[-2]))
+        if hit and previous is not None and previous.dates[1:] == dates[:-1] and previous.tickers == tickers:
+            closes, _ = universe_closes(dates[-1], tickers)
+            return previous.advance(dates[-1], closes)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            rows = list(pool.map(tracing.wrap_context(lambda d: universe_closes(d, tickers)), dates))
+        prices = np.vstack([closes for closes, _ in rows])
+        if np.isnan(prices).all():
+            return None
+        return ReturnMatrix(tickers, dates, prices, rows[-1][1])
+
+    ttl = ttl_for_date(dates[-1], KRXSession.PUBLICATION_TIMES["전종목시세"])
+    return data_cache.get_or_fetch(("return_matrix", universe, window, dates[-1]), build, ttl=ttl)
+
+
+def _matrix_values(values: np.ndarray, digits: int) -> list:
+    return [[None if v != v else v for v in row] for row in np.round(values, digits).tolist()]
+
+
+@app.get("/api/stocks/returns")
+def get_stock_returns(
+    index_code: Optional[str] = Query(None, description="지수 코드 (구성종목 사용, 예: 1028 = 코스피 200)"),
+    tickers: Optional[str] = Query(None, description="종목코드 목록 (쉼표 구분, index_code 대신)"),
+    date: Optional[str] = Query(None, description="기준일 (YYYYMMDD, 기본: 오늘)"),
+    window: int = Query(60, ge=2, le=RETURNS_MAX_WINDOW, description="수익률 창 (영업일)"),
+    matrix: str = Query("correlation", description="행렬 종류: correlation, covariance, none"),
+    horizons: str = Query("1,5,20", description="기간 수익률 (영업일, 쉼표 구분)")
+):
+    """
+    종목 집합의 기간 수익률 + 일간 수익률 상관계수/공분산 행렬
+
+    일자별 전종목시세 스냅샷(캐시 공유)에서 일자 × 종목 종가 행렬을 구성하므로 종목별 조회가 없다.
+    (종목 집합, 창) 단위로 캐시하며, 새 영업일은 직전 행렬을 증분 갱신한다.
+    """
+    if matrix not in ("correlation", "covariance", "none"):
+        raise HTTPException(status_code=400, detail="matrix는 correlation, covariance, none 중 하나")
+    try:
+        horizon_list = [int(h) for h in horizons.split(",") if h.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="horizons는 쉼표로 구분한 정수 (예: 1,5,20)")
+
+    end = date or datetime.now().strftime("%Y%m%d")
+    _parse_date(end, "date")
+    try:
+        dates = get_trading_dates(end, window + 1)
+        if len(dates) < 3:
+            return {"date": None, "count": 0, "tickers": [], "error": "유효한 거래일을 찾을 수 없습니다"}
+
+        if index_code:
+            universe = ("index", index_code)
+            members = get_index_members(index_code, dates[-1])
+        elif tickers:
+            members = list(dict.fromkeys(t.strip() for t in tickers.split(",") if t.strip()))
+            universe = ("tickers",) + tuple(members)
+        else:
+            raise HTTPException(status_code=400, detail="index_code 또는 tickers 파라미터 필요")
+        if not members:
+            return {"date": dates[-1], "index_code": index_code, "count": 0, "tickers": []}
+        if len(members) > RETURNS_MAX_TICKERS:
+            raise HTTPException(status_code=400, detail=f"종목은 최대 {RETURNS_MAX_TICKERS}개까지 가능")
+
+        result = get_return_matrix(universe, members, dates)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if result is None:
+        return {"date": dates[-1], "index_code": index_code, "count": 0, "tickers": []}
+
+    response = {
+        "date": result.dates[-1],
+        "start": result.dates[0],
+        "index_code": index_code,
+        "window": window,
+        "count": len(result),
+        "tickers": result.tickers,
+        "names": result.names,
+        "returns": {k: _matrix_values(v.reshape(1, -1), 2)[0] for k, v in result.period_returns(horizon_list).items()},
+        "volatility": _matrix_values(result.volatility().reshape(1, -1), 2)[0],
+    }
+    if matrix == "correlation":
+        response["matrix"] = _matrix_values(result.correlation(), 4)
+    elif matrix == "covariance":
+        response["matrix"] = _matrix_values(result.covariance(), 8)
+    return response
+
+
+def _int_or_none(value) -> Optional[int]:
+    """결측(NaN, KRX '-')은 None, 그 외 정수"""
+    return int(value) if pd.notna(value) else None
+
+
 @app.get("/api/stocks/market-cap")
 def get_market_cap_endpoint(
     market: str = Query("KOSPI", description="시장 구분"),
@@ -1150,12 +1778,12 @@ def get_market_cap_endpoint(
                 "종목코드": row['티커'],
                 "종목명": row['종목명'],
                 "시장": get_market_name(market),
-                "종가": int(row['종가']),
-                "시가총액": int(row['시가총액']),
-                "시가총액_조": round(row['시가총액'] / 1000000000000, 2),
-                "거래량": int(row['거래량']),
-                "거래대금": int(row['거래대금']),
-                "상장주식수": int(row['상장주식수'])
+                "종가": _int_or_none(row['종가']),
+                "시가총액": _int_or_none(row['시가총액']),
+                "시가총액_조": round(row['시가총액'] / 1000000000000, 2) if pd.notna(row['시가총액']) else None,
+                "거래량": _int_or_none(row['거래량']),
+                "거래대금": _int_or_none(row['거래대금']),
+                "상장주식수": _int_or_none(row['상장주식수'])
             })
 
         return {"date": date, "market": market, "count": len(result), "data": result}
@@ -1252,24 +1880,14 @@ def get_all_markets_data(
         end_date = date
 
         # 펀더멘털 데이터 로드 시도 (KRX Session API 직접 사용)
-        fund_kospi = {}
-        fund_kosdaq = {}
+        fund_kospi = pd.DataFrame()
+        fund_kosdaq = pd.DataFrame()
         if _is_logged_in and _krx_session:
             try:
                 # KRX Session API 직접 호출 (PyKRX 대신)
                 kospi_data = _krx_session.get_per_pbr_div(date, market="STK")
                 if kospi_data:
-                    items = kospi_data.get('output', kospi_data.get('OutBlock_1', []))
-                    for item in items:
-                        ticker = item.get('ISU_SRT_CD', '')
-                        if ticker:
-                            fund_kospi[ticker] = {
-                                'PER': _safe_float(item.get('PER')),
-                                'PBR': _safe_float(item.get('PBR')),
-                                'DIV': _safe_float(item.get('DVD_YLD')),
-                                'EPS': _safe_float(item.get('EPS')),
-                                'BPS': _safe_float(item.get('BPS'))
-                            }
+                    fund_kospi = _fundamental_by_ticker(kospi_data)
                     print(f"KOSPI fundamental 로드 성공: {len(fund_kospi)}개 종목")
             except Exception as e:
                 print(f"KOSPI fundamental 로드 실패: {e}")
@@ -1277,17 +1895,7 @@ def get_all_markets_data(
             try:
                 kosdaq_data = _krx_session.get_per_pbr_div(date, market="KSQ")
                 if kosdaq_data:
-                    items = kosdaq_data.get('output', kosdaq_data.get('OutBlock_1', []))
-                    for item in items:
-                        ticker = item.get('ISU_SRT_CD', '')
-                        if ticker:
-                            fund_kosdaq[ticker] = {
-                                'PER': _safe_float(item.get('PER')),
-                                'PBR': _safe_float(item.get('PBR')),
-                                'DIV': _safe_float(item.get('DVD_YLD')),
-                                'EPS': _safe_float(item.get('EPS')),
-                                'BPS': _safe_float(item.get('BPS'))
-                            }
+                    fund_kosdaq = _fundamental_by_ticker(kosdaq_data)
                     print(f"KOSDAQ fundamental 로드 성공: {len(fund_kosdaq)}개 종목")
             except Exception as e:
                 print(f"KOSDAQ fundamental 로드 실패: {e}")
@@ -1317,11 +1925,11 @@ def get_all_markets_data(
                     }
 
                     # 펀더멘털 데이터 추가 (로그인 상태)
-                    if ticker in fund_kospi:
-                        f = fund_kospi[ticker]
-                        item["PER"] = round(f['PER'], 2) if pd.notna(f.get('PER')) else None
-                        item["PBR"] = round(f['PBR'], 2) if pd.notna(f.get('PBR')) else None
-                        item["배당수익률"] = round(f['DIV'], 2) if pd.notna(f.get('DIV')) else None
+                    if ticker in fund_kospi.index:
+                        f = fund_kospi.loc[ticker]
+                        item["PER"] = round(float(f['PER']), 2) if pd.notna(f.get('PER')) else None
+                        item["PBR"] = round(float(f['PBR']), 2) if pd.notna(f.get('PBR')) else None
+                        item["배당수익률"] = round(float(f['DIV']), 2) if pd.notna(f.get('DIV')) else None
                         item["EPS"] = int(f['EPS']) if pd.notna(f.get('EPS')) else None
                         item["BPS"] = int(f['BPS']) if pd.notna(f.get('BPS')) else None
 
@@ -1355,11 +1963,11 @@ def get_all_markets_data(
                     }
 
                     # 펀더멘털 데이터 추가 (로그인 상태)
-                    if ticker in fund_kosdaq:
-                        f = fund_kosdaq[ticker]
-                        item["PER"] = round(f['PER'], 2) if pd.notna(f.get('PER')) else None
-                        item["PBR"] = round(f['PBR'], 2) if pd.notna(f.get('PBR')) else None
-                        item["배당수익률"] = round(f['DIV'], 2) if pd.notna(f.get('DIV')) else None
+                    if ticker in fund_kosdaq.index:
+                        f = fund_kosdaq.loc[ticker]
+                        item["PER"] = round(float(f['PER']), 2) if pd.notna(f.get('PER')) else None
+                        item["PBR"] = round(float(f['PBR']), 2) if pd.notna(f.get('PBR')) else None
+                        item["배당수익률"] = round(float(f['DIV']), 2) if pd.notna(f.get('DIV')) else None
                         item["EPS"] = int(f['EPS']) if pd.notna(f.get('EPS')) else None
                         item["BPS"] = int(f['BPS']) if pd.notna(f.get('BPS')) else None
 
@@ -1420,7 +2028,9 @@ def get_investor_trading(
 def get_foreign_holding(
     date: Optional[str] = Query(None, description="기준일 (YYYYMMDD)"),
     market: str = Query("KOSPI", description="시장 구분"),
-    top_n: int = Query(50, description="상위 N개 종목")
+    top_n: int = Query(50, description="상위 N개 종목"),
+    sort_by: Optional[str] = Query(None, description="정렬 지표 (KRX 필드, 기본: FORN_SHR_RT)"),
+    ascending: bool = Query(False, description="오름차순 (하위 N개)")
 ):
     """
     외국인 보유량 조회
@@ -1436,20 +2046,19 @@ def get_foreign_holding(
         if date is None:
             date = find_valid_trading_date("005930", 14)
 
-        # 직접 세션 API 사용
-        data = _krx_session.get_foreign_holding(date, market="STK" if market == "KOSPI" else "KSQ")
-
-        if not data:
-            return {"date": date, "market": market, "data": []}
-
-        items = data.get('output', data.get('OutBlock_1', []))[:top_n]
+        # 직접 세션 API 사용 (순위 인덱스는 일자/시장별 1회 구성)
+        snapshot = get_ranked_block("get_foreign_holding", "외국인보유량", date, "STK" if market == "KOSPI" else "KSQ")
+        metric, items = ranked_records(snapshot, "외국인보유량", top_n, sort_by, ascending)
 
         return {
             "date": date,
             "market": market,
+            "sort_by": metric,
             "count": len(items),
             "data": items
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1466,14 +2075,14 @@ def get_sector_data(
             for i in range(7):
                 test_date = (today - timedelta(days=i)).strftime("%Y%m%d")
                 try:
-                    df = stock.get_index_ticker_list(test_date, market=market)
+                    df = get_index_ticker_list_cached(test_date, market=market)
                     if len(df) > 0:
                         date = test_date
                         break
                 except:
                     continue
 
-        sectors = stock.get_index_ticker_list(date, market=market)
+        sectors = get_index_ticker_list_cached(date, market=market)
 
         result = []
         for sector_code in sectors[:30]:
@@ -1499,6 +2108,162 @@ def get_sector_data(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ============================================================================
+# 스크리너
+# ============================================================================
+
+SCREENER_MARKETS = {"KOSPI": ("STK",), "KOSDAQ": ("KSQ",), "ALL": ("STK", "KSQ")}
+
+
+def _concat_frames(frames: List[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    frames = [f for f in frames if f is not None and not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+
+def get_screener_snapshot(date: str, market: str = "ALL") -> Optional[MarketSnapshot]:
+    """
+    전종목시세 + PER/PBR/배당수익률 + 외국인보유량 조인 스냅샷 (공용 캐시 사용)
+
+    로그인 전에는 시세 열만 채워지므로 로그인 여부를 캐시 키에 포함한다.
+    """
+    logged_in = bool(_is_logged_in and _krx_session)
+
+    def build():
+        prices, fundamentals, foreign = [], [], []
+        for mktid in SCREENER_MARKETS[market]:
+            prices.append(fetch_all_stock_prices(date, mktid))
+            if logged_in:
+                fundamentals.append(decode_block(_krx_session.get_per_pbr_div(date, market=mktid), "PER_PBR_배당수익률"))
+                foreign.append(decode_block(_krx_session.get_foreign_holding(date, market=mktid), "외국인보유량"))
+        prices = _concat_frames(prices)
+        if prices is None:
+            return None
+        return build_screen_snapshot(prices, _concat_frames(fundamentals), _concat_frames(foreign), current_pool())
+
+    times = KRXSession.PUBLICATION_TIMES
+    datasets = ("전종목시세", "PER_PBR_배당수익률", "외국인보유량") if logged_in else ("전종목시세",)
+    ttl = min(ttl_for_date(date, times[name]) for name in datasets)
+    return data_cache.get_or_fetch(("screener", date, market, logged_in), build, ttl=ttl)
+
+
+@app.get("/api/screener")
+def get_screener(
+    expression: str = Query("", alias="filter", description='필터식 (예: PER < 10 and 배당수익률 > 3%)'),
+    sort: Optional[str] = Query(None, description="정렬식 (예: 배당수익률 desc, 시가총액 desc)"),
+    market: str = Query("ALL", description="시장 구분: KOSPI, KOSDAQ, ALL"),
+    date: Optional[str] = Query(None, description="기준일 (YYYYMMDD)"),
+    limit: int = Query(50, ge=1, le=3000, description="최대 반환 행 수"),
+    fields: Optional[str] = Query(None, description="반환 필드 (쉼표 구분, 기본: 전체)")
+):
+    """
+    전종목 스크리너
+    시가총액/PER/PBR/배당수익률/외국인보유율 조인 테이블에서 필터식에 맞는 종목만 반환
+    (PER/PBR/배당수익률/외국인 필드는 KRX 로그인 필요, 비로그인 시 null)
+    """
+    market = market.upper()
+    if market not in SCREENER_MARKETS:
+        raise HTTPException(status_code=400, detail=f"market은 {', '.join(SCREENER_MARKETS)} 중 하나")
+
+    try:
+        if date is None:
+            date = find_valid_trading_date("005930", 14)
+            if date is None:
+                return {"date": None, "market": market, "count": 0, "data": [], "error": "유효한 거래일을 찾을 수 없습니다"}
+
+        snapshot = get_screener_snapshot(date, market)
+        if snapshot is None:
+            return {"date": date, "market": market, "count": 0, "data": []}
+
+        field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        result = screen(snapshot, expression, sort=sort, limit=limit, fields=field_list)
+    except ScreenerError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "date": date,
+        "market": market,
+        "filter": expression,
+        "sort": sort,
+        "includes_fundamental": bool(_is_logged_in and _krx_session),
+        **result,
+    }
+
+
+# 순위 조회 데이터셋 → KRXSession 조회 메서드 (전종목시세는 pykrx core, 로그인 불필요)
+RANK_DATASETS = {
+    "전종목시세": None,
+    "외국인보유량": "get_foreign_holding",
+    "공매도_거래_종목별": "get_short_selling_by_stock",
+    "공매도_잔고_종목별": "get_short_selling_balance",
+    "신용거래_종목별": "get_credit_trading",
+    "프로그램매매_종목별": "get_program_trading",
+}
+
+
+@app.get("/api/rank")
+def get_rank(
+    ticker: str = Query(..., description="종목 코드 (6자리)"),
+    dataset: str = Query("전종목시세", description=f"데이터셋: {', '.join(RANK_DATASETS)}"),
+    metric: Optional[str] = Query(None, description="순위 지표 (KRX 필드, 기본: 데이터셋별 대표 지표)"),
+    market: str = Query("KOSPI", description="시장 구분: KOSPI, KOSDAQ"),
+    date: Optional[str] = Query(None, description="기준일 (YYYYMMDD)"),
+    ascending: bool = Query(False, description="오름차순 순위")
+):
+    """
+    종목 순위 조회
+    일자/시장별 순위 인덱스에서 조회 (요청 시 정렬 없음)
+    """
+    if dataset not in RANK_DATASETS:
+        raise HTTPException(status_code=400, detail=f"dataset은 {', '.join(RANK_DATASETS)} 중 하나")
+    getter = RANK_DATASETS[dataset]
+    if getter and (not _is_logged_in or not _krx_session):
+        raise HTTPException(status_code=401, detail="KRX 로그인이 필요합니다.")
+
+    if date is None:
+        date = find_valid_trading_date("005930", 14)
+        if date is None:
+            return {"date": None, "ticker": ticker, "rank": None, "error": "유효한 거래일을 찾을 수 없습니다"}
+
+    mkt_code = "STK" if market.upper() == "KOSPI" else "KSQ"
+    if getter:
+        snapshot = get_ranked_block(getter, dataset, date, mkt_code)
+    else:
+        snapshot = get_all_stock_prices_snapshot(date, mkt_code)
+    if snapshot is None:
+        return {"date": date, "ticker": ticker, "dataset": dataset, "rank": None, "total": 0}
+
+    try:
+        metric = resolve_rank_metric(snapshot, dataset, metric)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    rankings = snapshot.rankings
+    rank, total = rankings.rank_of(metric, ticker, ascending=ascending)
+    row = rankings.row_of(ticker)
+    value = name = None
+    if row is not None:
+        value = to_records(snapshot.to_frame([metric], rows=[row]))[0][metric]
+        if "ISU_ABBRV" in snapshot.columns:
+            name = snapshot.pool.strings()[snapshot.columns["ISU_ABBRV"][row]]
+
+    return {
+        "date": date,
+        "market": market,
+        "dataset": dataset,
+        "ticker": ticker,
+        "name": name,
+        "metric": metric,
+        "value": value,
+        "rank": rank,
+        "total": total,
+        "ascending": ascending,
+    }
+
+
 # ============================================================================
 # 150% 커버리지 확장 API 엔드포인트
 # ============================================================================
@@ -1523,7 +2288,7 @@ def get_etf_all(
         if not data:
             return {"date": date, "count": 0, "data": []}
 
-        items = data.get('output', data.get('OutBlock_1', []))[:top_n]
+        items = to_records(decode_block(data, "ETF_전종목시세", limit=top_n))
         return {"date": date, "count": len(items), "data": items}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1549,7 +2314,7 @@ def get_etn_all(
         if not data:
             return {"date": date, "count": 0, "data": []}
 
-        items = data.get('output', data.get('OutBlock_1', []))[:top_n]
+        items = to_records(decode_block(data, "ETN_전종목시세", limit=top_n))
         return {"date": date, "count": len(items), "data": items}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1559,7 +2324,9 @@ def get_etn_all(
 def get_short_selling_trading(
     date: Optional[str] = Query(None, description="기준일 (YYYYMMDD)"),
     market: str = Query("KOSPI", description="시장 구분"),
-    top_n: int = Query(100, description="상위 N개")
+    top_n: int = Query(100, description="상위 N개"),
+    sort_by: Optional[str] = Query(None, description="정렬 지표 (KRX 필드, 기본: CVSRTSELL_TRDVAL)"),
+    ascending: bool = Query(False, description="오름차순 (하위 N개)")
 ):
     """
     공매도 거래현황 조회
@@ -1573,12 +2340,11 @@ def get_short_selling_trading(
             date = find_valid_trading_date("005930", 14)
 
         mkt_code = "STK" if market.upper() == "KOSPI" else "KSQ"
-        data = _krx_session.get_short_selling_by_stock(date, market=mkt_code)
-        if not data:
-            return {"date": date, "market": market, "count": 0, "data": []}
-
-        items = data.get('output', data.get('OutBlock_1', []))[:top_n]
-        return {"date": date, "market": market, "count": len(items), "data": items}
+        snapshot = get_ranked_block("get_short_selling_by_stock", "공매도_거래_종목별", date, mkt_code)
+        metric, items = ranked_records(snapshot, "공매도_거래_종목별", top_n, sort_by, ascending)
+        return {"date": date, "market": market, "sort_by": metric, "count": len(items), "data": items}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1587,7 +2353,9 @@ def get_short_selling_trading(
 def get_short_selling_balance(
     date: Optional[str] = Query(None, description="기준일 (YYYYMMDD)"),
     market: str = Query("KOSPI", description="시장 구분"),
-    top_n: int = Query(100, description="상위 N개")
+    top_n: int = Query(100, description="상위 N개"),
+    sort_by: Optional[str] = Query(None, description="정렬 지표 (KRX 필드, 기본: BAL_AMT)"),
+    ascending: bool = Query(False, description="오름차순 (하위 N개)")
 ):
     """
     공매도 잔고현황 조회
@@ -1601,12 +2369,11 @@ def get_short_selling_balance(
             date = find_valid_trading_date("005930", 14)
 
         mkt_code = "STK" if market.upper() == "KOSPI" else "KSQ"
-        data = _krx_session.get_short_selling_balance(date, market=mkt_code)
-        if not data:
-            return {"date": date, "market": market, "count": 0, "data": []}
-
-        items = data.get('output', data.get('OutBlock_1', []))[:top_n]
-        return {"date": date, "market": market, "count": len(items), "data": items}
+        snapshot = get_ranked_block("get_short_selling_balance", "공매도_잔고_종목별", date, mkt_code)
+        metric, items = ranked_records(snapshot, "공매도_잔고_종목별", top_n, sort_by, ascending)
+        return {"date": date, "market": market, "sort_by": metric, "count": len(items), "data": items}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1615,7 +2382,9 @@ def get_short_selling_balance(
 def get_credit_trading(
     date: Optional[str] = Query(None, description="기준일 (YYYYMMDD)"),
     market: str = Query("KOSPI", description="시장 구분"),
-    top_n: int = Query(100, description="상위 N개")
+    top_n: int = Query(100, description="상위 N개"),
+    sort_by: Optional[str] = Query(None, description="정렬 지표 (KRX 필드, 기본: 금액 계열 첫 필드)"),
+    ascending: bool = Query(False, description="오름차순 (하위 N개)")
 ):
     """
     신용거래 현황 조회
@@ -1629,12 +2398,11 @@ def get_credit_trading(
             date = find_valid_trading_date("005930", 14)
 
         mkt_code = "STK" if market.upper() == "KOSPI" else "KSQ"
-        data = _krx_session.get_credit_trading(date, market=mkt_code)
-        if not data:
-            return {"date": date, "market": market, "count": 0, "data": []}
-
-        items = data.get('output', data.get('OutBlock_1', []))[:top_n]
-        return {"date": date, "market": market, "count": len(items), "data": items}
+        snapshot = get_ranked_block("get_credit_trading", "신용거래_종목별", date, mkt_code)
+        metric, items = ranked_records(snapshot, "신용거래_종목별", top_n, sort_by, ascending)
+        return {"date": date, "market": market, "sort_by": metric, "count": len(items), "data": items}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1643,7 +2411,9 @@ def get_credit_trading(
 def get_program_trading(
     date: Optional[str] = Query(None, description="기준일 (YYYYMMDD)"),
     market: str = Query("KOSPI", description="시장 구분"),
-    top_n: int = Query(100, description="상위 N개")
+    top_n: int = Query(100, description="상위 N개"),
+    sort_by: Optional[str] = Query(None, description="정렬 지표 (KRX 필드, 기본: 금액 계열 첫 필드)"),
+    ascending: bool = Query(False, description="오름차순 (하위 N개)")
 ):
     """
     프로그램 매매 현황 조회
@@ -1657,12 +2427,11 @@ def get_program_trading(
             date = find_valid_trading_date("005930", 14)
 
         mkt_code = "STK" if market.upper() == "KOSPI" else "KSQ"
-        data = _krx_session.get_program_trading(date, market=mkt_code)
-        if not data:
-            return {"date": date, "market": market, "count": 0, "data": []}
-
-        items = data.get('output', data.get('OutBlock_1', []))[:top_n]
-        return {"date": date, "market": market, "count": len(items), "data": items}
+        snapshot = get_ranked_block("get_program_trading", "프로그램매매_종목별", date, mkt_code)
+        metric, items = ranked_records(snapshot, "프로그램매매_종목별", top_n, sort_by, ascending)
+        return {"date": date, "market": market, "sort_by": metric, "count": len(items), "data": items}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1678,7 +2447,7 @@ def get_index_list(
             date = find_valid_trading_date("005930", 14)
 
         # PyKRX 사용
-        sectors = stock.get_index_ticker_list(date, market=market)
+        sectors = get_index_ticker_list_cached(date, market=market)
         result = []
         for code in sectors:
             name = stock.get_index_ticker_name(code)
@@ -1781,7 +2550,7 @@ def get_futures_data(
         if not data:
             return {"date": date, "count": 0, "data": []}
 
-        items = data.get('output', data.get('OutBlock_1', []))[:top_n]
+        items = to_records(decode_block(data, "선물_전종목시세", limit=top_n))
         return {"date": date, "count": len(items), "data": items}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1807,7 +2576,7 @@ def get_options_data(
         if not data:
             return {"date": date, "count": 0, "data": []}
 
-        items = data.get('output', data.get('OutBlock_1', []))[:top_n]
+        items = to_records(decode_block(data, "옵션_전종목시세", limit=top_n))
         return {"date": date, "count": len(items), "data": items}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1858,7 +2627,7 @@ def get_trading_halt(
         if not data:
             return {"date": date, "count": 0, "data": []}
 
-        items = data.get('output', data.get('OutBlock_1', []))
+        items = to_records(decode_block(data, "거래정지종목"))
         return {"date": date, "count": len(items), "data": items}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1884,7 +2653,7 @@ def get_admin_issue(
         if not data:
             return {"date": date, "count": 0, "data": []}
 
-        items = data.get('output', data.get('OutBlock_1', []))
+        items = to_records(decode_block(data, "관리종목"))
         return {"date": date, "count": len(items), "data": items}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -2006,6 +2775,59 @@ async def process_natural_language(request: dict):
     classifier = get_intent_classifier()
     result = await classifier.classify(query)
 
+    return await _build_nl_response(query, result, execute)
+
+
+# 배치 요청 최대 쿼리 수
+NL_BATCH_MAX_QUERIES = 100
+
+
+@app.post("/api/natural-language/batch")
+async def process_natural_language_batch(request: dict):
+    """
+    여러 자연어 쿼리를 한 번에 분석/실행
+
+    - 분류: 키워드 → 남은 쿼리 일괄 임베딩 → 남은 쿼리 단일 LLM 프롬프트
+    - 실행: 하나의 IntentContext를 공유하여 동일한 upstream 조회는 한 번만 수행
+      (예: 두 쿼리가 같은 코스피 시가총액 스냅샷을 필요로 하는 경우)
+
+    Request Body:
+        {"queries": ["삼성전자 주가", "코스피 시가총액 순위"], "execute": true}
+
+    Response:
+        {"count": 2, "latency_ms": 12.3, "results": [{...}, {...}]}  // 요청 순서 유지
+    """
+    queries = request.get("queries")
+    execute = request.get("execute", False)
+
+    if not isinstance(queries, list) or not queries:
+        raise HTTPException(status_code=400, detail="queries 파라미터(list) 필요")
+    if len(queries) > NL_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"queries는 최대 {NL_BATCH_MAX_QUERIES}개까지 가능")
+    if not all(isinstance(q, str) and q for q in queries):
+        raise HTTPException(status_code=400, detail="queries 항목은 비어 있지 않은 문자열이어야 함")
+
+    start = time.perf_counter()
+
+    classifier = get_intent_classifier()
+    results = await classifier.classify_batch(queries)
+
+    # 실행 컨텍스트 공유 → 배치 내 중복 upstream 조회 제거
+    ctx = IntentContext()
+    responses = await asyncio.gather(*[
+        _build_nl_response(query, result, execute, ctx)
+        for query, result in zip(queries, results)
+    ])
+
+    return {
+        "count": len(responses),
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "results": list(responses)
+    }
+
+
+async def _build_nl_response(query: str, result, execute: bool, ctx: Optional[IntentContext] = None) -> dict:
+    """분류 결과 → 자연어 API 응답 (execute 시 인텐트 실행 결과 포함)"""
     response = {
         "query": query,
         "intent": result.intent,
@@ -2020,7 +2842,7 @@ async def process_natural_language(request: dict):
     # API 실행 요청 시
     if execute and result.intent != "unknown":
         try:
-            exec_result = await execute_intent(result)
+            exec_result = await execute_intent(result, ctx)
             response["executed"] = True
             response["result"] = exec_result
         except Exception as e:
@@ -2032,271 +2854,255 @@ async def process_natural_language(request: dict):
     return response
 
 
-async def execute_intent(result):
-    """인텐트에 따라 API 실행하고 결과를 표준화된 형식으로 반환"""
-    print(f"[execute_intent] ======= 함수 호출됨! intent={result.intent} =======")
-    intent = result.intent
-    params = result.parameters
-    today = datetime.now().strftime("%Y%m%d")
-    print(f"[execute_intent] params={params}, today={today}")
+# ----------------------------------------------------------------------------
+# 인텐트 핸들러 (intent_handlers 레지스트리에 등록)
+# ----------------------------------------------------------------------------
 
-    try:
-        # 주가 조회 (특정 종목)
-        if intent == "stock_price":
-            ticker = params.get("ticker")
-            date = params.get("date", today)
-            if ticker:
-                df = stock.get_market_ohlcv(date, date, ticker)
-                # 오늘 데이터가 없으면 (장 시작 전) 최근 30일에서 마지막 데이터 조회
-                if df.empty:
-                    from_date = (datetime.now() - timedelta(days=30)).strftime("%Y%m%d")
-                    df = stock.get_market_ohlcv(from_date, today, ticker)
-                    if not df.empty:
-                        df = df.tail(1)  # 가장 최근 1개
-                if not df.empty:
-                    df = df.reset_index()
-                    # 종목명 추가
-                    ticker_name = params.get("ticker_name", ticker)
-                    df["종목명"] = ticker_name
-                    return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            return {"success": False, "error": "티커 또는 데이터 없음"}
-
-        # 시가총액 (특정 종목 또는 시장 전체)
-        elif intent == "market_cap":
-            ticker = params.get("ticker")
-            market = params.get("market", "KOSPI")
-            date = params.get("date", today)
-            limit = params.get("limit", 20)
-
-            # 지수 코드는 ticker로 처리하지 않음 (시장 전체 조회로 전환)
-            INDEX_CODES = {'1001', '2001', '1028', '2203', '1150', '2150', '3003'}
-            if ticker in INDEX_CODES:
-                print(f"[market_cap] 지수 코드 {ticker} 감지 → 시장 전체 조회로 전환")
-                ticker = None  # 시장 전체 조회로 전환
-
-            if ticker:
-                # 특정 종목 → OHLCV + 시가총액 데이터 조회
-                df = stock.get_market_ohlcv(date, date, ticker)
-                # 오늘 데이터가 없으면 최근 30일에서 마지막 데이터 조회
-                if df.empty:
-                    from_date = (datetime.now() - timedelta(days=30)).strftime("%Y%m%d")
-                    df = stock.get_market_ohlcv(from_date, today, ticker)
-                    if not df.empty:
-                        df = df.tail(1)
-                        date = df.index[0].strftime("%Y%m%d") if hasattr(df.index[0], 'strftime') else date
-                if not df.empty:
-                    df = df.reset_index()
-                    ticker_name = params.get("ticker_name", ticker)
-                    df["종목명"] = ticker_name
-                    df["티커"] = ticker
-                    # 시가총액 추가 시도
-                    try:
-                        cap_df = stock.get_market_cap(date, date, ticker)
-                        if not cap_df.empty:
-                            df["시가총액"] = cap_df.iloc[0].get("시가총액", None)
-                    except:
-                        pass
-                    return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            else:
-                # 시장 전체 → safe 래퍼 사용 (인코딩 문제 해결)
-                print(f"[market_cap] 조회 시도: date={date}, market={market}, limit={limit}")
-                df = get_market_cap_safe(date, market=market, limit=limit)
-                # 오늘 데이터가 없으면 최근 5일만 확인 (성능 최적화)
-                if df.empty:
-                    print(f"[market_cap] 오늘 데이터 없음, 5일 fallback 시작")
-                    for i in range(1, 6):  # 1~5일 전까지만 확인
-                        check_date = (datetime.now() - timedelta(days=i)).strftime("%Y%m%d")
-                        print(f"[market_cap] fallback 시도: {check_date}")
-                        df = get_market_cap_safe(check_date, market=market, limit=limit)
-                        if not df.empty:
-                            print(f"[market_cap] ✅ {check_date} 데이터 발견! ({len(df)}개)")
-                            break
-                if not df.empty:
-                    return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            return {"success": False, "error": "데이터 없음"}
-
-        # ETF 목록
-        elif intent == "etf_list":
-            date = params.get("date", today)
-            limit = params.get("limit", 30)
-            # 패치된 pykrx 사용 (인코딩 문제 해결됨)
-            df = get_etf_list_safe(date, limit=limit)
-            if not df.empty:
-                return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            # 폴백: KRX API 직접 호출
-            results = get_krx_etf_list_direct(date)
-            if results:
-                results = results[:limit]
-                return {"success": True, "data": results, "count": len(results)}
-            return {"success": False, "error": "데이터 없음"}
-
-        # 지수 조회
-        elif intent == "index_price":
-            ticker = params.get("ticker", "1001")  # 기본: 코스피
-            date = params.get("date", today)
-            df = stock.get_index_ohlcv(date, date, ticker)
-            # 오늘 데이터가 없으면 (장 시작 전) 최근 30일에서 마지막 데이터 조회
-            if df.empty:
-                from_date = (datetime.now() - timedelta(days=30)).strftime("%Y%m%d")
-                df = stock.get_index_ohlcv(from_date, today, ticker)
-                if not df.empty:
-                    df = df.tail(1)  # 가장 최근 1개
-            if not df.empty:
-                df = df.reset_index()
-                # 지수명 추가
-                index_name = params.get("index_name", ticker)
-                df["지수명"] = index_name
-                return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            return {"success": False, "error": "데이터 없음"}
-
-        # 외국인/기관 보유
-        elif intent == "foreign_holding":
-            ticker = params.get("ticker")
-            date = params.get("date", today)
-            ticker_name = params.get("ticker_name", ticker)
-            if ticker:
-                try:
-                    df = stock.get_exhaustion_rates_of_foreign_investment(date, date, ticker)
-                    # 오늘 데이터가 없으면 최근 30일에서 마지막 데이터 조회
-                    if df.empty:
-                        from_date = (datetime.now() - timedelta(days=30)).strftime("%Y%m%d")
-                        df = stock.get_exhaustion_rates_of_foreign_investment(from_date, today, ticker)
-                        if not df.empty:
-                            df = df.tail(1)
-                    if not df.empty:
-                        df = df.reset_index()
-                        df["종목명"] = ticker_name
-                        return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-                except Exception as e:
-                    # pykrx 오류 발생 시 OHLCV 데이터로 대체 (시가총액 기준)
-                    print(f"⚠️ 외국인 보유율 API 오류: {e}")
-                    try:
-                        # 대안: 시가총액 데이터에서 외국인 보유 정보 추출
-                        from_date = (datetime.now() - timedelta(days=30)).strftime("%Y%m%d")
-                        cap_df = stock.get_market_cap(from_date, today, ticker)
-                        if not cap_df.empty:
-                            cap_df = cap_df.tail(1).reset_index()
-                            cap_df["종목명"] = ticker_name
-                            # 외국인 소진율 정보가 없으므로 시가총액 정보만 반환
-                            return {"success": True, "data": cap_df.to_dict(orient="records"), "count": len(cap_df),
-                                    "note": "외국인 보유율 API 오류로 시가총액 정보만 제공됩니다"}
-                    except:
-                        pass
-            return {"success": False, "error": "데이터 없음"}
-
-        # PER/PBR 등 펀더멘털
-        elif intent == "fundamental":
-            ticker = params.get("ticker")
-            market = params.get("market", "KOSPI")
-            date = params.get("date", today)
-            limit = params.get("limit", 20)
-            if ticker:
-                df = stock.get_market_fundamental(date, date, ticker)
-                if not df.empty:
-                    df = df.reset_index()
-                    ticker_name = params.get("ticker_name", ticker)
-                    df["종목명"] = ticker_name
-                    return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            else:
-                # safe 래퍼 사용 (인코딩 문제 해결)
-                df = get_fundamental_safe(date, market=market, limit=limit)
-                if not df.empty:
-                    return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            return {"success": False, "error": "데이터 없음"}
-
-        # 투자자별 매매동향
-        elif intent == "investor_trading":
-            ticker = params.get("ticker")
-            date = params.get("date", today)
-            if ticker:
-                df = stock.get_market_trading_value_by_investor(date, date, ticker)
-                if not df.empty:
-                    df = df.reset_index()
-                    ticker_name = params.get("ticker_name", ticker)
-                    df["종목명"] = ticker_name
-                    return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            return {"success": False, "error": "데이터 없음"}
-
-        # 티커 검색 (종목명 → 티커 조회)
-        elif intent == "ticker_search":
-            # 이미 파라미터에 티커가 있으면 해당 종목 OHLCV 조회
-            ticker = params.get("ticker")
-            if ticker:
-                df = stock.get_market_ohlcv(today, today, ticker)
-                if not df.empty:
-                    df = df.reset_index()
-                    ticker_name = params.get("ticker_name", ticker)
-                    df["종목명"] = ticker_name
-                    return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            return {"success": False, "error": "티커 정보 없음. 종목명을 확인해주세요."}
-
-        # ETF 가격
-        elif intent == "etf_price":
-            ticker = params.get("ticker")
-            date = params.get("date", today)
-            if ticker:
-                df = stock.get_etf_ohlcv(date, date, ticker)
-                if not df.empty:
-                    df = df.reset_index()
-                    ticker_name = params.get("ticker_name", ticker)
-                    df["종목명"] = ticker_name
-                    return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            return {"success": False, "error": "데이터 없음"}
-
-        # ETN 목록
-        elif intent == "etn_list":
-            date = params.get("date", today)
-            limit = params.get("limit", 30)
-            # 패치된 pykrx 사용 (인코딩 문제 해결됨)
-            df = get_etn_list_safe(date, limit=limit)
-            if not df.empty:
-                return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            # 폴백: KRX API 직접 호출
-            results = get_krx_etn_list_direct(date)
-            if results:
-                results = results[:limit]
-                return {"success": True, "data": results, "count": len(results)}
-            return {"success": False, "error": "데이터 없음"}
-
-        # ELW 목록
-        elif intent == "elw_list":
-            date = params.get("date", today)
-            limit = params.get("limit", 30)
-            # 패치된 pykrx 사용 (인코딩 문제 해결됨)
-            df = get_elw_list_safe(date, limit=limit)
-            if not df.empty:
-                return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            # 폴백: KRX API 직접 호출
-            results = get_krx_elw_list_direct(date)
-            if results:
-                results = results[:limit]
-                return {"success": True, "data": results, "count": len(results)}
-            return {"success": False, "error": "데이터 없음"}
-
-        # 공매도
-        elif intent == "short_selling":
-            ticker = params.get("ticker")
-            date = params.get("date", today)
-            market = params.get("market", "KOSPI")
-            if ticker:
-                df = stock.get_shorting_volume_by_date(date, date, ticker)
-                if not df.empty:
-                    df = df.reset_index()
-                    ticker_name = params.get("ticker_name", ticker)
-                    df["종목명"] = ticker_name
-                    return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            else:
-                # 시장 전체 공매도
-                df = stock.get_shorting_volume_top50(date, market)
-                if not df.empty:
-                    df = df.head(20).reset_index()
-                    df.columns = ["티커"] + list(df.columns[1:])
-                    return {"success": True, "data": df.to_dict(orient="records"), "count": len(df)}
-            return {"success": False, "error": "데이터 없음"}
+# 지수 코드는 종목 ticker로 처리하지 않음 (시장 전체 조회로 전환)
+INDEX_CODES = {'1001', '2001', '1028', '2203', '1150', '2150', '3003'}
 
+
+@register_intent("stock_price", requires=("ohlcv",))
+def handle_stock_price(ctx: IntentContext, params: dict) -> dict:
+    """주가 조회 (특정 종목)"""
+    ticker = params.get("ticker")
+    if not ticker:
+        return ctx.error("티커 또는 데이터 없음")
+    # 오늘 데이터가 없으면 (장 시작 전) 최근 30일에서 마지막 데이터 조회
+    df = ctx.latest(stock.get_market_ohlcv, ticker, params.get("date"))
+    if df is None or df.empty:
+        return ctx.error("티커 또는 데이터 없음")
+    return ctx.frame_result(df, 종목명=params.get("ticker_name", ticker))
+
+
+@register_intent("market_cap", requires=("ohlcv", "market_cap", "전종목시세"))
+def handle_market_cap(ctx: IntentContext, params: dict) -> dict:
+    """시가총액 (특정 종목 또는 시장 전체)"""
+    ticker = params.get("ticker")
+    market = params.get("market", "KOSPI")
+    date = params.get("date", ctx.today)
+    limit = params.get("limit", 20)
+
+    if ticker in INDEX_CODES:
+        print(f"[market_cap] 지수 코드 {ticker} 감지 → 시장 전체 조회로 전환")
+        ticker = None
+
+    if ticker:
+        # 특정 종목 → OHLCV + 시가총액 데이터 조회
+        df = ctx.latest(stock.get_market_ohlcv, ticker, date)
+        if df is None or df.empty:
+            return ctx.error("데이터 없음")
+        if hasattr(df.index[0], 'strftime'):
+            date = df.index[0].strftime("%Y%m%d")
+        df = df.reset_index()
+        df["종목명"] = params.get("ticker_name", ticker)
+        df["티커"] = ticker
+        # 시가총액 추가 시도
+        try:
+            cap_df = ctx.fetch(stock.get_market_cap, date, date, ticker)
+            if not cap_df.empty:
+                df["시가총액"] = cap_df.iloc[0].get("시가총액", None)
+        except Exception:
+            pass
+        return ctx.frame_result(df, reset_index=False)
+
+    # 시장 전체 → safe 래퍼 사용 (인코딩 문제 해결), 데이터 없으면 최근 5일만 확인
+    dates = [date] + ctx.recent_dates(6)[1:]
+    _, df = ctx.first_available(get_market_cap_safe, dates, market=market, limit=limit)
+    return ctx.frame_result(df, reset_index=False)
+
+
+def _product_list_result(ctx: IntentContext, params: dict, safe_func, direct_func) -> dict:
+    """ETF/ETN/ELW 목록 공통: 패치된 pykrx → KRX API 직접 호출 폴백"""
+    date = params.get("date", ctx.today)
+    limit = params.get("limit", 30)
+    df = ctx.fetch(safe_func, date, limit=limit)
+    if df is not None and not df.empty:
+        return ctx.frame_result(df, reset_index=False)
+    results = ctx.fetch(direct_func, date)
+    return ctx.records_result((results or [])[:limit])
+
+
+@register_intent("etf_list", requires=("ETF_전종목기본종목",))
+def handle_etf_list(ctx: IntentContext, params: dict) -> dict:
+    """ETF 목록"""
+    return _product_list_result(ctx, params, get_etf_list_safe, get_krx_etf_list_direct)
+
+
+@register_intent("etn_list", requires=("ETN_전종목기본종목",))
+def handle_etn_list(ctx: IntentContext, params: dict) -> dict:
+    """ETN 목록"""
+    return _product_list_result(ctx, params, get_etn_list_safe, get_krx_etn_list_direct)
+
+
+@register_intent("elw_list", requires=("ELW_전종목기본종목",))
+def handle_elw_list(ctx: IntentContext, params: dict) -> dict:
+    """ELW 목록"""
+    return _product_list_result(ctx, params, get_elw_list_safe, get_krx_elw_list_direct)
+
+
+@register_intent("index_price", requires=("index_ohlcv",))
+def handle_index_price(ctx: IntentContext, params: dict) -> dict:
+    """지수 조회"""
+    ticker = params.get("ticker", "1001")  # 기본: 코스피
+    df = ctx.latest(stock.get_index_ohlcv, ticker, params.get("date"))
+    return ctx.frame_result(df, 지수명=params.get("index_name", ticker))
+
+
+@register_intent("foreign_holding", requires=("exhaustion_rates", "market_cap"))
+def handle_foreign_holding(ctx: IntentContext, params: dict) -> dict:
+    """외국인 보유"""
+    ticker = params.get("ticker")
+    if not ticker:
+        return ctx.error("데이터 없음")
+    ticker_name = params.get("ticker_name", ticker)
+    try:
+        df = ctx.latest(stock.get_exhaustion_rates_of_foreign_investment, ticker, params.get("date"))
+        return ctx.frame_result(df, 종목명=ticker_name)
+    except Exception as e:
+        # pykrx 오류 발생 시 시가총액 정보로 대체
+        print(f"⚠️ 외국인 보유율 API 오류: {e}")
+        try:
+            cap_df = ctx.fetch(stock.get_market_cap, ctx.days_ago(ctx.FALLBACK_DAYS), ctx.today, ticker)
+            if cap_df is not None and not cap_df.empty:
+                result = ctx.frame_result(cap_df.tail(1), 종목명=ticker_name)
+                result["note"] = "외국인 보유율 API 오류로 시가총액 정보만 제공됩니다"
+                return result
+        except Exception:
+            pass
+    return ctx.error("데이터 없음")
+
+
+@register_intent("fundamental", requires=("fundamental",))
+def handle_fundamental(ctx: IntentContext, params: dict) -> dict:
+    """PER/PBR 등 펀더멘털"""
+    ticker = params.get("ticker")
+    if ticker:
+        df = ctx.latest(stock.get_market_fundamental, ticker, params.get("date"))
+        return ctx.frame_result(df, 종목명=params.get("ticker_name", ticker))
+    # safe 래퍼 사용 (인코딩 문제 해결)
+    df = ctx.fetch(get_fundamental_safe, params.get("date", ctx.today),
+                   market=params.get("market", "KOSPI"), limit=params.get("limit", 20))
+    return ctx.frame_result(df, reset_index=False)
+
+
+@register_intent("investor_trading", requires=("trading_value_by_investor",))
+def handle_investor_trading(ctx: IntentContext, params: dict) -> dict:
+    """투자자별 매매동향"""
+    ticker = params.get("ticker")
+    if not ticker:
+        return ctx.error("데이터 없음")
+    date = params.get("date", ctx.today)
+    df = ctx.fetch(stock.get_market_trading_value_by_investor, date, date, ticker)
+    return ctx.frame_result(df, 종목명=params.get("ticker_name", ticker))
+
+
+@register_intent("ticker_search", requires=("ohlcv",))
+def handle_ticker_search(ctx: IntentContext, params: dict) -> dict:
+    """티커 검색 (파라미터에 티커가 있으면 해당 종목 OHLCV 조회)"""
+    ticker = params.get("ticker")
+    if not ticker:
+        return ctx.error("티커 정보 없음. 종목명을 확인해주세요.")
+    df = ctx.latest(stock.get_market_ohlcv, ticker)
+    return ctx.frame_result(df, 종목명=params.get("ticker_name", ticker))
+
+
+@register_intent("etf_price", requires=("etf_ohlcv",))
+def handle_etf_price(ctx: IntentContext, params: dict) -> dict:
+    """ETF 가격"""
+    ticker = params.get("ticker")
+    if not ticker:
+        return ctx.error("데이터 없음")
+    df = ctx.latest(stock.get_etf_ohlcv, ticker, params.get("date"))
+    return ctx.frame_result(df, 종목명=params.get("ticker_name", ticker))
+
+
+@register_intent("short_selling", requires=("shorting_volume",))
+def handle_short_selling(ctx: IntentContext, params: dict) -> dict:
+    """공매도"""
+    ticker = params.get("ticker")
+    date = params.get("date", ctx.today)
+    if ticker:
+        df = ctx.fetch(stock.get_shorting_volume_by_date, date, date, ticker)
+        return ctx.frame_result(df, 종목명=params.get("ticker_name", ticker))
+    # 시장 전체 공매도
+    df = ctx.fetch(stock.get_shorting_volume_top50, date, params.get("market", "KOSPI"))
+    if df is None or df.empty:
+        return ctx.error("데이터 없음")
+    df = df.head(20).reset_index()
+    df.columns = ["티커"] + list(df.columns[1:])
+    return ctx.frame_result(df, reset_index=False)
+
+
+@register_intent("futures_price", requires=("선물_전종목시세",), requires_login=True)
+def handle_futures_price(ctx: IntentContext, params: dict) -> dict:
+    """선물 시세 (KOSPI200 선물)"""
+    dates = ctx.recent_dates(7, params.get("date"))
+    _, data = ctx.first_available(_krx_session.get_futures_data, dates)
+    return ctx.records_result(to_records(decode_block(data, "선물_전종목시세", limit=params.get("limit", 50))))
+
+
+@register_intent("sector", requires=("index_ticker_list", "index_ohlcv"))
+def handle_sector(ctx: IntentContext, params: dict) -> dict:
+    """업종별 시세"""
+    market = params.get("market", "KOSPI")
+    date, sectors = ctx.first_available(get_index_ticker_list_cached,
+                                        ctx.recent_dates(7, params.get("date")), market=market)
+    result = []
+    for sector_code in (sectors or [])[:params.get("limit", 30)]:
+        try:
+            ohlcv = ctx.fetch(stock.get_index_ohlcv, date, date, sector_code)
+            if ohlcv is None or ohlcv.empty:
+                continue
+            row = ohlcv.iloc[-1]
+            result.append({
+                "업종코드": sector_code,
+                "업종명": ctx.fetch(stock.get_index_ticker_name, sector_code),
+                "시장": get_market_name(market),
+                "종가": float(row['종가']),
+                "등락률": float(row.get('등락률', 0)),
+                "거래량": int(row['거래량']),
+                "거래대금_억": round(row['거래대금'] / 100000000, 1),
+            })
+        except Exception:
+            continue
+    return ctx.records_result(result, date=date)
+
+
+@register_intent("index_components", requires=("index_portfolio_deposit_file",))
+def handle_index_components(ctx: IntentContext, params: dict) -> dict:
+    """지수 구성종목"""
+    index_code = params.get("ticker", "1028")  # 기본: 코스피200
+    df = None
+    for date in ctx.recent_dates(7, params.get("date")):
+        df = ctx.fetch(stock.get_index_portfolio_deposit_file, index_code, date)
+        if df is not None and len(df) > 0:
+            break
+    if df is None or len(df) == 0:
+        return ctx.error("데이터 없음")
+    tickers = list(df.index) if isinstance(df, pd.DataFrame) else list(df)
+    records = [
+        {"ticker": t, "name": ctx.fetch(stock.get_market_ticker_name, t)}
+        for t in tickers
+    ]
+    return ctx.records_result(records, index_code=index_code, date=date)
+
+
+async def execute_intent(result, ctx: Optional[IntentContext] = None):
+    """인텐트에 따라 등록된 핸들러를 실행하고 결과를 표준화된 형식으로 반환"""
+    handler = INTENT_HANDLERS.get(result.intent)
+    if handler is None:
         # 기타: 엔드포인트 정보만 반환
-        return {"success": False, "error": f"'{intent}' 인텐트 직접 실행 미지원. API: {result.endpoint}"}
+        return {"success": False, "error": f"'{result.intent}' 인텐트 직접 실행 미지원. API: {result.endpoint}"}
+
+    if handler.requires_login and (not _is_logged_in or not _krx_session):
+        return {"success": False, "error": "KRX 로그인이 필요합니다."}
 
+    ctx = ctx or IntentContext()
+    try:
+        # pykrx 호출은 블로킹이므로 이벤트 루프 밖에서 실행
+        with tracing.span(f"intent.{result.intent}", intent=result.intent):
+            return await asyncio.to_thread(handler.func, ctx, result.parameters)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -2313,7 +3119,9 @@ def get_available_intents():
                 "keywords": config["keywords"][:5],
                 "endpoint": config["endpoint"],
                 "requires_login": config["requires_login"],
-                "description": config.get("description", "")
+                "description": config.get("description", ""),
+                "executable": intent_id in INTENT_HANDLERS,
+                "requires": list(INTENT_HANDLERS[intent_id].requires) if intent_id in INTENT_HANDLERS else []
             }
             for intent_id, config in IntentConfig.INTENTS.items()
         ]
@@ -0,0 +1,269 @@
+"""
+Prometheus 형식 메트릭
+=====================================
+
+외부 의존성 없이 Counter / Gauge / Histogram을 제공하고 /metrics 응답(text exposition 0.0.4)을 생성한다.
+
+- 메트릭 정의는 이 모듈에 모아 두고, 각 모듈은 import하여 기록만 한다
+- 캐시/속도 제한기처럼 자체 통계를 가진 객체는 register_collector()로 수집 시점에 읽는다
+
+사용법:
+    from metrics import UPSTREAM_LATENCY
+    with UPSTREAM_LATENCY.time(bld="dbms/MDC/STAT/standard/MDCSTAT01501"):
+        resp = session.post(...)
+
+    text = metrics.render()
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (메트릭 이름, 타입, 설명, [(라벨 dict, 값)])
+Sample = Tuple[Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+_metrics: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[Family]]] = []
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: 라벨 {self.labelnames} 필요 (전달: {tuple(labels)})")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name + "_total", self._labels(k), v) for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    """현재 값 게이지"""
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """블록 실행 동안 +1"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self._labels(k), v) for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램 (초 단위)"""
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key → [버킷별 개수..., 합계, 전체 개수]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """블록 실행 시간 기록"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, state in self._values.items():
+                labels = self._labels(key)
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    out.append((self.name + "_bucket", dict(labels, le=_format_value(bound)), cumulative))
+                out.append((self.name + "_bucket", dict(labels, le="+Inf"), state[-1]))
+                out.append((self.name + "_sum", labels, state[-2]))
+                out.append((self.name + "_count", labels, state[-1]))
+        return out
+
+
+def register_collector(collector: Callable[[], Iterable[Family]]):
+    """수집 시점에 값을 읽는 콜백 등록 (예: 캐시 통계)"""
+    _collectors.append(collector)
+    return collector
+
+
+def render() -> str:
+    """Prometheus text exposition 생성"""
+    lines: List[str] = []
+    for metric in _metrics:
+        samples = metric.samples()
+        if not samples:
+            continue
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for name, labels, value in samples:
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    for collector in _collectors:
+        try:
+            families = list(collector())
+        except Exception as e:
+            print(f"⚠️ 메트릭 수집 실패 ({getattr(collector, '__name__', collector)}): {e}")
+            continue
+        for name, mtype, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {mtype}")
+            sample_name = name + "_total" if mtype == "counter" else name
+            for labels, value in samples:
+                if value is None:
+                    continue
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def instrument_module(module, histogram: "Histogram", errors: "Counter", label: str = "func"):
+    """
+    모듈의 공개 함수를 호출 시간/오류를 기록하는 래퍼로 교체 (예: pykrx.stock)
+
+    functools.wraps로 __module__/__qualname__을 보존하므로 캐시 키(IntentContext.fetch)는 그대로다.
+    """
+    for name in dir(module):
+        func = getattr(module, name)
+        if name.startswith("_") or not callable(func) or isinstance(func, type):
+            continue
+        if getattr(func, "__wrapped_metrics__", False):
+            continue
+
+        def make(func, name):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    errors.inc(**{label: name})
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - started, **{label: name})
+            wrapper.__wrapped_metrics__ = True
+            return wrapper
+
+        setattr(module, name, make(func, name))
+
+
+# ============================================================================
+# 메트릭 정의
+# ============================================================================
+
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "API 엔드포인트 응답 시간", ("method", "route", "status"))
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "처리 중인 API 요청 수")
+
+UPSTREAM_LATENCY = Histogram(
+    "krx_upstream_request_duration_seconds", "KRX HTTP 요청 시간 (재시도 포함)", ("bld",))
+UPSTREAM_ERRORS = Counter(
+    "krx_upstream_errors", "KRX HTTP 요청 오류 수", ("bld", "kind"))
+UPSTREAM_IN_FLIGHT = Gauge(
+    "krx_upstream_requests_in_flight", "진행 중인 KRX HTTP 요청 수")
+
+PYKRX_LATENCY = Histogram(
+    "pykrx_call_duration_seconds", "pykrx 함수 호출 시간", ("func",))
+PYKRX_ERRORS = Counter(
+    "pykrx_call_errors", "pykrx 함수 예외 수", ("func",))
+
+CLASSIFIER_RESULTS = Counter(
+    "intent_classifications", "인텐트 분류 결과 수 (결정 단계별)", ("method",))
+CLASSIFIER_LATENCY = Histogram(
+    "intent_classification_duration_seconds", "인텐트 분류 시간 (결정 단계별)", ("method",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+
+# HTTP_IN_FLIGHT/UPSTREAM_IN_FLIGHT는 요청이 없어도 0으로 노출
+HTTP_IN_FLIGHT.set(0)
+UPSTREAM_IN_FLIGHT.set(0)
@@ -0,0 +1,205 @@
+"""
+수익률/상관관계 행렬 (지수 구성종목 등 종목 집합 × 최근 N 영업일)
+=====================================
+
+일자 × 종목 종가 행렬에서 일간 수익률을 만들고 공분산/상관계수 행렬을 계산한다.
+결측(상장 전, 거래정지)이 있는 종목 쌍은 둘 다 값이 있는 날만 사용한다 (pandas DataFrame.corr와 동일).
+
+쌍별 통계는 4개의 (종목수 × 종목수) 누적 행렬로 보관한다 (Z: 결측 0 수익률, M: 유효 여부).
+
+- cross   = Zᵀ Z        Σ r_i r_j
+- sums    = Zᵀ M        Σ r_i     (j도 유효한 날)
+- squares = (Z²)ᵀ M     Σ r_i²    (j도 유효한 날)
+- counts  = Mᵀ M        공통 유효 일수
+
+최초 구성은 행렬곱(BLAS) 한 번, 하루가 추가되면 새 날을 더하고 가장 오래된 날을 빼는
+rank-1 갱신(np.outer)만 수행한다. 누적 오차를 막기 위해 REBUILD_EVERY 회마다 전체 재계산.
+
+사용법:
+    matrix = ReturnMatrix(tickers, dates, prices)           # prices: (일수, 종목수) 종가
+    matrix.correlation()                                    # (종목수, 종목수)
+    matrix = matrix.advance("20250113", closes)             # 새 영업일 반영 (새 객체)
+    matrix.period_returns([1, 5, 20])                       # {"1D": ..., "5D": ..., "20D": ...}
+
+    python portfolio.py --tickers 200 --window 60 --days 100   # 증분 갱신 ↔ 전체 재계산 비교
+"""
+
+import argparse
+import sys
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+# rank-1 갱신 누적 횟수가 이 값을 넘으면 전체 재계산
+REBUILD_EVERY = 64
+
+
+class ReturnMatrix:
+    """
+    종목 집합의 가격/수익률 행렬과 쌍별 누적 통계
+
+    Args:
+        tickers: 종목 코드 (열 순서)
+        dates: 영업일 (행 순서, 오름차순)
+        prices: (일수, 종목수) 종가, 결측/0은 NaN 처리
+        names: 종목명 (생략 시 종목 코드)
+    """
+
+    __slots__ = ("tickers", "names", "dates", "prices", "returns",
+                 "_cross", "_sums", "_squares", "_counts", "updates")
+
+    def __init__(self, tickers: Sequence[str], dates: Sequence[str], prices: np.ndarray,
+                 names: Optional[Sequence[str]] = None):
+        self.tickers = list(tickers)
+        self.names = list(names) if names is not None else list(tickers)
+        self.dates = list(dates)
+        prices = np.array(prices, dtype=np.float64).reshape(len(self.dates), len(self.tickers))
+        prices[prices == 0] = np.nan
+        self.prices = prices
+        self.returns = _returns(prices[:-1], prices[1:])
+        self._rebuild()
+
+    def _rebuild(self):
+        valid = ~np.isnan(self.returns)
+        z = np.where(valid, self.returns, 0.0)
+        m = valid.astype(np.float64)
+        self._cross = z.T @ z
+        self._sums = z.T @ m
+        self._squares = (z * z).T @ m
+        self._counts = m.T @ m
+        self.updates = 0
+
+    def _apply(self, row: np.ndarray, sign: float):
+        valid = ~np.isnan(row)
+        z = np.where(valid, row, 0.0)
+        m = valid.astype(np.float64)
+        self._cross += sign * np.outer(z, z)
+        self._sums += sign * np.outer(z, m)
+        self._squares += sign * np.outer(z * z, m)
+        self._counts += sign * np.outer(m, m)
+
+    def advance(self, date: str, closes: np.ndarray) -> "ReturnMatrix":
+        """
+        새 영업일 종가 추가 + 가장 오래된 날 제거 → 새 ReturnMatrix (기존 객체는 변경하지 않음)
+
+        창 크기(일수)는 유지된다.
+        """
+        closes = np.array(closes, dtype=np.float64).reshape(len(self.tickers))
+        closes[closes == 0] = np.nan
+        new = object.__new__(ReturnMatrix)
+        new.tickers, new.names = self.tickers, self.names
+        new.dates = self.dates[1:] + [date]
+        new.prices = np.vstack([self.prices[1:], closes])
+        latest = _returns(self.prices[-1], closes)
+        new.returns = np.vstack([self.returns[1:], latest])
+        new._cross, new._sums = self._cross.copy(), self._sums.copy()
+        new._squares, new._counts = self._squares.copy(), self._counts.copy()
+        new.updates = self.updates + 1
+        if new.updates >= REBUILD_EVERY:
+            new._rebuild()
+        else:
+            new._apply(latest, 1.0)
+            new._apply(self.returns[0], -1.0)
+        return new
+
+    def covariance(self, min_periods: int = 2) -> np.ndarray:
+        """쌍별 표본공분산 (공통 유효 일수 < min_periods 이면 NaN)"""
+        n = self._counts
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = (self._cross - self._sums * self._sums.T / n) / (n - 1)
+        cov[n < max(min_periods, 2)] = np.nan
+        return cov
+
+    def correlation(self, min_periods: int = 2) -> np.ndarray:
+        """쌍별 피어슨 상관계수 (각 쌍의 공통 유효일 기준 분산 사용)"""
+        n = self._counts
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = self._cross - self._sums * self._sums.T / n
+            var = np.maximum(self._squares - self._sums * self._sums / n, 0.0)
+            corr = cov / np.sqrt(var * var.T)
+        corr = np.clip(corr, -1.0, 1.0)
+        corr[n < max(min_periods, 2)] = np.nan
+        np.fill_diagonal(corr, np.where(np.diag(n) >= max(min_periods, 2), 1.0, np.nan))
+        return corr
+
+    def period_returns(self, horizons: Iterable[int]) -> Dict[str, np.ndarray]:
+        """기간 수익률 (%) — 최근 종가 / h 영업일 전 종가 - 1 (기간이 창보다 길면 생략)"""
+        result = {}
+        for h in horizons:
+            if 0 < h < len(self.dates):
+                result[f"{h}D"] = _returns(self.prices[-1 - h], self.prices[-1]) * 100.0
+        return result
+
+    def volatility(self, periods_per_year: int = 252) -> np.ndarray:
+        """연환산 변동성 (%) — 일간 수익률 표본표준편차 × √periods_per_year"""
+        n = np.diag(self._counts)
+        sums = np.diag(self._sums)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = (np.diag(self._squares) - sums * sums / n) / (n - 1)
+        return np.sqrt(np.maximum(var, 0.0)) * np.sqrt(periods_per_year) * 100.0
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.prices.nbytes + self.returns.nbytes + self._cross.nbytes
+                + self._sums.nbytes + self._squares.nbytes + self._counts.nbytes)
+
+
+def _returns(before: np.ndarray, after: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return after / before - 1.0
+
+
+def synthetic_prices(days: int, tickers: int, seed: int = 0, missing: float = 0.02) -> np.ndarray:
+    """합성 종가 (일수, 종목수) — 로그 정규 랜덤워크, 일부 결측(NaN)"""
+    rng = np.random.default_rng(seed)
+    prices = 10000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, (days, tickers)), axis=0))
+    prices[rng.random((days, tickers)) < missing] = np.nan
+    return prices
+
+
+def check_advance(prices: np.ndarray, window: int) -> float:
+    """
+    창(window + 1일)을 하루씩 advance하며 매일 전체 재계산과 비교 → 최대 절대 오차
+
+    공분산/상관계수/변동성을 모두 비교한다 (NaN 위치가 다르면 inf).
+    """
+    days, count = prices.shape
+    tickers = [f"{i:06d}" for i in range(count)]
+    dates = [f"D{t:05d}" for t in range(days)]
+    matrix = ReturnMatrix(tickers, dates[:window + 1], prices[:window + 1])
+    worst = 0.0
+    for t in range(window + 1, days):
+        matrix = matrix.advance(dates[t], prices[t])
+        full = ReturnMatrix(tickers, dates[t - window:t + 1], prices[t - window:t + 1])
+        for a, b in ((matrix.covariance(), full.covariance()),
+                     (matrix.correlation(), full.correlation()),
+                     (matrix.volatility(), full.volatility())):
+            if not np.array_equal(np.isnan(a), np.isnan(b)):
+                return float("inf")
+            if a.size:
+                worst = max(worst, float(np.nanmax(np.abs(a - b), initial=0.0)))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="수익률 행렬 증분 갱신 검증")
+    parser.add_argument("--tickers", type=int, default=200, help="종목 수")
+    parser.add_argument("--window", type=int, default=60, help="수익률 창 (영업일)")
+    parser.add_argument("--days", type=int, default=100, help="advance 검증 일수")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="허용 최대 절대 오차")
+    args = parser.parse_args()
+
+    prices = synthetic_prices(args.window + 1 + args.days, args.tickers)
+    worst = check_advance(prices, args.window)
+    if worst > args.tolerance:
+        print(f"❌ advance ↔ 전체 재계산 최대 오차 {worst:.3e} (허용 {args.tolerance:.0e})")
+        sys.exit(1)
+    print(f"✅ {args.days}일 advance ↔ 전체 재계산 최대 오차 {worst:.3e} "
+          f"({args.tickers}종목, 창 {args.window}일, {REBUILD_EVERY}회마다 재계산)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+샘플링 프로파일러 (운영 중 프로세스 진단용)
+=====================================
+
+별도 스레드가 interval마다 sys._current_frames()로 모든 스레드의 호출 스택을 수집하고,
+flamegraph.pl / speedscope / inferno가 읽을 수 있는 collapsed stack 텍스트로 집계한다.
+
+    MainThread;_run_once (base_events.py:1845);...;get_market_cap_safe (main.py:812) 42
+
+- 기본 비활성화 (KRX_PROFILER=1 일 때만 사용 가능)
+- 한 번에 하나의 프로파일만 실행, 실행 시간/샘플 간격/스택 깊이 상한으로 오버헤드 제한
+- 대기 중인 스레드(락/큐/소켓 대기)는 기본 제외
+
+사용법:
+    text = profiler.profile(seconds=10, interval=0.01)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Tuple
+
+ENABLED = os.getenv("KRX_PROFILER", "0") == "1"
+
+MAX_SECONDS = 60.0
+MIN_INTERVAL = 0.005
+MAX_DEPTH = 128
+
+# 스택 최상단이 이 함수들이면 대기 중인 스레드로 간주
+IDLE_FUNCTIONS = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("thread.py", "_worker"),
+}
+
+_lock = threading.Lock()
+_last_run: Dict[str, object] = {}
+
+
+class ProfilerBusy(RuntimeError):
+    """이미 다른 프로파일이 실행 중"""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FUNCTIONS
+
+
+def _collapse(frame, thread_name: str) -> str:
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+def sample(seconds: float, interval: float = 0.01, include_idle: bool = False) -> Tuple[Counter, int]:
+    """
+    현재 프로세스의 스택 샘플 수집 (호출한 스레드에서 블로킹)
+
+    Returns:
+        (collapsed stack → 샘플 수, 샘플링 횟수)
+    """
+    seconds = min(max(seconds, interval), MAX_SECONDS)
+    interval = max(interval, MIN_INTERVAL)
+    own = threading.get_ident()
+    stacks: Counter = Counter()
+    ticks = 0
+
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if not include_idle and _is_idle(frame):
+                continue
+            stacks[_collapse(frame, names.get(ident, f"thread-{ident}"))] += 1
+        ticks += 1
+        time.sleep(interval)
+    return stacks, ticks
+
+
+def profile(seconds: float = 10.0, interval: float = 0.01, include_idle: bool = False) -> str:
+    """
+    collapsed stack 형식 프로파일 생성
+
+    Raises:
+        ProfilerBusy: 이미 실행 중
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy("이미 프로파일 실행 중입니다")
+    try:
+        started = time.time()
+        stacks, ticks = sample(seconds, interval, include_idle)
+        _last_run.update({
+            "started_at": started,
+            "seconds": round(time.time() - started, 2),
+            "interval": max(interval, MIN_INTERVAL),
+            "ticks": ticks,
+            "stacks": len(stacks),
+            "samples": sum(stacks.values()),
+        })
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    finally:
+        _lock.release()
+
+
+def status() -> Dict[str, object]:
+    return {
+        "enabled": ENABLED,
+        "running": _lock.locked(),
+        "last_run": dict(_last_run) or None,
+    }
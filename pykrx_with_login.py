@@ -13,34 +13,86 @@ PyKRX + KRX 로그인 통합 모듈
     # 이제 PyKRX 정상 사용 가능
     df = stock.get_market_ohlcv("20250116")
     df = stock.get_market_fundamental("20250116")  # PER, PBR, 배당수익률
+
+    # 다중 계정 세션 풀 (요청 분산)
+    login_pool_and_patch([("id1", "pw1"), ("id2", "pw2")])
+
+멀티 워커(uvicorn --workers N)에서는 잠금 파일로 리더를 선출하여 리더만 Selenium 로그인을
+수행하고, 나머지 워커는 쿠키 저장소를 감시하여 리더의 쿠키를 적용한다 (krx_leader).
+KRX_LOGIN_LEADER=0 이면 워커마다 직접 로그인.
 """
 
-from krx_session import KRXSession
-from pykrx import stock
-from pykrx.website.comm import webio
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from krx_session import KRXSession, KRXSessionPool, SessionRefresher, COOKIE_FILE
+from krx_leader import LoginCoordinator
+import krx_transport
+from krx_startup import lazy_import
+
+# pykrx는 import 비용이 크므로(matplotlib/pandas) 첫 사용 시 로드
+stock = lazy_import("pykrx.stock")
 
 
 # 전역 세션 객체
 _krx_session = None
+_refresher = None
+_coordinator = None
 
+# 팔로워가 시작 시 리더의 첫 로그인을 기다리는 최대 시간 (초)
+# 시간 초과 후에도 쿠키 감시는 계속되므로 시작을 오래 막지 않도록 짧게 둔다
+LEADER_WAIT_TIMEOUT = float(os.getenv("KRX_LEADER_WAIT", "30"))
 
-def _patched_post_read(self, **params):
-    """세션 쿠키가 포함된 requests.post"""
-    import requests
+# 로그인 대기 중인 팔로워가 세션 준비 여부를 확인하는 간격 (초)
+READY_POLL_INTERVAL = 5.0
 
-    global _krx_session
 
-    if _krx_session and _krx_session.logged_in:
-        # 로그인된 세션 사용
-        resp = _krx_session.session.post(self.url, headers=self.headers, data=params)
-    else:
-        # 기본 동작 (로그인 없이)
-        resp = requests.post(self.url, headers=self.headers, data=params)
+def _coordinate(lock_path, reload) -> Optional[LoginCoordinator]:
+    """
+    로그인 리더 선출 (KRX_LOGIN_LEADER=0 이면 None → 직접 로그인)
+
+    팔로워면 리더의 쿠키를 기다리며, 대기 중 리더가 사라지면 리더로 전환된다.
+    """
+    global _coordinator
+    if os.getenv("KRX_LOGIN_LEADER", "1") == "0":
+        return None
+    # 같은 프로세스가 이전 잠금을 쥐고 있으면 재선출이 불가능하므로 먼저 해제
+    if _coordinator:
+        _coordinator.stop()
+        _coordinator = None
+    coordinator = LoginCoordinator(lock_path, reload)
+    if not coordinator.elect():
+        coordinator.wait_for_leader(timeout=LEADER_WAIT_TIMEOUT)
+    return coordinator
+
+
+def _notify_when_ready(client, on_ready: Optional[Callable[[], None]]):
+    """
+    아직 로그인되지 않은 팔로워 세션이 사용 가능해지면 on_ready 호출
+
+    (리더 쿠키 수신 또는 리더 승격 후 직접 로그인, 세션이 교체되면 중단)
+    """
+    if on_ready is None:
+        return
+
+    def run():
+        while _krx_session is client:
+            if client.logged_in:
+                print("✅ [login-leader] 리더 로그인 쿠키 수신 - 로그인 세션 사용")
+                try:
+                    on_ready()
+                except Exception as e:
+                    print(f"⚠️ [login-leader] 로그인 준비 콜백 오류: {e}")
+                return
+            time.sleep(READY_POLL_INTERVAL)
 
-    return resp
+    threading.Thread(target=run, name="krx-login-ready", daemon=True).start()
 
 
-def login_and_patch(user_id: str, password: str, force: bool = False) -> bool:
+def login_and_patch(user_id: str, password: str, force: bool = False,
+                    auto_refresh: bool = True, on_ready: Optional[Callable[[], None]] = None) -> bool:
     """
     KRX 로그인 후 PyKRX 라이브러리 패치
 
@@ -48,31 +100,172 @@ def login_and_patch(user_id: str, password: str, force: bool = False) -> bool:
         user_id: KRX Data Marketplace 아이디
         password: 비밀번호
         force: 강제 재로그인
+        auto_refresh: 세션 만료 전 백그라운드 재로그인 (SessionRefresher)
+        on_ready: 팔로워가 리더 대기 시간 초과로 False를 반환한 뒤, 나중에 쿠키를 받아
+            세션이 사용 가능해지면 호출
 
     Returns:
-        로그인 성공 여부
+        로그인 성공 여부 (팔로워 대기 시간 초과 시 False지만 패치/쿠키 감시는 유지)
     """
-    global _krx_session
+    global _krx_session, _coordinator
 
     # 세션 생성
-    _krx_session = KRXSession(headless=True)
-
-    # 로그인
-    if not _krx_session.login(user_id, password, force=force):
+    session = KRXSession(headless=True)
+
+    # 재생 서버 사용 시 Selenium 로그인/리더 선출/갱신 생략
+    if krx_transport.offline():
+        session.use_offline()
+        stop_refresher()
+        _krx_session = session
+        krx_transport.patch_pykrx(get_session)
+        print(f"✅ PyKRX 패치 완료! (오프라인 재생: {krx_transport.BASE_URL_OVERRIDE})")
+        return True
+
+    coordinator = _coordinate(session.cookie_file.with_suffix(".lock"), session.reload_if_newer)
+    leader = coordinator is None or coordinator.is_leader
+
+    # 로그인 (팔로워는 리더가 저장한 쿠키 사용)
+    if leader:
+        ok = session.login(user_id, password, force=force)
+        if not ok:
+            if coordinator:
+                coordinator.stop()
+            return False
+    else:
+        ok = session.logged_in
+
+    # 이전 세션의 갱신기 정리 후 교체
+    stop_refresher()
+    _krx_session = session
+    _coordinator = coordinator
+
+    # PyKRX의 Post 클래스 패치 (krx_transport 경유)
+    krx_transport.patch_pykrx(get_session)
+
+    def start_refresher():
+        global _refresher
+        _refresher = SessionRefresher(session, user_id, password)
+        _refresher.start()
+
+    if auto_refresh and leader:
+        start_refresher()
+    elif not leader:
+        # 리더가 종료되면 이 워커가 갱신 담당 (쿠키 대기 시간 초과여도 감시는 계속)
+        coordinator.on_promoted = start_refresher if auto_refresh else None
+        coordinator.start_watching()
+
+    if not ok:
+        _notify_when_ready(session, on_ready)
+        print("⚠️ 리더 로그인 대기 시간 초과 - PyKRX 패치 완료, 리더 쿠키를 받으면 로그인 세션 사용")
         return False
 
-    # PyKRX의 Post 클래스 패치
-    webio.Post.read = _patched_post_read
-
     print("✅ PyKRX 패치 완료! 이제 모든 기능 사용 가능")
     return True
 
 
-def get_session() -> KRXSession:
-    """현재 세션 반환"""
+def login_pool_and_patch(accounts: List[Tuple[str, str]], force: bool = False,
+                         auto_refresh: bool = True, on_ready: Optional[Callable[[], None]] = None) -> bool:
+    """
+    다중 계정 세션 풀 로그인 후 PyKRX 라이브러리 패치
+
+    Args:
+        accounts: (아이디, 비밀번호) 목록
+        force: 강제 재로그인
+        auto_refresh: 세션별 백그라운드 재로그인
+        on_ready: 팔로워 대기 시간 초과 후 세션이 사용 가능해지면 호출 (login_and_patch와 동일)
+
+    Returns:
+        하나 이상의 세션 로그인 성공 여부
+    """
+    global _krx_session, _coordinator
+
+    pool = KRXSessionPool(accounts, headless=True, auto_refresh=False)
+
+    if krx_transport.offline():
+        for member in pool.members:
+            member.krx.use_offline()
+        stop_refresher()
+        _krx_session = pool
+        krx_transport.patch_pykrx(get_session)
+        print(f"✅ PyKRX 패치 완료! (오프라인 재생, 세션 풀 {len(pool.members)}개 계정)")
+        return True
+
+    coordinator = _coordinate(COOKIE_FILE.with_name(".krx_pool.lock"), pool.reload_from_disk)
+    leader = coordinator is None or coordinator.is_leader
+
+    if leader:
+        pool.auto_refresh = auto_refresh
+        ok = pool.login_all(force=force)
+        if not ok:
+            pool.stop()
+            if coordinator:
+                coordinator.stop()
+            return False
+    else:
+        ok = pool.logged_in
+
+    stop_refresher()
+    _krx_session = pool
+    _coordinator = coordinator
+
+    krx_transport.patch_pykrx(get_session)
+
+    if not leader:
+        coordinator.on_promoted = pool.start_refreshers if auto_refresh else None
+        coordinator.start_watching()
+
+    if not ok:
+        _notify_when_ready(pool, on_ready)
+        print("⚠️ 리더 로그인 대기 시간 초과 - PyKRX 패치 완료, 리더 쿠키를 받으면 세션 풀 사용")
+        return False
+
+    print(f"✅ PyKRX 패치 완료! (세션 풀 {len(pool.members)}개 계정)")
+    return True
+
+
+def parse_accounts(value: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    KRX_ACCOUNTS 환경변수 파싱
+
+    형식: "id1:pw1,id2:pw2" (비밀번호에 ':'가 포함될 수 있으므로 첫 ':' 기준 분리)
+    """
+    value = value if value is not None else os.getenv("KRX_ACCOUNTS", "")
+    accounts = []
+    for item in value.split(","):
+        user_id, sep, password = item.strip().partition(":")
+        if user_id and sep:
+            accounts.append((user_id, password))
+    return accounts
+
+
+def stop_refresher():
+    """세션 갱신기 종료 (세션 풀이면 모든 세션의 갱신기 종료, 리더 잠금 해제)"""
+    global _refresher, _coordinator
+    if _refresher:
+        _refresher.stop()
+        _refresher = None
+    if isinstance(_krx_session, KRXSessionPool):
+        _krx_session.stop()
+    if _coordinator:
+        _coordinator.stop()
+        _coordinator = None
+
+
+def get_session():
+    """현재 세션 반환 (KRXSession 또는 KRXSessionPool)"""
     return _krx_session
 
 
+def get_refresher():
+    """현재 세션 갱신기 반환 (없으면 None)"""
+    return _refresher
+
+
+def get_coordinator():
+    """현재 로그인 리더 선출기 반환 (비활성화 시 None)"""
+    return _coordinator
+
+
 def main():
     """테스트"""
     import sys
@@ -0,0 +1,399 @@
+"""
+전종목 스크리너 (필터/정렬 식)
+=====================================
+
+시가총액 + PER/PBR/배당수익률 + 외국인 보유 테이블을 티커 기준으로 조인한 MarketSnapshot 위에서
+필터식과 정렬식을 numpy 배열 연산으로 평가한다. (행 단위 반복 없음, 전종목 평가 1ms 내외)
+
+필터식:
+    PER < 10 and 배당수익률 > 3%
+    시가총액 >= 1조 and (시장 == "KOSPI" or 외국인보유율 > 30)
+    PBR < 1 and not 종목명 in ("삼성전자", "SK하이닉스")
+    EPS / 종가 * 100 > 8                         # 산술 연산 (+ - * /)
+
+- 비교: < <= > >= == !=, 문자열 열은 == != in 만 지원
+- 논리: and or not (&& || ! 도 허용), 괄호
+- 숫자 단위: % (그대로), 만 / 억 / 조
+- 결측값(NaN)과의 비교는 항상 거짓
+
+정렬식: "시가총액 desc, PER" 또는 "-시가총액, PER asc" (결측값은 항상 뒤)
+
+사용법:
+    snapshot = build_screen_snapshot(prices, fundamentals, foreign)
+    result = screen(snapshot, "PER < 10 and 배당수익률 > 3", sort="배당수익률 desc", limit=20)
+    result["data"]   # 조건에 맞는 행만 (dict 목록)
+"""
+
+import re
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from krx_decode import to_records
+from market_store import MarketSnapshot, StringPool
+
+# 응답 필드 ← KRX 필드 (테이블별)
+PRICE_FIELDS = {
+    "ISU_SRT_CD": "티커", "ISU_ABBRV": "종목명", "MKT_NM": "시장", "SECT_TP_NM": "소속부",
+    "TDD_CLSPRC": "종가", "FLUC_RT": "등락률", "ACC_TRDVOL": "거래량", "ACC_TRDVAL": "거래대금",
+    "MKTCAP": "시가총액", "LIST_SHRS": "상장주식수",
+}
+FUNDAMENTAL_FIELDS = {
+    "EPS": "EPS", "PER": "PER", "BPS": "BPS", "PBR": "PBR", "DPS": "DPS", "DVD_YLD": "배당수익률",
+}
+FOREIGN_FIELDS = {
+    "FORN_HD_QTY": "외국인보유수량", "FORN_SHR_RT": "외국인보유율", "FORN_LMT_EXHST_RT": "외국인한도소진율",
+}
+
+# 필터/정렬식에서 허용하는 별칭 (대소문자 무시)
+ALIASES = {
+    "ticker": "티커", "code": "티커", "종목코드": "티커", "name": "종목명", "market": "시장",
+    "close": "종가", "price": "종가", "change": "등락률", "volume": "거래량", "value": "거래대금",
+    "marketcap": "시가총액", "mktcap": "시가총액", "시총": "시가총액", "shares": "상장주식수",
+    "div": "배당수익률", "dvd_yld": "배당수익률", "dividend": "배당수익률", "배당": "배당수익률",
+    "foreign": "외국인보유율", "외국인": "외국인보유율", "forn_shr_rt": "외국인보유율",
+}
+
+UNITS = {"%": 1, "만": 1e4, "억": 1e8, "조": 1e12}
+
+DEFAULT_LIMIT = 50
+
+
+class ScreenerError(ValueError):
+    """필터/정렬식 오류 (위치 포함 메시지)"""
+
+
+# ----------------------------------------------------------------------
+# 조인 테이블
+# ----------------------------------------------------------------------
+
+def _select(df: Optional[pd.DataFrame], fields: Dict[str, str]) -> Optional[pd.DataFrame]:
+    if df is None or df.empty or "ISU_SRT_CD" not in df.columns:
+        return None
+    columns = [c for c in fields if c in df.columns]
+    return df[columns].rename(columns=fields)
+
+
+def build_screen_frame(prices: pd.DataFrame, fundamentals: Optional[pd.DataFrame] = None,
+                       foreign: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    전종목시세 + PER_PBR_배당수익률 + 외국인보유량 (krx_decode로 변환된 KRX 필드명 DataFrame) → 조인 DataFrame
+
+    펀더멘털/외국인 테이블이 없으면(비로그인) 해당 열은 NaN으로 채운다.
+    """
+    frame = _select(prices, PRICE_FIELDS)
+    if frame is None:
+        return pd.DataFrame()
+    frame = frame.drop_duplicates("티커")
+    for table, fields in ((fundamentals, FUNDAMENTAL_FIELDS), (foreign, FOREIGN_FIELDS)):
+        part = _select(table, dict(fields, ISU_SRT_CD="티커"))
+        if part is not None:
+            frame = frame.merge(part.drop_duplicates("티커"), on="티커", how="left")
+        for name in fields.values():
+            if name not in frame.columns:
+                frame[name] = np.float32(np.nan)
+    # PER/PBR 0은 KRX의 '해당 없음' 표기 (적자 등)
+    for name in ("PER", "PBR"):
+        frame[name] = frame[name].mask(frame[name] == 0)
+    order = [c for fields in (PRICE_FIELDS, FUNDAMENTAL_FIELDS, FOREIGN_FIELDS) for c in fields.values()]
+    return frame[[c for c in order if c in frame.columns]].reset_index(drop=True)
+
+
+def build_screen_snapshot(prices: pd.DataFrame, fundamentals: Optional[pd.DataFrame] = None,
+                          foreign: Optional[pd.DataFrame] = None,
+                          pool: Optional[StringPool] = None) -> Optional[MarketSnapshot]:
+    frame = build_screen_frame(prices, fundamentals, foreign)
+    return MarketSnapshot.from_frame(frame, pool) if not frame.empty else None
+
+
+# ----------------------------------------------------------------------
+# 식 파서 (재귀 하강 → numpy 평가 함수)
+# ----------------------------------------------------------------------
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>\d+(?:\.\d+)?)(?P<unit>[%만억조])?
+      | (?P<string>"[^"]*"|'[^']*')
+      | (?P<op><=|>=|==|!=|&&|\|\||[<>=!(),+\-*/])
+      | (?P<name>[A-Za-z_가-힣][A-Za-z0-9_가-힣]*)
+    )""", re.VERBOSE)
+
+_KEYWORDS = {"and": "and", "or": "or", "not": "not", "in": "in", "&&": "and", "||": "or", "!": "not", "=": "=="}
+
+# 평가 함수: snapshot → ("num", ndarray) | ("text", 코드 ndarray) | ("str", 문자열) | ("bool", ndarray)
+Value = Tuple[str, Any]
+Node = Callable[[MarketSnapshot], Value]
+
+
+def _tokenize(text: str) -> List[Tuple[str, Any, int]]:
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise ScreenerError(f"{pos + 1}번째 문자 해석 불가: {text[pos:pos + 10]!r}")
+        start = m.start(m.lastgroup)
+        if m.group("number") is not None:
+            tokens.append(("number", float(m.group("number")) * UNITS.get(m.group("unit"), 1), start))
+        elif m.group("string") is not None:
+            tokens.append(("string", m.group("string")[1:-1], start))
+        elif m.group("op") is not None:
+            op = m.group("op")
+            tokens.append(("op", _KEYWORDS.get(op, op), start))
+        else:
+            name = m.group("name")
+            if name.lower() in _KEYWORDS:
+                tokens.append(("op", _KEYWORDS[name.lower()], start))
+            else:
+                tokens.append(("name", name, start))
+        pos = m.end()
+    return tokens
+
+
+def resolve_field(name: str, columns: Sequence[str]) -> str:
+    """필드명/별칭 → 조인 테이블 열 이름"""
+    if name in columns:
+        return name
+    target = ALIASES.get(name.lower(), name)
+    for column in columns:
+        if column == target or column.lower() == target.lower():
+            return column
+    raise ScreenerError(f"알 수 없는 필드: {name} (사용 가능: {', '.join(columns)})")
+
+
+def _numeric(value: Value, what: str) -> np.ndarray:
+    kind, data = value
+    if kind == "num":
+        return data
+    raise ScreenerError(f"{what}에는 숫자 필드/값만 사용할 수 있습니다")
+
+
+def _as_bool(value: Value) -> np.ndarray:
+    if value[0] != "bool":
+        raise ScreenerError("조건식이 아닙니다 (비교 연산자 필요)")
+    return value[1]
+
+
+_COMPARE = {
+    "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+    "==": np.equal, "!=": np.not_equal,
+}
+_ARITH = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide}
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.i = 0
+
+    def peek(self, *values) -> bool:
+        if self.i >= len(self.tokens):
+            return False
+        kind, value, _ = self.tokens[self.i]
+        return kind == "op" and value in values
+
+    def take(self):
+        if self.i >= len(self.tokens):
+            raise ScreenerError("식이 완결되지 않았습니다")
+        token = self.tokens[self.i]
+        self.i += 1
+        return token
+
+    def expect(self, value: str):
+        kind, got, pos = self.take()
+        if kind != "op" or got != value:
+            raise ScreenerError(f"{pos + 1}번째 문자: '{value}' 필요 ({got!r})")
+
+    def parse(self) -> Node:
+        node = self.or_()
+        if self.i < len(self.tokens):
+            raise ScreenerError(f"{self.tokens[self.i][2] + 1}번째 문자부터 해석 불가")
+        return node
+
+    def or_(self) -> Node:
+        node = self.and_()
+        while self.peek("or"):
+            self.take()
+            left, right = node, self.and_()
+            node = lambda s, l=left, r=right: ("bool", _as_bool(l(s)) | _as_bool(r(s)))
+        return node
+
+    def and_(self) -> Node:
+        node = self.not_()
+        while self.peek("and"):
+            self.take()
+            left, right = node, self.not_()
+            node = lambda s, l=left, r=right: ("bool", _as_bool(l(s)) & _as_bool(r(s)))
+        return node
+
+    def not_(self) -> Node:
+        if self.peek("not"):
+            self.take()
+            inner = self.not_()
+            return lambda s: ("bool", ~_as_bool(inner(s)))
+        return self.compare()
+
+    def compare(self) -> Node:
+        left = self.sum()
+        if self.peek("in"):
+            self.take()
+            return self.in_list(left)
+        if self.peek(*_COMPARE):
+            op = self.take()[1]
+            right = self.sum()
+            return lambda s: _compare(op, left(s), right(s), s)
+        return left
+
+    def in_list(self, left: Node) -> Node:
+        self.expect("(")
+        items = []
+        while True:
+            kind, value, pos = self.take()
+            if kind not in ("number", "string"):
+                raise ScreenerError(f"{pos + 1}번째 문자: in 목록에는 숫자/문자열만 사용할 수 있습니다")
+            items.append(value)
+            if self.peek(")"):
+                self.take()
+                break
+            self.expect(",")
+        return lambda s: _isin(left(s), items, s)
+
+    def sum(self) -> Node:
+        node = self.term()
+        while self.peek("+", "-"):
+            op = self.take()[1]
+            left, right = node, self.term()
+            node = lambda s, l=left, r=right, f=_ARITH[op]: ("num", f(_numeric(l(s), "산술"), _numeric(r(s), "산술")))
+        return node
+
+    def term(self) -> Node:
+        node = self.unary()
+        while self.peek("*", "/"):
+            op = self.take()[1]
+            left, right = node, self.unary()
+            node = lambda s, l=left, r=right, f=_ARITH[op]: ("num", f(_numeric(l(s), "산술"), _numeric(r(s), "산술")))
+        return node
+
+    def unary(self) -> Node:
+        if self.peek("-"):
+            self.take()
+            inner = self.unary()
+            return lambda s: ("num", -_numeric(inner(s), "부호"))
+        return self.atom()
+
+    def atom(self) -> Node:
+        kind, value, pos = self.take()
+        if kind == "number":
+            number = np.float64(value)
+            return lambda s: ("num", number)
+        if kind == "string":
+            return lambda s: ("str", value)
+        if kind == "name":
+            return lambda s: _column(s, value)
+        if value == "(":
+            node = self.or_()
+            self.expect(")")
+            return node
+        raise ScreenerError(f"{pos + 1}번째 문자: 예상하지 못한 '{value}'")
+
+
+def _column(snapshot: MarketSnapshot, name: str) -> Value:
+    column = resolve_field(name, list(snapshot.columns))
+    values = snapshot.columns[column]
+    if column in snapshot.text:
+        return ("text", values)
+    return ("num", values.astype(np.float64, copy=False) if values.dtype == np.float32 else values)
+
+
+def _compare(op: str, left: Value, right: Value, snapshot: MarketSnapshot) -> Value:
+    kinds = {left[0], right[0]}
+    if "text" in kinds or "str" in kinds:
+        if op not in ("==", "!="):
+            raise ScreenerError("문자열 필드는 ==, !=, in 만 사용할 수 있습니다")
+        if left[0] == "str":
+            left, right = right, left
+        if left[0] != "text" or right[0] != "str":
+            raise ScreenerError("문자열 비교는 '필드 == \"값\"' 형식이어야 합니다")
+        return ("bool", _COMPARE[op](left[1], snapshot.pool.lookup(right[1])))
+    with np.errstate(invalid="ignore"):
+        return ("bool", _COMPARE[op](_numeric(left, "비교"), _numeric(right, "비교")))
+
+
+def _isin(left: Value, items: List[Any], snapshot: MarketSnapshot) -> Value:
+    if left[0] == "text":
+        return ("bool", np.isin(left[1], [snapshot.pool.lookup(str(v)) for v in items]))
+    return ("bool", np.isin(_numeric(left, "in"), [v for v in items if isinstance(v, float)]))
+
+
+@lru_cache(maxsize=256)
+def compile_filter(text: str) -> Node:
+    """필터식 → 평가 함수 (같은 식은 재사용)"""
+    return _Parser(text).parse()
+
+
+@lru_cache(maxsize=256)
+def parse_sort(text: str) -> Tuple[Tuple[str, bool], ...]:
+    """정렬식 → ((필드, 내림차순 여부), ...)"""
+    keys = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        descending = item.startswith("-")
+        parts = item.lstrip("-+").split()
+        if len(parts) == 2 and parts[1].lower() in ("asc", "desc"):
+            descending = parts[1].lower() == "desc"
+        elif len(parts) != 1:
+            raise ScreenerError(f"정렬식 해석 불가: {item!r} (예: 시가총액 desc, PER)")
+        keys.append((parts[0], descending))
+    return tuple(keys)
+
+
+def _sort_keys(snapshot: MarketSnapshot, rows: np.ndarray, keys) -> List[np.ndarray]:
+    """np.lexsort 키 목록 (마지막이 1순위, 결측값은 방향과 무관하게 뒤)"""
+    lex = []
+    for name, descending in reversed(keys):
+        column = resolve_field(name, list(snapshot.columns))
+        if column in snapshot.text:
+            _, ranks = np.unique(snapshot.column(column)[rows].astype(str), return_inverse=True)
+            values, missing = ranks.astype(np.float64), np.zeros(len(rows), dtype=bool)
+        else:
+            values = snapshot.columns[column][rows].astype(np.float64)
+            missing = np.isnan(values)
+        lex.append(-values if descending else values)
+        lex.append(missing)
+    return lex
+
+
+def screen(snapshot: MarketSnapshot, expression: str = "", sort: Optional[str] = None,
+           limit: int = DEFAULT_LIMIT, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    필터 + 정렬 + 상위 limit행
+
+    Returns:
+        {"total": 전체 행 수, "matched": 조건 만족 행 수, "count", "elapsed_ms", "data": [...]}
+    """
+    started = time.perf_counter()
+    n = len(snapshot)
+    if expression.strip():
+        mask = _as_bool(compile_filter(expression.strip())(snapshot))
+        rows = np.flatnonzero(np.broadcast_to(mask, (n,)))
+    else:
+        rows = np.arange(n)
+    keys = parse_sort(sort) if sort else ()
+    if keys and len(rows):
+        rows = rows[np.lexsort(_sort_keys(snapshot, rows, keys))]
+    selected = rows[:max(limit, 0)]
+    columns = [resolve_field(f, list(snapshot.columns)) for f in fields] if fields else list(snapshot.columns)
+    data = to_records(pd.DataFrame({c: snapshot.column(c)[selected] for c in columns}))
+    return {
+        "total": n,
+        "matched": int(len(rows)),
+        "count": len(data),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        "data": data,
+    }
@@ -0,0 +1,249 @@
+"""
+요청 단위 트레이싱 (경량 span)
+=====================================
+
+contextvars 기반 span으로 한 요청 안에서 분류 → 인텐트 실행 → upstream 호출 → 직렬화 시간을 기록한다.
+asyncio 태스크와 asyncio.to_thread는 컨텍스트를 복사하므로 별도 처리 없이 부모 span에 연결된다.
+(ThreadPoolExecutor에 직접 제출할 때는 wrap_context()로 감싼다)
+
+- 추적 중이 아닐 때 span()은 컨텍스트 변수 조회 1회만 하는 no-op
+- 완료된 trace는 OTLP/JSON(ExportTraceServiceRequest) 형식으로 내보냄
+
+환경변수:
+    KRX_TRACE_EXPORT  file:/경로.jsonl (trace당 1줄) 또는 http://collector:4318/v1/traces
+    KRX_TRACE_SAMPLE  내보내기 대상 요청 비율 (기본 1.0)
+    KRX_TRACE_DEBUG   1이면 X-Debug-Trace: 1 요청 헤더에 대해 응답 본문에 "_trace" 포함
+
+사용법:
+    with tracing.span("krx.get_market_data", bld=bld) as s:
+        ...
+        if s: s.set(cache="hit")
+"""
+
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SERVICE_NAME = "pykrx-api"
+DEBUG_HEADER = "x-debug-trace"
+
+
+class Span:
+    """단일 span (OTLP span 필드와 동일한 의미)"""
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        """속성 추가"""
+        self.attributes.update(attributes)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items() if v is not None],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class Trace:
+    """한 요청의 span 모음"""
+
+    def __init__(self, export: bool):
+        self.trace_id = secrets.token_hex(16)
+        self.export = export
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest"""
+        with self._lock:
+            spans = [s.to_otlp() for s in self.spans]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    _otlp_attribute("service.name", SERVICE_NAME),
+                    _otlp_attribute("process.pid", os.getpid()),
+                ]},
+                "scopeSpans": [{"scope": {"name": "tracing"}, "spans": spans}],
+            }]
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        v = {"boolValue": value}
+    elif isinstance(value, int):
+        v = {"intValue": str(value)}
+    elif isinstance(value, float):
+        v = {"doubleValue": value}
+    else:
+        v = {"stringValue": str(value)}
+    return {"key": key, "value": v}
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    하위 span 기록 (추적 중이 아니면 None을 넘기는 no-op)
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    s = Span(trace, name, parent.span_id if parent else None, attributes)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.add(s)
+
+
+def traced(name: Optional[str] = None):
+    """함수 전체를 span으로 기록하는 데코레이터"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_module(module, prefix: str):
+    """모듈의 공개 함수를 span 기록 래퍼로 교체 (예: pykrx.stock → "pykrx.get_market_ohlcv")"""
+    for name in dir(module):
+        func = getattr(module, name)
+        if name.startswith("_") or not callable(func) or isinstance(func, type):
+            continue
+        if getattr(func, "__wrapped_tracing__", False):
+            continue
+        wrapper = traced(f"{prefix}.{name}")(func)
+        wrapper.__wrapped_tracing__ = True
+        setattr(module, name, wrapper)
+
+
+def wrap_context(func: Callable) -> Callable:
+    """현재 컨텍스트(trace/span)를 유지한 채 다른 스레드에서 실행할 수 있도록 감싸기"""
+    ctx = contextvars.copy_context()
+    # 같은 Context는 여러 스레드에서 동시에 run할 수 없으므로 호출마다 복사
+    return lambda *args, **kwargs: ctx.copy().run(func, *args, **kwargs)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+# ============================================================================
+# 요청 단위 trace 시작/종료
+# ============================================================================
+
+EXPORT_TARGET = os.getenv("KRX_TRACE_EXPORT", "").strip()
+SAMPLE_RATE = float(os.getenv("KRX_TRACE_SAMPLE", "1.0"))
+DEBUG_ENABLED = os.getenv("KRX_TRACE_DEBUG", "0") == "1"
+
+
+def should_trace(debug_requested: bool) -> Tuple[bool, bool]:
+    """(추적 여부, 내보내기 여부)"""
+    export = bool(EXPORT_TARGET) and random.random() < SAMPLE_RATE
+    return export or (DEBUG_ENABLED and debug_requested), export
+
+
+@contextmanager
+def request_trace(name: str, export: bool, **attributes):
+    """요청 루트 span 시작 (종료 시 내보내기 대상이면 exporter로 전달)"""
+    trace = Trace(export)
+    trace_token = _current_trace.set(trace)
+    try:
+        with span(name, **attributes) as root:
+            yield trace, root
+    finally:
+        _current_trace.reset(trace_token)
+        if trace.export:
+            _exporter.submit(trace)
+
+
+class _Exporter:
+    """백그라운드 스레드에서 OTLP/JSON 전송 (요청 경로를 막지 않음)"""
+
+    def __init__(self, target: str, max_queue: int = 1000):
+        self.target = target
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+        self.exported = 0
+
+    def submit(self, trace: Trace):
+        if not self.target:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                self._write(trace.to_otlp())
+                self.exported += 1
+            except Exception as e:
+                self.dropped += 1
+                print(f"⚠️ [trace] 내보내기 실패: {e}")
+
+    def _write(self, payload: Dict[str, Any]):
+        if self.target.startswith(("http://", "https://")):
+            import requests
+            requests.post(self.target, json=payload, timeout=5)
+        else:
+            path = self.target[len("file:"):] if self.target.startswith("file:") else self.target
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+
+_exporter = _Exporter(EXPORT_TARGET)